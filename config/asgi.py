@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+
+Las lecturas públicas usan las vistas asíncronas (config/urls_asgi.py).
+Despliegue con los workers de uvicorn, por ejemplo:
+
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
 """
 
 import os
@@ -12,5 +17,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('DJANGO_ROOT_URLCONF', 'config.urls_asgi')
 
 application = get_asgi_application()
@@ -34,8 +34,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero: mide la petición completa, incluido el resto de middlewares
+    'content.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Sirve STATIC_ROOT con las versiones .br/.gz que genera `manage.py precompress`
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -52,7 +56,8 @@ CSRF_COOKIE_SECURE = not DEBUG
 SESSION_COOKIE_SECURE = not DEBUG
 SECURE_SSL_REDIRECT = not DEBUG
 
-ROOT_URLCONF = 'config.urls'
+# config/asgi.py usa config.urls_asgi (lecturas públicas asíncronas)
+ROOT_URLCONF = os.getenv('DJANGO_ROOT_URLCONF', 'config.urls')
 
 TEMPLATES = [
     {
@@ -155,13 +160,38 @@ IMAGE_UPLOAD_ALLOWED_TYPES = [
     'image/webp'
 ]
 IMAGE_MAX_DIMENSIONS = (1920, 1080)
+# Límite de píxeles declarados (protección contra bombas de descompresión)
+IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+
+# Derivados responsivos (srcset): anchos y formatos modernos que se generan
+# además del formato original
+IMAGE_VARIANT_WIDTHS = [320, 640, 1024, 1920]
+IMAGE_VARIANT_FORMATS = ['webp']
+
+# Procesamiento de imágenes en segundo plano (pool de hilos por worker).
+# También puede pedirse por petición con ?async=1
+IMAGE_PROCESSING_ASYNC = os.getenv('IMAGE_PROCESSING_ASYNC', 'False') == 'True'
+IMAGE_PROCESSING_WORKERS = int(os.getenv('IMAGE_PROCESSING_WORKERS', '2'))
+IMAGE_JOB_TIMEOUT = 60 * 60 * 24
+
+# Resumen de publicaciones (precalculado al guardar)
+PUBLICATION_EXCERPT_LENGTH = 280
+PUBLICATION_WORDS_PER_MINUTE = 200
+
+# Límites del layout, validados al escribir: acotan el costo de un payload malicioso
+LAYOUT_MAX_BYTES = 2 * 1024 * 1024
+LAYOUT_MAX_ROWS = 500
+LAYOUT_MAX_CELLS_PER_ROW = 12
+LAYOUT_MAX_CELL_LENGTH = 200_000
+LAYOUT_MAX_DEPTH = 8
 
 # Estructura de directorios para uploads
 UPLOAD_PATHS = {
     'editor_uploads': 'publications/',  
     'featured_images': 'publications/', 
     'temp_uploads': 'temp_uploads/',  # Para imágenes temporales
-    'temp': 'uploads/temp/'
+    'temp': 'uploads/temp/',
+    'assets': 'assets/',  # Imágenes guardadas por contenido (hash), URLs inmutables
 }
 
 # Crear directorios necesarios
@@ -170,7 +200,8 @@ MEDIA_DIRS = [
     os.path.join(MEDIA_ROOT, UPLOAD_PATHS['editor_uploads']),
     os.path.join(MEDIA_ROOT, UPLOAD_PATHS['featured_images']),
     os.path.join(MEDIA_ROOT, UPLOAD_PATHS['temp_uploads']),
-    os.path.join(MEDIA_ROOT, UPLOAD_PATHS['temp'])
+    os.path.join(MEDIA_ROOT, UPLOAD_PATHS['temp']),
+    os.path.join(MEDIA_ROOT, UPLOAD_PATHS['assets']),
 ]
 for dir_path in MEDIA_DIRS:
     os.makedirs(dir_path, exist_ok=True)
@@ -219,12 +250,43 @@ TINYMCE_SPELLCHECKER = True
 TINYMCE_COMPRESSOR = True
 
 # Cache settings
+# La caché debe ser compartida por todos los workers de gunicorn: por defecto se usa
+# el disco (FileBasedCache); en producción puede apuntarse a Redis/Memcached por entorno.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')),
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
     }
 }
 
+# Caché de respuestas de la API pública (se invalida por versión, no por TTL)
+PUBLIC_API_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Portada pública (/api/public/home/): destacadas y últimas por sección
+PUBLIC_HOME_FEATURED = 6
+PUBLIC_HOME_PER_SECTION = 4
+PUBLIC_HOME_MAX_PER_SECTION = 20
+
+# Exportación estática de la API pública (comando export_snapshot): el servidor
+# web sirve PUBLIC_SNAPSHOT_URL directamente desde PUBLIC_SNAPSHOT_ROOT
+PUBLIC_SNAPSHOT_ROOT = os.getenv('PUBLIC_SNAPSHOT_ROOT', '/home/mCEEE/mCEEE/snapshot')
+PUBLIC_SNAPSHOT_URL = os.getenv('PUBLIC_SNAPSHOT_URL', '/snapshot/')
+# Dominio con que se generan las URLs absolutas (imágenes) de los archivos
+PUBLIC_SNAPSHOT_BASE_URL = os.getenv('PUBLIC_SNAPSHOT_BASE_URL', '')
+
+# Métricas de rendimiento (MetricsMiddleware, expuestas en /api/metrics/).
+# Cada worker vuelca las suyas a METRICS_DIR cada METRICS_FLUSH_INTERVAL
+# segundos; conviene vaciar el directorio al reiniciar gunicorn
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(BASE_DIR, 'metrics'))
+METRICS_FLUSH_INTERVAL = 10
+# Token para el recolector (Prometheus): "Authorization: Token <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 # Configuración de logging
 LOGGING = {
     'version': 1,
@@ -0,0 +1,9 @@
+# config/urls_asgi.py
+from django.urls import path, include
+from .urls import urlpatterns as sync_urlpatterns
+
+# URLconf del despliegue ASGI (config/asgi.py): las lecturas públicas van a
+# las vistas asíncronas y el resto de la API a las mismas vistas que en WSGI
+urlpatterns = [
+    path('api/public/', include('content.urls_public_async')),
+] + sync_urlpatterns
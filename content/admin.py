@@ -1,6 +1,6 @@
 # content/admin.py
 from django.contrib import admin
-from .models import Section, Publication, Biography
+from .models import Section, Publication, Biography, MediaAsset
 
 @admin.register(Section)
 class SectionAdmin(admin.ModelAdmin):
@@ -24,4 +24,11 @@ class BiographyAdmin(admin.ModelAdmin):
     list_display = ['name', 'position', 'email', 'is_active', 'order']
     list_filter = ['is_active']
     search_fields = ['name', 'position', 'email']
-    ordering = ['order', 'name']
\ No newline at end of file
+    ordering = ['order', 'name']
+
+@admin.register(MediaAsset)
+class MediaAssetAdmin(admin.ModelAdmin):
+    list_display = ['path', 'created_at']
+    search_fields = ['path', 'sha256']
+    readonly_fields = ['sha256', 'path', 'variants']
+    raw_id_fields = ['created_by']
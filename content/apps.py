@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class ContentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'content'
+
+    def ready(self):
+        from . import signals
+        from .middleware import install_query_metrics
+        post_migrate.connect(signals.invalidate_public_cache, sender=self)
+        connection_created.connect(install_query_metrics)
@@ -0,0 +1,201 @@
+# content/management/commands/benchmark_api.py
+import io
+import json
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlencode
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from content.models import Publication, Section
+from content.utils.public_cache import bump_version
+
+
+def percentile(samples, q):
+    """Percentil por rango más cercano (samples ordenadas)"""
+    if not samples:
+        return None
+    index = max(0, min(len(samples) - 1, round(q / 100 * len(samples) + 0.5) - 1))
+    return samples[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta peticiones concurrentes contra los endpoints públicos y de '
+        'administración a través de la aplicación WSGI y reporta en JSON el '
+        'throughput y las latencias p50/p95/p99 por endpoint. Usar con datos de seed_content'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Peticiones por endpoint')
+        parser.add_argument('--concurrency', type=int, default=8, help='Peticiones simultáneas (hilos)')
+        parser.add_argument('--warmup', type=int, default=10, help='Peticiones previas (no medidas) por endpoint')
+        parser.add_argument('--only', action='append', help='Medir solo estos endpoints (repetible)')
+        parser.add_argument('--cold', action='store_true',
+                            help='Invalidar la caché pública antes de cada petición')
+        parser.add_argument('--user-id', type=int, help='Administrador para los endpoints privados')
+        parser.add_argument('--host', help='Cabecera Host (por defecto el primer ALLOWED_HOSTS)')
+        parser.add_argument('--label', default='', help='Etiqueta de la ejecución (ej. rama o cambio)')
+        parser.add_argument('--output', help='Archivo JSON de salida (por defecto stdout)')
+
+    def handle(self, *args, **options):
+        self.application = get_wsgi_application()
+        self.host = options['host'] or next(
+            (host.lstrip('.') for host in settings.ALLOWED_HOSTS if host and host != '*'), 'localhost'
+        )
+        self.token = self.get_token(options['user_id'])
+        endpoints = self.get_endpoints()
+        if options['only']:
+            endpoints = {name: path for name, path in endpoints.items() if name in options['only']}
+        if not endpoints:
+            raise CommandError('No hay endpoints que medir (¿falta ejecutar seed_content?)')
+
+        results = {}
+        for name, (path, private) in endpoints.items():
+            self.stderr.write(f'{name}: {path}')
+            results[name] = self.run_endpoint(path, private, options)
+
+        report = {
+            'label': options['label'],
+            'timestamp': timezone.now().isoformat(),
+            'commit': self.get_commit(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'cache': settings.CACHES['default']['BACKEND'],
+            'cold_cache': options['cold'],
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'content': {
+                'sections': Section.objects.count(),
+                'publications': Publication.objects.count(),
+            },
+            'endpoints': results,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fp:
+                fp.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'Resultados en {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+    def get_token(self, user_id):
+        User = get_user_model()
+        users = User.objects.filter(is_staff=True, is_active=True)
+        user = users.filter(id=user_id).first() if user_id else users.order_by('id').first()
+        if user is None:
+            self.stderr.write(self.style.WARNING('Sin administrador: se omiten los endpoints privados'))
+            return None
+        return str(RefreshToken.for_user(user).access_token)
+
+    def get_endpoints(self):
+        """name: (path, privado) con ids y slugs reales de la base de datos"""
+        publication = (
+            Publication.objects.filter(status='published')
+            .order_by('-row_count', '-id').values('id', 'section__slug').first()
+        )
+        if publication is None:
+            return {}
+        pk, slug = publication['id'], publication['section__slug']
+        endpoints = {
+            'public_publications': ('/api/public/publications/', False),
+            'public_publications_section': (f'/api/public/publications/?section_slug={slug}', False),
+            'public_publications_deep_page': ('/api/public/publications/?page=5', False),
+            'public_publication_detail': (f'/api/public/publication/{pk}/', False),
+            'public_publication_rows': (f'/api/public/publication/{pk}/?rows=0-5', False),
+            'public_search': ('/api/public/publications/search/?' + urlencode({'q': 'educación ciencia'}), False),
+            'public_biographies': ('/api/public/biographies/', False),
+        }
+        if self.token:
+            endpoints.update({
+                'admin_publications': ('/api/publications/', True),
+                'admin_publication_detail': (f'/api/publications/{pk}/', True),
+                'admin_sections': ('/api/sections/', True),
+            })
+        return endpoints
+
+    def environ(self, path, private):
+        url = urlsplit(path)
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '443',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': self.host,
+            # Detrás del proxy: evita la redirección de SECURE_SSL_REDIRECT
+            'HTTP_X_FORWARDED_PROTO': 'https',
+            'HTTP_ACCEPT': 'application/json',
+            'HTTP_ACCEPT_ENCODING': 'br, gzip',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'https',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        if private:
+            environ['HTTP_AUTHORIZATION'] = f'Bearer {self.token}'
+        return environ
+
+    def request(self, path, private, cold):
+        if cold:
+            bump_version()
+        status = []
+        start = time.perf_counter()
+        body = self.application(self.environ(path, private), lambda code, headers, exc_info=None: status.append(code))
+        try:
+            size = sum(len(chunk) for chunk in body)
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        return time.perf_counter() - start, int(status[0].split()[0]), size
+
+    def run_endpoint(self, path, private, options):
+        for _ in range(options['warmup']):
+            self.request(path, private, options['cold'])
+
+        # Cada hilo usa su propia conexión a la base de datos; como en
+        # producción, request_finished la cierra al terminar cada petición
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            samples = list(executor.map(
+                lambda _: self.request(path, private, options['cold']), range(options['requests'])
+            ))
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency * 1000 for latency, _, _ in samples)
+        statuses = {}
+        for _, code, _ in samples:
+            statuses[str(code)] = statuses.get(str(code), 0) + 1
+        return {
+            'path': path,
+            'throughput_rps': round(len(samples) / elapsed, 1),
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 2),
+                'p95': round(percentile(latencies, 95), 2),
+                'p99': round(percentile(latencies, 99), 2),
+                'max': round(latencies[-1], 2),
+                'mean': round(sum(latencies) / len(latencies), 2),
+            },
+            'bytes_per_response': round(sum(size for _, _, size in samples) / len(samples)),
+            'status': statuses,
+        }
+
+    def get_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
@@ -0,0 +1,222 @@
+# content/management/commands/benchmark_asgi.py
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from content.models import Publication, Biography
+from .benchmark_api import Command as ApiBenchmark, percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara la capacidad de conexiones concurrentes de las lecturas '
+        'públicas en WSGI (un worker con N hilos, como gunicorn gthread) y en '
+        'ASGI (un worker con las vistas asíncronas, como uvicorn). Cada cliente '
+        'tarda --client-delay en recibir la respuesta, como un móvil lento: en '
+        'WSGI ese tiempo retiene un hilo y en ASGI no. Reporta JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, nargs='+', default=[10, 50, 200],
+                            help='Conexiones simultáneas a probar')
+        parser.add_argument('--requests', type=int, default=400, help='Peticiones por nivel y endpoint')
+        parser.add_argument('--threads', type=int, default=8, help='Hilos del worker WSGI')
+        parser.add_argument('--client-delay', type=float, default=50,
+                            help='Milisegundos que tarda cada cliente en recibir la respuesta')
+        parser.add_argument('--warmup', type=int, default=10, help='Peticiones previas (no medidas) por endpoint')
+        parser.add_argument('--only', action='append', help='Medir solo estos endpoints (repetible)')
+        parser.add_argument('--host', help='Cabecera Host (por defecto el primer ALLOWED_HOSTS)')
+        parser.add_argument('--label', default='', help='Etiqueta de la ejecución (ej. rama o cambio)')
+        parser.add_argument('--output', help='Archivo JSON de salida (por defecto stdout)')
+
+    def handle(self, *args, **options):
+        self.host = options['host'] or next(
+            (host.lstrip('.') for host in settings.ALLOWED_HOSTS if host and host != '*'), 'localhost'
+        )
+        # Reutiliza el entorno WSGI (proxy HTTPS, Accept-Encoding) de benchmark_api
+        self.api = ApiBenchmark()
+        self.api.host = self.host
+        self.wsgi = get_wsgi_application()
+        self.asgi = get_asgi_application()
+        self.delay = options['client_delay'] / 1000
+
+        endpoints = self.get_endpoints()
+        if options['only']:
+            endpoints = {name: path for name, path in endpoints.items() if name in options['only']}
+        if not endpoints:
+            raise CommandError('No hay endpoints que medir (¿falta ejecutar seed_content?)')
+
+        results = {}
+        for name, path in endpoints.items():
+            results[name] = {'path': path, 'wsgi': {}, 'asgi': {}}
+            with override_settings(ROOT_URLCONF='config.urls'):
+                for _ in range(options['warmup']):
+                    self.wsgi_request(path)
+                for connections in options['connections']:
+                    self.stderr.write(f'{name} WSGI x{connections}')
+                    results[name]['wsgi'][connections] = self.run_wsgi(path, connections, options)
+            with override_settings(ROOT_URLCONF='config.urls_asgi'):
+                for connections in options['connections']:
+                    self.stderr.write(f'{name} ASGI x{connections}')
+                    results[name]['asgi'][connections] = asyncio.run(self.run_asgi(path, connections, options))
+
+        report = {
+            'label': options['label'],
+            'timestamp': timezone.now().isoformat(),
+            'commit': self.api.get_commit(),
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'requests': options['requests'],
+            'wsgi_threads': options['threads'],
+            'client_delay_ms': options['client_delay'],
+            'endpoints': results,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fp:
+                fp.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'Resultados en {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+    def get_endpoints(self):
+        publication = (
+            Publication.objects.filter(status='published')
+            .order_by('-row_count', '-id').values_list('id', flat=True).first()
+        )
+        if publication is None:
+            return {}
+        endpoints = {
+            'public_publications': '/api/public/publications/',
+            'public_publications_deep_page': '/api/public/publications/?page=5',
+            'public_publication_detail': f'/api/public/publication/{publication}/',
+            'public_publication_rows': f'/api/public/publication/{publication}/?rows=0-5',
+            'public_biographies': '/api/public/biographies/',
+        }
+        biography = Biography.objects.filter(is_active=True).values_list('id', flat=True).first()
+        if biography is not None:
+            endpoints['public_biography_detail'] = f'/api/public/biographies/{biography}/'
+        return endpoints
+
+    def summary(self, samples, elapsed):
+        latencies = sorted(latency * 1000 for latency, _ in samples)
+        statuses = {}
+        for _, code in samples:
+            statuses[str(code)] = statuses.get(str(code), 0) + 1
+        return {
+            'throughput_rps': round(len(samples) / elapsed, 1),
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 2),
+                'p95': round(percentile(latencies, 95), 2),
+                'p99': round(percentile(latencies, 99), 2),
+                'max': round(latencies[-1], 2),
+            },
+            'status': statuses,
+        }
+
+    # WSGI
+
+    def wsgi_request(self, path):
+        status = []
+        body = self.wsgi(self.api.environ(path, False), lambda code, headers, exc_info=None: status.append(code))
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        return int(status[0].split()[0])
+
+    def run_wsgi(self, path, connections, options):
+        # Como mucho `connections` peticiones en curso; cada una espera un hilo
+        # libre y lo retiene mientras el cliente recibe la respuesta
+        slots = threading.Semaphore(connections)
+
+        def serve(queued):
+            code = self.wsgi_request(path)
+            time.sleep(self.delay)
+            return time.perf_counter() - queued, code
+
+        futures = []
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            for _ in range(options['requests']):
+                slots.acquire()
+                future = executor.submit(serve, time.perf_counter())
+                future.add_done_callback(lambda _: slots.release())
+                futures.append(future)
+        elapsed = time.perf_counter() - start
+        return self.summary([future.result() for future in futures], elapsed)
+
+    # ASGI
+
+    def scope(self, path):
+        url = urlsplit(path)
+        return {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'https',
+            'path': url.path,
+            'raw_path': url.path.encode(),
+            'query_string': url.query.encode(),
+            'root_path': '',
+            'headers': [
+                (b'host', self.host.encode()),
+                (b'x-forwarded-proto', b'https'),
+                (b'accept', b'application/json'),
+                (b'accept-encoding', b'br, gzip'),
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': (self.host, 443),
+        }
+
+    async def asgi_request(self, path):
+        status = []
+        received = False
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # Django escucha una desconexión hasta terminar: el cliente no se va
+            await asyncio.Future()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif not message.get('more_body'):
+                # El cliente lento recibe la respuesta sin ocupar el worker
+                await asyncio.sleep(self.delay)
+
+        await self.asgi(self.scope(path), receive, send)
+        return status[0]
+
+    async def run_asgi(self, path, connections, options):
+        for _ in range(options['warmup']):
+            await self.asgi_request(path)
+        remaining = options['requests']
+        samples = []
+
+        async def client():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                code = await self.asgi_request(path)
+                samples.append((time.perf_counter() - start, code))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(connections)))
+        return self.summary(samples, time.perf_counter() - start)
@@ -0,0 +1,125 @@
+# content/management/commands/benchmark_layout_validation.py
+import copy
+import json
+import random
+import statistics
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from content.utils.html_sanitizer import sanitize_html
+from content.utils.layout import iter_cells
+from content.utils.layout_schema import validate_layout
+
+PARAGRAPH = (
+    '<p>Lorem <strong>ipsum</strong> dolor sit amet, <a href="https://example.com" '
+    'target="_blank">consectetur</a> adipiscing elit. <em>Sed do eiusmod</em> tempor '
+    'incididunt <span style="color: red; background: url(x)">ut labore</span>.</p>'
+)
+
+
+def legacy_validate(layout):
+    """Validación anterior de update_layout (sin límites ni saneado), como referencia"""
+    for row in layout:
+        if not isinstance(row.get('cells', []), list):
+            raise ValueError('Cada fila debe tener una lista de celdas')
+        for cell in row['cells']:
+            if 'type' not in cell or 'content' not in cell:
+                raise ValueError('Cada celda debe tener tipo y contenido')
+            if cell['type'] not in ['text', 'image', 'video']:
+                raise ValueError('Tipo de celda no válido')
+
+
+def sanitize_on_read(layout):
+    """Lo que costaría sanear en cada lectura si no se hiciera al escribir"""
+    for cell in iter_cells(layout):
+        if cell['type'] == 'text':
+            sanitize_html(cell['content'])
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide la validación y el saneado del layout con layouts grandes y el '
+        'tiempo en rechazar payloads maliciosos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200, help='Filas del layout grande')
+        parser.add_argument('--cells', type=int, default=3, help='Celdas por fila')
+        parser.add_argument('--paragraphs', type=int, default=4, help='Párrafos por celda de texto')
+        parser.add_argument('--repeat', type=int, default=7, help='Repeticiones por medición')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador')
+
+    def handle(self, *args, **options):
+        layout = self.build_layout(options)
+        size = len(json.dumps(layout))
+        self.stdout.write(
+            f'Layout: {options["rows"]} filas x {options["cells"]} celdas, {size / 1024:.0f} KB'
+        )
+
+        self.stdout.write('\nLayout válido (mediana en ms):')
+        clean = copy.deepcopy(layout)
+        validate_layout(clean)
+        self.report('validación anterior', lambda: legacy_validate(layout), options['repeat'])
+        self.report('esquema + saneado (al escribir)',
+                    lambda: validate_layout(copy.deepcopy(layout)), options['repeat'], subtract=layout)
+        self.report('saneado en cada lectura (evitado)', lambda: sanitize_on_read(clean), options['repeat'])
+
+        self.stdout.write('\nPayloads maliciosos (tiempo hasta rechazarlos o sanearlos):')
+        for name, payload in self.malicious_payloads().items():
+            start = time.perf_counter()
+            try:
+                validate_layout(payload)
+                result = 'aceptado'
+            except ValueError as e:
+                result = f'rechazado: {e}'
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stdout.write(f'- {name}: {elapsed:.2f} ms ({result})')
+
+    def build_layout(self, options):
+        rng = random.Random(options['seed'])
+        layout = []
+        for i in range(options['rows']):
+            cells = []
+            for j in range(options['cells']):
+                if rng.random() < 0.7:
+                    cells.append({'type': 'text', 'content': PARAGRAPH * options['paragraphs']})
+                else:
+                    cells.append({'type': 'image', 'content': f'https://example.com/media/assets/{i}-{j}.jpg'})
+            layout.append({'cells': cells})
+        return layout
+
+    def malicious_payloads(self):
+        huge = settings.LAYOUT_MAX_BYTES
+        return {
+            'demasiadas filas': [{'cells': []}] * (settings.LAYOUT_MAX_ROWS * 100),
+            'celda gigante': [{'cells': [{'type': 'text', 'content': 'x' * huge * 4}]}],
+            'muchas celdas medianas': [
+                {'cells': [{'type': 'text', 'content': 'x' * (settings.LAYOUT_MAX_CELL_LENGTH - 1)}]}
+            ] * settings.LAYOUT_MAX_ROWS,
+            'anidamiento profundo': [{'cells': [], 'options': self.nested(500)}],
+            'opciones enormes': [{'cells': [], 'options': list(range(huge))}],
+            'bomba de etiquetas': [{'cells': [{'type': 'text', 'content': '<div>' * 15000 + '</span>' * 15000}]}],
+            'javascript en imagen': [{'cells': [{'type': 'image', 'content': 'java\tscript:alert(1)'}]}],
+        }
+
+    def nested(self, depth):
+        value = {}
+        for _ in range(depth):
+            value = {'a': value}
+        return value
+
+    def report(self, name, func, repeat, subtract=None):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000)
+        if subtract is not None:
+            # Se descuenta la copia del layout, necesaria porque se limpia en el lugar
+            copies = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                copy.deepcopy(subtract)
+                copies.append((time.perf_counter() - start) * 1000)
+            samples = [max(0, sample - statistics.median(copies)) for sample in samples]
+        self.stdout.write(f'- {name}: {statistics.median(samples):.2f}')
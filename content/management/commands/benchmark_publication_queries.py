@@ -0,0 +1,173 @@
+# content/management/commands/benchmark_publication_queries.py
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+from content.models import Section, Publication
+from content.utils.public_cache import bump_version
+
+BENCH_PREFIX = 'bench-queries'
+
+
+class Command(BaseCommand):
+    help = (
+        'Carga publicaciones sintéticas y compara planes (EXPLAIN) y tiempos '
+        'de las consultas públicas sin y con los índices de Publication. '
+        'Quita índices de la base: fuera de DEBUG pide --database o --yes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Publicaciones a generar')
+        parser.add_argument('--sections', type=int, default=5, help='Secciones a generar')
+        parser.add_argument('--repeat', type=int, default=7, help='Repeticiones por consulta')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador')
+        parser.add_argument('--keep', action='store_true', help='No borrar los datos al terminar')
+        parser.add_argument('--database', help='Base de datos a usar (por defecto default)')
+        parser.add_argument('--yes', action='store_true',
+                            help='Confirmar la ejecución sobre la base por defecto fuera de DEBUG')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['yes'] and not options['database']:
+            raise CommandError(
+                'Este comando inserta publicaciones y quita los índices de Publication. '
+                'Fuera de DEBUG indique --database o confirme con --yes'
+            )
+        self.db = options['database'] or DEFAULT_DB_ALIAS
+        self.connection = connections[self.db]
+        # Una ejecución anterior interrumpida puede haber dejado índices sin crear
+        self.restore_indexes()
+
+        sections = self.seed(options)
+        try:
+            queries = self.get_queries(sections[0])
+
+            self.stdout.write(self.style.WARNING('\n=== Sin índices ==='))
+            with self.without_indexes():
+                before = self.run_queries(queries, options['repeat'])
+
+            self.stdout.write(self.style.SUCCESS('\n=== Con índices ==='))
+            after = self.run_queries(queries, options['repeat'])
+
+            self.stdout.write('\nResumen (mediana en ms):')
+            for name in queries:
+                self.stdout.write(
+                    f'- {name}: {before[name]:.2f} -> {after[name]:.2f} '
+                    f'(x{before[name] / max(after[name], 0.001):.1f})'
+                )
+        finally:
+            if not options['keep']:
+                self.cleanup()
+
+    def seed(self, options):
+        rng = random.Random(options['seed'])
+        self.cleanup()
+        sections = [
+            Section.objects.using(self.db).create(title=f'{BENCH_PREFIX} {i}', slug=f'{BENCH_PREFIX}-{i}')
+            for i in range(options['sections'])
+        ]
+
+        now = timezone.now()
+        batch = []
+        self.stdout.write(f'Generando {options["rows"]} publicaciones...')
+        for i in range(options['rows']):
+            batch.append(Publication(
+                title=f'Publicación de prueba {i}',
+                status=rng.choices(['published', 'draft', 'archived'], [80, 15, 5])[0],
+                section=rng.choice(sections),
+                publish_date=now - timedelta(minutes=rng.randint(0, 10 * 365 * 24 * 60)),
+                featured_image='publications/benchmark.jpg',
+                is_featured=rng.random() < 0.05,
+            ))
+            if len(batch) == 5000:
+                Publication.objects.using(self.db).bulk_create(batch)
+                batch = []
+        if batch:
+            Publication.objects.using(self.db).bulk_create(batch)
+        # bulk_create no llama a save(): contadores de las secciones de prueba
+        Section.refresh_publication_stats([section.id for section in sections], using=self.db)
+
+        self.analyze()
+        return sections
+
+    def analyze(self):
+        # Estadísticas frescas para que el optimizador elija bien
+        with self.connection.cursor() as cursor:
+            if self.connection.vendor == 'mysql':
+                cursor.execute(f'ANALYZE TABLE {Publication._meta.db_table}')
+            elif self.connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+
+    def get_queries(self, section):
+        publications = Publication.objects.using(self.db)
+        published = publications.filter(status='published').order_by('-publish_date', '-id')
+        return {
+            'listado público': published[:10],
+            'listado por sección': published.filter(section=section)[:10],
+            'página profunda (keyset)': published.filter(
+                publish_date__lt=timezone.now() - timedelta(days=5 * 365)
+            )[:10],
+            'destacados': publications.filter(is_featured=True).order_by('-publish_date')[:10],
+        }
+
+    def run_queries(self, queries, repeat):
+        timings = {}
+        for name, queryset in queries.items():
+            self.stdout.write(f'\n--- {name} ---')
+            self.stdout.write(queryset.explain())
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[name] = statistics.median(samples)
+            self.stdout.write(f'mediana: {timings[name]:.2f} ms')
+        return timings
+
+    def existing_indexes(self):
+        with self.connection.cursor() as cursor:
+            return set(self.connection.introspection.get_constraints(cursor, Publication._meta.db_table))
+
+    def restore_indexes(self):
+        """Crea los índices de Publication que falten; retorna cuántos creó"""
+        existing = self.existing_indexes()
+        missing = [index for index in Publication._meta.indexes if index.name not in existing]
+        if missing:
+            with self.connection.schema_editor() as editor:
+                for index in missing:
+                    editor.add_index(Publication, index)
+            self.analyze()
+        return len(missing)
+
+    @contextmanager
+    def without_indexes(self):
+        # Los índices se restauran aunque falle o se interrumpa la eliminación o la medición
+        try:
+            with self.connection.schema_editor() as editor:
+                for index in Publication._meta.indexes:
+                    editor.remove_index(Publication, index)
+            yield
+        finally:
+            self.restore_indexes()
+            self.stdout.write('Índices restaurados')
+
+    def cleanup(self):
+        # Borrado directo: evita cargar 100k objetos y disparar sus señales
+        sections = Section.objects.using(self.db)
+        section_ids = list(
+            sections.filter(slug__startswith=BENCH_PREFIX).values_list('id', flat=True)
+        )
+        if section_ids:
+            with self.connection.cursor() as cursor:
+                placeholders = ', '.join(['%s'] * len(section_ids))
+                cursor.execute(
+                    f'DELETE FROM {Publication._meta.db_table} WHERE section_id IN ({placeholders})',
+                    section_ids
+                )
+            sections.filter(id__in=section_ids).delete()
+        bump_version()
+        self.stdout.write('Datos de prueba eliminados')
@@ -0,0 +1,35 @@
+# content/management/commands/export_snapshot.py
+import time
+from django.core.management.base import BaseCommand, CommandError
+from content.utils.snapshot import SnapshotBuilder
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta la API pública a archivos JSON estáticos (PUBLIC_SNAPSHOT_ROOT). '
+        'Solo se regeneran los archivos cuyas publicaciones, secciones o biografías cambiaron'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', help='Directorio de salida (por defecto PUBLIC_SNAPSHOT_ROOT)')
+        parser.add_argument('--base-url', help='URL del sitio para las URLs absolutas (por defecto PUBLIC_SNAPSHOT_BASE_URL)')
+        parser.add_argument('--full', action='store_true', help='Regenerar todos los archivos')
+        parser.add_argument('--dry-run', action='store_true', help='Solo contar lo que se regeneraría')
+
+    def handle(self, *args, **options):
+        try:
+            builder = SnapshotBuilder(
+                root=options['root'],
+                base_url=options['base_url'],
+                full=options['full'],
+                dry_run=options['dry_run'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        start = time.perf_counter()
+        written, unchanged, removed = builder.build()
+        self.stdout.write(self.style.SUCCESS(
+            f'{written} archivos regenerados, {unchanged} sin cambios y {removed} eliminados '
+            f'en {time.perf_counter() - start:.1f} s ({builder.root})'
+        ))
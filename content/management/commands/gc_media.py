@@ -0,0 +1,127 @@
+# content/management/commands/gc_media.py
+import os
+import re
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from content.models import Publication, PublicationAsset, Biography, MediaAsset
+from content.utils.layout import layout_image_paths
+
+# Derivados responsivos: {stem}_w{ancho}.{ext} pertenecen a la imagen {stem}.{ext}
+VARIANT_RE = re.compile(r'^(?P<stem>.+)_w\d+\.\w+$')
+
+
+class Command(BaseCommand):
+    help = (
+        'Elimina (marcar y barrer) los archivos subidos que ninguna publicación '
+        'ni biografía referencia y que son más antiguos que el período de gracia'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help='Antigüedad mínima (en horas) de un archivo para eliminarlo')
+        parser.add_argument('--dry-run', action='store_true', help='Solo listar lo que se eliminaría')
+        parser.add_argument('--rate', type=float, default=0,
+                            help='Máximo de archivos eliminados por segundo (0 = sin límite)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Filas leídas por lote al marcar')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        referenced = self.mark(options['batch_size'], cutoff)
+        stems = {os.path.splitext(path)[0] for path in referenced}
+        self.stdout.write(f'Archivos referenciados: {len(referenced)}')
+
+        interval = 1 / options['rate'] if options['rate'] > 0 else 0
+        removed, freed, scanned = [], 0, 0
+        for entry in self.sweep():
+            scanned += 1
+            path = os.path.relpath(entry.path, settings.MEDIA_ROOT).replace(os.sep, '/')
+            if self.is_referenced(path, referenced, stems):
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime >= cutoff.timestamp():
+                continue
+
+            if options['dry_run']:
+                self.stdout.write(f'[dry-run] {path}')
+            else:
+                try:
+                    os.remove(entry.path)
+                except OSError as e:
+                    self.stdout.write(self.style.ERROR(f'Error eliminando {path}: {e}'))
+                    continue
+                self.stdout.write(f'Eliminado: {path}')
+                if interval:
+                    time.sleep(interval)
+            removed.append(path)
+            freed += stat.st_size
+
+        if not options['dry_run']:
+            # Las imágenes borradas dejan de estar disponibles para deduplicar
+            for i in range(0, len(removed), options['batch_size']):
+                MediaAsset.objects.filter(path__in=removed[i:i + options['batch_size']]).delete()
+
+        action = 'Se eliminarían' if options['dry_run'] else 'Eliminados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {len(removed)} de {scanned} archivos ({freed / 1024 / 1024:.1f} MB)'
+        ))
+
+    def mark(self, batch_size, cutoff):
+        """Conjunto de rutas (relativas a MEDIA_ROOT) en uso, leído por lotes"""
+        referenced = set()
+
+        # Se recorren también los layouts: las filas creadas sin save()
+        # (bulk_create, update) no tienen referencias en PublicationAsset
+        publications = Publication.objects.values_list('featured_image', 'layout')
+        for featured_image, layout in publications.iterator(chunk_size=batch_size):
+            if featured_image:
+                referenced.add(featured_image)
+            referenced |= layout_image_paths(layout)
+
+        refs = PublicationAsset.objects.values_list('path', flat=True)
+        referenced.update(refs.iterator(chunk_size=batch_size))
+
+        photos = Biography.objects.exclude(photo='').exclude(photo__isnull=True).values_list('photo', flat=True)
+        referenced.update(photos.iterator(chunk_size=batch_size))
+
+        # Imágenes del almacén subidas o reutilizadas hace poco: el editor puede
+        # no haber guardado todavía la publicación que las usa
+        recent = MediaAsset.objects.filter(updated_at__gte=cutoff).values_list('path', flat=True)
+        referenced.update(recent.iterator(chunk_size=batch_size))
+        return referenced
+
+    def is_referenced(self, path, referenced, stems):
+        if path in referenced:
+            return True
+        match = VARIANT_RE.match(path)
+        return bool(match) and match.group('stem') in stems
+
+    def get_roots(self):
+        """Directorios de subida: solo se barren archivos que gestiona la aplicación"""
+        directories = set(settings.UPLOAD_PATHS.values())
+        directories.add(Publication._meta.get_field('featured_image').upload_to)
+        directories.add(Biography._meta.get_field('photo').upload_to)
+        roots = sorted({os.path.normpath(directory) for directory in directories})
+        # Sin repetir subdirectorios de otro directorio ya incluido
+        return [
+            root for root in roots
+            if not any(root.startswith(other + os.sep) for other in roots if other != root)
+        ]
+
+    def sweep(self):
+        for root in self.get_roots():
+            yield from self.scan(os.path.join(settings.MEDIA_ROOT, root))
+
+    def scan(self, directory):
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            return
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self.scan(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
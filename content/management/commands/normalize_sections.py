@@ -1,9 +1,11 @@
 # content/management/commands/normalize_sections.py
 from django.core.management.base import BaseCommand
 from django.db.models import Count
+from django.utils import timezone
 from django.utils.text import slugify
 from django.contrib.auth import get_user_model
 from content.models import Section, Publication
+from content.utils.public_cache import bump_version
 
 class Command(BaseCommand):
     help = 'Normaliza las secciones y corrige los slugs'
@@ -46,14 +48,19 @@ class Command(BaseCommand):
                     section.slug = correct_slug
                     if not section.created_by:
                         section.created_by = user
+                    # updated_at entra en los ETag públicos: sin él se respondería 304 con el slug anterior
                     Section.objects.filter(id=section.id).update(
                         slug=correct_slug,
-                        created_by=section.created_by
+                        created_by=section.created_by,
+                        updated_at=timezone.now()
                     )
                     self.stdout.write(
                         self.style.SUCCESS(f'Slug actualizado: {old_slug} -> {correct_slug}')
                     )
 
+        # update() no dispara señales: invalidar la caché pública a mano
+        bump_version('publications')
+
         # Mostrar resultado final
         self.stdout.write('\nSlugs finales:')
         for section in Section.objects.all():
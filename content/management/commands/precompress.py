@@ -0,0 +1,64 @@
+# content/management/commands/precompress.py
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from content.utils.compression import (
+    COMPRESSIBLE_EXTENSIONS, SUFFIXES, available_encodings, compress, MIN_SIZE
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera versiones .gz y .br de los archivos estáticos (STATIC_ROOT, '
+        'incluido TinyMCE) para que WhiteNoise las sirva sin comprimir en '
+        'cada petición. Ejecutar después de collectstatic y antes de reiniciar '
+        'la aplicación (WhiteNoise indexa los archivos al arrancar)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directories', nargs='*',
+                            help='Directorios a recorrer (por defecto STATIC_ROOT)')
+        parser.add_argument('--force', action='store_true',
+                            help='Regenerar aunque la versión comprimida esté al día')
+
+    def handle(self, *args, **options):
+        directories = options['directories'] or [settings.STATIC_ROOT]
+        encodings = available_encodings()
+        if 'br' not in encodings:
+            self.stdout.write(self.style.WARNING('brotli no está instalado: solo se genera gzip'))
+
+        written, skipped, saved = 0, 0, 0
+        for directory in directories:
+            for path in self.scan(directory):
+                stat = os.stat(path)
+                if stat.st_size < MIN_SIZE:
+                    continue
+                content = None
+                for encoding in encodings:
+                    target = path + SUFFIXES[encoding]
+                    # Al día si es más nueva que el original
+                    if not options['force'] and os.path.isfile(target) and os.path.getmtime(target) >= stat.st_mtime:
+                        skipped += 1
+                        continue
+                    if content is None:
+                        with open(path, 'rb') as fp:
+                            content = fp.read()
+                    compressed = compress(content, encoding, best=True)
+                    if len(compressed) >= len(content):
+                        continue
+                    tmp_path = f'{target}.tmp'
+                    with open(tmp_path, 'wb') as fp:
+                        fp.write(compressed)
+                    os.replace(tmp_path, target)
+                    written += 1
+                    saved += len(content) - len(compressed)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{written} archivos comprimidos ({saved / 1024 / 1024:.1f} MB ahorrados), {skipped} al día'
+        ))
+
+    def scan(self, directory):
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                    yield os.path.join(root, name)
@@ -0,0 +1,177 @@
+# content/management/commands/seed_content.py
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from PIL import Image, ImageDraw
+from content.models import Section, Publication, Biography
+from content.utils.importer import ContentImporter, DirectoryImageSource, ImportValidationError
+from content.utils.ordering import ORDER_GAP
+from content.utils.public_cache import bump_version
+
+SEED_PREFIX = 'seed'
+SEED_EMAIL_DOMAIN = 'seed.example'
+
+WORDS = (
+    'educación ciencia escuela docentes estudiantes aprendizaje comunidad investigación '
+    'proyecto innovación territorio cultura historia región desarrollo evaluación currículo '
+    'lectura matemática tecnología ciudadanía inclusión formación práctica experiencia '
+    'programa política análisis resultado propuesta red colaboración diálogo encuentro'
+).split()
+POSITIONS = ['Directora', 'Coordinador', 'Investigadora', 'Docente', 'Asesor', 'Secretaria ejecutiva']
+VIDEOS = [
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://vimeo.com/76979871',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera contenido sintético reproducible (secciones, publicaciones con '
+        'layouts de texto, imagen y video, biografías e imágenes) para benchmarks'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sections', type=int, default=5, help='Secciones a generar')
+        parser.add_argument('--publications', type=int, default=200, help='Publicaciones a generar')
+        parser.add_argument('--biographies', type=int, default=20, help='Biografías a generar')
+        parser.add_argument('--rows', type=int, default=8, help='Filas promedio por layout')
+        parser.add_argument('--paragraphs', type=int, default=3, help='Párrafos por celda de texto')
+        parser.add_argument('--images', type=int, default=12, help='Imágenes sintéticas distintas')
+        parser.add_argument('--image-size', type=int, default=1600, help='Ancho de las imágenes sintéticas')
+        parser.add_argument('--base-url', default='', help='Dominio para las URLs de imágenes del layout')
+        parser.add_argument('--user-id', type=int, help='ID del usuario que se asignará como created_by')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla del generador')
+        parser.add_argument('--clear', action='store_true', help='Eliminar antes el contenido sintético anterior')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        user = None
+        if options['user_id']:
+            user = get_user_model().objects.filter(id=options['user_id']).first()
+            if user is None:
+                raise CommandError(f'No se encontró un usuario con ID {options["user_id"]}')
+
+        if options['clear']:
+            self.clear()
+
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory() as directory:
+            images = self.generate_images(directory, options, rng)
+            importer = ContentImporter(DirectoryImageSource(directory), user=user, base_url=options['base_url'])
+            try:
+                result = importer.run(self.generate_lines(images, options, rng))
+            except ImportValidationError as e:
+                for error in e.errors[:20]:
+                    self.stdout.write(self.style.ERROR(error))
+                raise CommandError('No se generó contenido')
+
+        biographies = self.create_biographies(options, rng, user)
+        self.stdout.write(self.style.SUCCESS(
+            f'Generadas {result["sections"]} secciones, {result["publications"]} publicaciones, '
+            f'{biographies} biografías y {result["images_processed"]} imágenes '
+            f'en {time.perf_counter() - start:.1f} s'
+        ))
+
+    def clear(self):
+        # Las publicaciones se eliminan en cascada; los archivos quedan para gc_media
+        sections = Section.objects.filter(slug__startswith=f'{SEED_PREFIX}-')
+        Publication.objects.filter(section__in=sections).delete()
+        sections.delete()
+        Biography.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}').delete()
+        self.stdout.write('Contenido sintético anterior eliminado')
+
+    def generate_images(self, directory, options, rng):
+        """Imágenes JPEG con degradado y figuras: se comprimen como una foto real, no como un color plano"""
+        names = []
+        width = options['image_size']
+        height = width * 2 // 3
+        for i in range(options['images']):
+            image = Image.new('RGB', (width, height))
+            draw = ImageDraw.Draw(image)
+            base = [rng.randint(0, 255) for _ in range(3)]
+            for y in range(0, height, 4):
+                shade = [min(255, channel + y * 80 // height) for channel in base]
+                draw.rectangle([0, y, width, y + 4], fill=tuple(shade))
+            for _ in range(30):
+                x, y = rng.randint(0, width), rng.randint(0, height)
+                size = rng.randint(width // 40, width // 6)
+                color = tuple(rng.randint(0, 255) for _ in range(3))
+                draw.ellipse([x, y, x + size, y + size], fill=color)
+            name = f'{SEED_PREFIX}-{i}.jpg'
+            image.save(os.path.join(directory, name), quality=90)
+            names.append(name)
+        return names
+
+    def sentence(self, rng):
+        words = rng.choices(WORDS, k=rng.randint(8, 20))
+        return ' '.join(words).capitalize() + '.'
+
+    def paragraph(self, rng):
+        text = ' '.join(self.sentence(rng) for _ in range(rng.randint(3, 6)))
+        # Algo de formato como el que produce el editor
+        words = text.split(' ')
+        index = rng.randrange(len(words))
+        words[index] = f'<strong>{words[index]}</strong>'
+        return f'<p>{" ".join(words)}</p>'
+
+    def layout(self, images, options, rng):
+        rows = []
+        for _ in range(max(1, int(rng.gauss(options['rows'], options['rows'] / 4)))):
+            cells = []
+            for _ in range(rng.choice([1, 1, 2, 2, 3])):
+                kind = rng.choices(['text', 'image', 'video'], [60, 30, 10])[0]
+                if kind == 'text':
+                    content = ''.join(self.paragraph(rng) for _ in range(options['paragraphs']))
+                elif kind == 'image':
+                    content = rng.choice(images)
+                else:
+                    content = rng.choice(VIDEOS)
+                cells.append({'type': kind, 'content': content})
+            rows.append({'cells': cells})
+        return rows
+
+    def generate_lines(self, images, options, rng):
+        for i in range(options['sections']):
+            yield json.dumps({'type': 'section', 'title': f'{SEED_PREFIX.capitalize()} {i}', 'order': i})
+        now = timezone.now()
+        for i in range(options['publications']):
+            yield json.dumps({
+                'type': 'publication',
+                'title': self.sentence(rng)[:-1][:200],
+                'section': f'{SEED_PREFIX}-{rng.randrange(options["sections"])}',
+                'status': rng.choices(['published', 'draft', 'archived'], [80, 15, 5])[0],
+                'publish_date': (now - timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60))).isoformat(),
+                'featured_image': rng.choice(images),
+                'is_featured': rng.random() < 0.05,
+                'layout': self.layout(images, options, rng),
+            })
+
+    def create_biographies(self, options, rng, user):
+        photos = list(
+            Publication.objects.filter(section__slug__startswith=f'{SEED_PREFIX}-')
+            .values_list('featured_image', flat=True).distinct()[:options['images']]
+        ) or ['']
+        offset = Biography.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}').count()
+        biographies = [
+            Biography(
+                name=f'Persona {offset + i}',
+                position=rng.choice(POSITIONS),
+                biography=' '.join(self.sentence(rng) for _ in range(rng.randint(4, 10)))[:3000],
+                photo=rng.choice(photos),
+                email=f'persona{offset + i}@{SEED_EMAIL_DOMAIN}',
+                is_active=rng.random() < 0.9,
+                order=(offset + i + 1) * ORDER_GAP,
+                created_by=user,
+            )
+            for i in range(options['biographies'])
+        ]
+        Biography.objects.bulk_create(biographies, batch_size=500)
+        # bulk_create no envía señales
+        bump_version('biographies')
+        return len(biographies)
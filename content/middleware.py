@@ -0,0 +1,110 @@
+# content/middleware.py
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .utils.metrics import registry
+
+# Contador de la petición en curso. Con vistas asíncronas el ORM ejecuta las
+# consultas en otro hilo (y otra conexión) mediante sync_to_async, que copia
+# el contexto: una ContextVar las sigue asociando a la petición.
+current_queries = ContextVar('current_queries', default=None)
+
+
+class QueryMetrics:
+    """Cuenta las consultas SQL de la petición y su tiempo"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper permanente: delega en el contador de la petición si lo hay"""
+    queries = current_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    return queries(execute, sql, params, many, context)
+
+
+def install_query_metrics(sender, connection, **kwargs):
+    # Receptor de connection_created: cada hilo abre su propia conexión. Al
+    # principio de la lista: execute_wrapper() quita siempre el último y la
+    # conexión puede abrirse dentro de uno de esos bloques
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class MetricsMiddleware:
+    """
+    Registra por ruta (el patrón de la URL, no la URL concreta) la latencia,
+    las consultas SQL y los bytes de cada respuesta. Se exponen en /api/metrics/.
+    Funciona en WSGI y en ASGI sin pasar las vistas asíncronas a un hilo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        queries = QueryMetrics()
+        token = current_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_queries.reset(token)
+        self.record(request, response, time.perf_counter() - start, queries)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        queries = QueryMetrics()
+        token = current_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_queries.reset(token)
+        self.record(request, response, time.perf_counter() - start, queries)
+        return response
+
+    def record(self, request, response, duration, queries):
+        route = self.get_route(request)
+        registry.inc('http_requests_total', route=route, method=request.method, status=response.status_code)
+        registry.observe('http_request_duration_seconds', duration, route=route, method=request.method)
+        registry.observe('db_queries_per_request', queries.count, route=route)
+        registry.inc('db_query_duration_seconds_total', queries.duration, route=route)
+        if not response.streaming:
+            registry.inc('http_response_bytes_total', len(response.content), route=route)
+        registry.mark_serving()
+        registry.flush()
+
+    def get_route(self, request):
+        # Patrón de la ruta: acota la cardinalidad (un id por URL no crea series nuevas)
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unmatched'
+        if not match.route:
+            return match.view_name
+        # Las rutas del router de DRF son expresiones regulares: sin anclas
+        return '/' + match.route.replace('^', '').replace('$', '')
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+from content.utils.layout import summarize_layout
+
+
+def fill_summary_fields(apps, schema_editor):
+    Publication = apps.get_model('content', 'Publication')
+    for publication in Publication.objects.only('id', 'layout').iterator(chunk_size=200):
+        Publication.objects.filter(pk=publication.pk).update(**summarize_layout(publication.layout))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0007_section_unique_title_case_insensitive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publication',
+            name='excerpt',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='first_image',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='publication',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_summary_fields, migrations.RunPython.noop),
+    ]
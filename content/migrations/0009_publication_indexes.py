@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0008_publication_summary_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['status', 'section', 'publish_date'], name='pub_status_section_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['status', 'publish_date'], name='pub_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['is_featured', 'publish_date'], name='pub_featured_date_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0009_publication_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publication',
+            name='featured_image_variants',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
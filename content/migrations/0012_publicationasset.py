@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-18 14:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from content.utils.layout import layout_image_paths
+
+
+def fill_asset_refs(apps, schema_editor):
+    Publication = apps.get_model('content', 'Publication')
+    PublicationAsset = apps.get_model('content', 'PublicationAsset')
+    publications = Publication.objects.only('id', 'layout', 'featured_image')
+    for publication in publications.iterator(chunk_size=200):
+        paths = layout_image_paths(publication.layout)
+        if publication.featured_image:
+            paths.add(publication.featured_image.name)
+        PublicationAsset.objects.bulk_create(
+            [PublicationAsset(publication_id=publication.pk, path=path) for path in paths],
+            ignore_conflicts=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0011_mediaasset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicationAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(db_index=True, max_length=255)),
+                ('publication', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asset_refs', to='content.publication')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='publicationasset',
+            constraint=models.UniqueConstraint(fields=('publication', 'path'), name='unique_publication_asset'),
+        ),
+        migrations.RunPython(fill_asset_refs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-18 16:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from content.utils.search import term_weights
+
+
+def fill_search_terms(apps, schema_editor):
+    Publication = apps.get_model('content', 'Publication')
+    PublicationTerm = apps.get_model('content', 'PublicationTerm')
+    publications = Publication.objects.only('id', 'title', 'layout')
+    for publication in publications.iterator(chunk_size=200):
+        PublicationTerm.objects.bulk_create([
+            PublicationTerm(publication_id=publication.pk, term=term, weight=weight)
+            for term, weight in term_weights(publication.title, publication.layout).items()
+        ], batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0012_publicationasset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicationTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('publication', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='content.publication')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='publicationterm',
+            constraint=models.UniqueConstraint(fields=('term', 'publication'), name='unique_term_publication'),
+        ),
+        migrations.RunPython(fill_search_terms, migrations.RunPython.noop),
+    ]
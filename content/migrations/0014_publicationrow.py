@@ -0,0 +1,59 @@
+# Generated by Django 5.0.1 on 2026-10-18 17:05
+
+import hashlib
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_layout_rows(apps, schema_editor):
+    Publication = apps.get_model('content', 'Publication')
+    PublicationRow = apps.get_model('content', 'PublicationRow')
+    for publication in Publication.objects.only('id', 'layout').iterator(chunk_size=200):
+        layout = publication.layout or []
+        PublicationRow.objects.bulk_create([
+            PublicationRow(
+                publication_id=publication.pk,
+                position=position,
+                data=row,
+                digest=hashlib.md5(
+                    json.dumps(row, sort_keys=True, separators=(',', ':')).encode('utf-8')
+                ).hexdigest(),
+            )
+            for position, row in enumerate(layout)
+        ], batch_size=100)
+        Publication.objects.filter(pk=publication.pk).update(row_count=len(layout))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0013_publicationterm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publication',
+            name='row_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='PublicationRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('data', models.JSONField(default=dict)),
+                ('digest', models.CharField(max_length=32)),
+                ('publication', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='layout_rows', to='content.publication')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='publicationrow',
+            constraint=models.UniqueConstraint(fields=('publication', 'position'), name='unique_publication_row'),
+        ),
+        migrations.RunPython(fill_layout_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-18 18:10
+
+import hashlib
+import json
+
+from django.db import migrations
+
+from content.utils.html_sanitizer import sanitize_html
+from content.utils.layout import iter_cells, summarize_layout
+
+
+def sanitize_layouts(apps, schema_editor):
+    """
+    El HTML se sanea al escribir: se limpian una vez los layouts ya guardados
+    para que las lecturas públicas no sirvan HTML sin sanear. Solo se
+    reescriben las celdas que el saneador cambia (scripts, atributos on*,
+    etiquetas fuera de la lista blanca); el formato de TinyMCE se conserva.
+    """
+    Publication = apps.get_model('content', 'Publication')
+    PublicationRow = apps.get_model('content', 'PublicationRow')
+    for publication in Publication.objects.only('id', 'layout').iterator(chunk_size=200):
+        layout = publication.layout or []
+        changed = False
+        for cell in iter_cells(layout):
+            if cell.get('type') == 'text' and isinstance(cell.get('content'), str):
+                clean = sanitize_html(cell['content'])
+                if clean != cell['content']:
+                    cell['content'] = clean
+                    changed = True
+        if not changed:
+            continue
+        # El resumen tampoco debe incluir el texto de lo eliminado (p. ej. un <script>)
+        Publication.objects.filter(pk=publication.pk).update(layout=layout, **summarize_layout(layout))
+        for position, row in enumerate(layout):
+            PublicationRow.objects.filter(publication_id=publication.pk, position=position).update(
+                data=row,
+                digest=hashlib.md5(
+                    json.dumps(row, sort_keys=True, separators=(',', ':')).encode('utf-8')
+                ).hexdigest(),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0014_publicationrow'),
+    ]
+
+    operations = [
+        migrations.RunPython(sanitize_layouts, migrations.RunPython.noop),
+    ]
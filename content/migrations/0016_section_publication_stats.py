@@ -0,0 +1,44 @@
+# Generated by Django 5.0.1 on 2026-10-18 19:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+
+
+def fill_section_stats(apps, schema_editor):
+    Section = apps.get_model('content', 'Section')
+    Publication = apps.get_model('content', 'Publication')
+    published = Publication.objects.filter(section=OuterRef('pk'), status='published').order_by()
+    Section.objects.update(
+        published_count=Coalesce(
+            Subquery(published.values('section').annotate(total=Count('pk')).values('total')), 0
+        ),
+        latest_publish_date=Subquery(published.order_by('-publish_date').values('publish_date')[:1]),
+        stats_updated_at=Now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0015_sanitize_layouts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='section',
+            name='published_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='latest_publish_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='stats_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_section_stats, migrations.RunPython.noop),
+    ]
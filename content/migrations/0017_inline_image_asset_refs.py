@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-18 19:20
+
+from django.db import migrations
+
+from content.utils.layout import layout_image_paths
+
+
+def fill_inline_image_refs(apps, schema_editor):
+    # Las imágenes insertadas en las celdas de texto no tenían referencia
+    Publication = apps.get_model('content', 'Publication')
+    PublicationAsset = apps.get_model('content', 'PublicationAsset')
+    publications = Publication.objects.filter(layout__icontains='<img').only('id', 'layout')
+    for publication in publications.iterator(chunk_size=200):
+        PublicationAsset.objects.bulk_create(
+            [
+                PublicationAsset(publication_id=publication.pk, path=path)
+                for path in layout_image_paths(publication.layout)
+            ],
+            ignore_conflicts=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0016_section_publication_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_inline_image_refs, migrations.RunPython.noop),
+    ]
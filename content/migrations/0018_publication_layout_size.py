@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0017_inline_image_asset_refs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publication',
+            name='layout_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
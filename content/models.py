@@ -1,13 +1,23 @@
 # content/models.py
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models, transaction
 from django.contrib.auth import get_user_model
 from django.utils.text import slugify
-from django.db.models import Q
+from django.utils import timezone
+from django.db.models import Q, F, Case, When, Value, Sum, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
+import hashlib
+import json
+import math
 import os
 from django.conf import settings
-from urllib.parse import urlparse
 from tinymce.models import HTMLField
+from django_cleanup import cleanup
+from .utils.layout import summarize_layout, update_summary, layout_image_paths
+from .utils.layout_schema import validate_layout
+from .utils.image_handler import ImageHandler
+from .utils.slugs import allocate_slugs
+from .utils.search import term_weights
 
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -23,6 +33,9 @@ class BaseModel(models.Model):
         abstract = True
 
 
+# Los archivos pueden compartirse entre publicaciones: los que quedan sin
+# referencias los elimina el comando gc_media, no django-cleanup
+@cleanup.ignore
 class Publication(BaseModel):
     title = models.CharField(max_length=200, blank=False, null=False)
     status = models.CharField(
@@ -39,98 +52,287 @@ class Publication(BaseModel):
     publish_date = models.DateTimeField(blank=False, null=False)
     featured_image = models.ImageField(upload_to='publications/', blank=False, null=False)
     is_featured = models.BooleanField(default=False)
+    # Manifiesto de derivados responsivos de featured_image (srcset)
+    featured_image_variants = models.JSONField(default=list, blank=True)
+    # Resumen precalculado en save() para los listados (evita enviar el layout)
+    excerpt = models.TextField(blank=True, default='')
+    first_image = models.CharField(max_length=500, blank=True, default='')
+    word_count = models.PositiveIntegerField(default=0)
+    reading_time = models.PositiveIntegerField(default=0)  # minutos
+    # Cantidad de filas del layout (copiadas en PublicationRow para leerlas por rangos)
+    row_count = models.PositiveIntegerField(default=0)
+    # Bytes del layout en JSON compacto, para que un parche verifique el límite
+    # sin serializar el documento completo (None: se calcula en el próximo parche)
+    layout_size = models.PositiveIntegerField(null=True, blank=True)
+
+    # Campos de los que dependen los contadores de Section
+    STATS_FIELDS = {'status', 'section', 'section_id', 'publish_date'}
+    STATS_ATTNAMES = ('status', 'section_id', 'publish_date')
 
     class Meta:
         ordering = ['-publish_date']
+        # Índices alineados con las consultas reales: listados públicos
+        # (status [+ section] ordenados por fecha) y destacados
+        indexes = [
+            models.Index(fields=['status', 'section', 'publish_date'], name='pub_status_section_date_idx'),
+            models.Index(fields=['status', 'publish_date'], name='pub_status_date_idx'),
+            models.Index(fields=['is_featured', 'publish_date'], name='pub_featured_date_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores leídos de la base: save() compara contra ellos sin volver a consultar la fila
+        instance.remember_stats_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None:
+            self.remember_stats_values()
+        elif set(fields) & self.STATS_FIELDS:
+            # Recarga parcial: los demás campos pueden tener cambios sin guardar
+            self.loaded_stats_values = None
+
+    def stats_values(self):
+        return tuple(getattr(self, name) for name in self.STATS_ATTNAMES)
 
-    def delete(self, *args, **kwargs):
+    def remember_stats_values(self):
+        # Con alguno de los campos diferido (only/defer) save() consulta la fila
+        deferred = self.get_deferred_fields()
+        if any(name in deferred for name in self.STATS_ATTNAMES):
+            self.loaded_stats_values = None
+        else:
+            self.loaded_stats_values = self.stats_values()
+
+    def media_paths(self):
+        """Archivos de MEDIA que usa la publicación: imagen destacada e imágenes del layout"""
+        paths = layout_image_paths(self.layout)
+        if self.featured_image and self.featured_image._committed:
+            paths.add(self.featured_image.name)
+        return paths
+
+    def clean(self):
+        # El admin edita el layout como JSON: pasa por el mismo validador que la API
         try:
-            # Guardar referencia a las imágenes antes de eliminar
-            layout_images = []
-            if self.layout:
-                for row in self.layout:
-                    for cell in row.get('cells', []):
-                        if cell.get('type') == 'image' and cell.get('content'):
-                            try:
-                                # Convertir URL a ruta relativa
-                                url_path = urlparse(cell['content']).path
-                                # Remover MEDIA_URL del inicio
-                                relative_path = url_path.replace(settings.MEDIA_URL, '', 1)
-                                if relative_path:
-                                    layout_images.append(relative_path)
-                                    print(f"Imagen encontrada en layout: {relative_path}")
-                            except Exception as e:
-                                print(f"Error procesando ruta de imagen: {e}")
-
-            # Eliminar el featured_image
-            if self.featured_image:
-                try:
-                    featured_image_path = self.featured_image.path
-                    if os.path.isfile(featured_image_path):
-                        os.remove(featured_image_path)
-                        print(f"Imagen destacada eliminada: {featured_image_path}")
-                except Exception as e:
-                    print(f"Error eliminando imagen destacada: {e}")
-
-            # Eliminar las imágenes del layout
-            for image_path in layout_images:
-                try:
-                    full_path = os.path.join(settings.MEDIA_ROOT, image_path)
-                    if os.path.isfile(full_path):
-                        os.remove(full_path)
-                        print(f"Imagen de layout eliminada: {full_path}")
-                    else:
-                        print(f"Archivo no encontrado: {full_path}")
-                except Exception as e:
-                    print(f"Error eliminando imagen de layout: {e}")
-
-        except Exception as e:
-            print(f"Error general en delete: {e}")
-        finally:
-            # Llamar al método delete original
-            super().delete(*args, **kwargs)
+            validate_layout(self.layout)
+        except ValueError as e:
+            raise ValidationError({'layout': str(e)})
 
     def save(self, *args, **kwargs):
-        if self.pk:
-            try:
-                old_instance = Publication.objects.get(pk=self.pk)
-                old_images = set()
-                new_images = set()
-
-                # Recolectar imágenes antiguas
-                if old_instance.layout:
-                    for row in old_instance.layout:
-                        for cell in row.get('cells', []):
-                            if cell.get('type') == 'image' and cell.get('content'):
-                                url_path = urlparse(cell['content']).path
-                                relative_path = url_path.replace(settings.MEDIA_URL, '', 1)
-                                if relative_path:
-                                    old_images.add(relative_path)
-
-                # Recolectar imágenes nuevas
-                if self.layout:
-                    for row in self.layout:
-                        for cell in row.get('cells', []):
-                            if cell.get('type') == 'image' and cell.get('content'):
-                                url_path = urlparse(cell['content']).path
-                                relative_path = url_path.replace(settings.MEDIA_URL, '', 1)
-                                if relative_path:
-                                    new_images.add(relative_path)
-
-                # Eliminar imágenes que ya no están en uso
-                for image_path in old_images - new_images:
-                    try:
-                        full_path = os.path.join(settings.MEDIA_ROOT, image_path)
-                        if os.path.isfile(full_path):
-                            os.remove(full_path)
-                            print(f"Imagen eliminada durante actualización: {full_path}")
-                    except Exception as e:
-                        print(f"Error eliminando imagen durante actualización: {e}")
-
-            except Publication.DoesNotExist:
-                pass
+        # LayoutChanges de un parche: solo se recalcula lo que tocaron sus filas
+        changes = kwargs.pop('layout_changes', None)
+        # Una imagen destacada recién subida aún no está guardada en el storage:
+        # pasa por el almacén por contenido (si ya existe no se procesa de nuevo)
+        if self.featured_image and not self.featured_image._committed:
+            asset = MediaAsset.store(self.featured_image.file, created_by_id=self.created_by_id)
+            self.featured_image = asset.path
+            self.featured_image_variants = asset.variants
 
-        super().save(*args, **kwargs)
+        if changes is None:
+            summary = summarize_layout(self.layout)
+            self.layout_size = None
+        else:
+            summary = update_summary(self.layout, self.word_count, changes.previous_rows(), changes.current_rows())
+            self.layout_size = changes.size
+        for field, value in summary.items():
+            setattr(self, field, value)
+        self.row_count = len(self.layout or [])
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'layout' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *summary, 'row_count', 'layout_size'}
+
+        # Estado anterior para los contadores de la sección (solo si pudo cambiar)
+        track_stats = update_fields is None or bool(self.STATS_FIELDS & set(update_fields))
+        previous = None
+        if track_stats and not self._state.adding:
+            previous = getattr(self, 'loaded_stats_values', None)
+            if previous is None:
+                previous = Publication.objects.filter(pk=self.pk).values_list(*self.STATS_ATTNAMES).first()
+
+        # Un borrador que sigue sin publicarse no cambia la API pública: la señal
+        # post_save no invalida la caché (sin el estado anterior, se invalida)
+        if track_stats:
+            statuses = (previous[0] if previous else None, self.status)
+        else:
+            loaded = getattr(self, 'loaded_stats_values', None)
+            statuses = (loaded[0] if loaded else 'published',)
+        self.changes_public_output = 'published' in statuses
+
+        # La fila y sus tablas derivadas se guardan juntas: si falla una
+        # sincronización no queda la publicación guardada con índices desfasados
+        with transaction.atomic(using=kwargs.get('using') or self._state.db):
+            super().save(*args, **kwargs)
+
+            if track_stats:
+                self.sync_section_stats(previous)
+
+            if changes is not None:
+                self.sync_layout_changes(changes)
+            else:
+                # Solo si pudieron cambiar las imágenes usadas
+                if update_fields is None or {'layout', 'featured_image'} & set(update_fields):
+                    self.sync_asset_refs()
+
+                # Índice de búsqueda: solo si cambió el texto
+                if update_fields is None or {'layout', 'title'} & set(update_fields):
+                    self.sync_search_terms()
+
+                if update_fields is None or 'layout' in update_fields:
+                    self.sync_layout_rows()
+
+        if track_stats:
+            # Con update_fields parcial puede quedar en memoria algún valor sin guardar
+            self.loaded_stats_values = self.stats_values() if update_fields is None else None
+
+    def sync_section_stats(self, previous):
+        """Recalcula los contadores de las secciones afectadas si cambió algo que cuentan"""
+        current = self.stats_values()
+        if previous == current:
+            return
+        if self.status != 'published' and (previous is None or previous[0] != 'published'):
+            return  # Ni antes ni ahora visible: los contadores no cambian
+        section_ids = {self.section_id}
+        if previous is not None:
+            section_ids.add(previous[1])
+        Section.refresh_publication_stats(section_ids)
+
+    def sync_asset_refs(self):
+        """
+        Actualiza la tabla de referencias con las imágenes actuales: solo se
+        escriben las diferencias. Las imágenes que dejan de usarse quedan para
+        el comando gc_media.
+        """
+        new_paths = self.media_paths()
+        old_paths = set(self.asset_refs.values_list('path', flat=True))
+
+        removed = old_paths - new_paths
+        if removed:
+            self.asset_refs.filter(path__in=removed).delete()
+        added = new_paths - old_paths
+        if added:
+            PublicationAsset.objects.bulk_create(
+                [PublicationAsset(publication=self, path=path) for path in added],
+                ignore_conflicts=True
+            )
+
+    def sync_layout_changes(self, changes):
+        """
+        Tablas derivadas tras un parche del layout: referencias de imágenes,
+        índice de búsqueda y filas, a partir de las filas que tocó (su
+        contenido anterior y el actual), no del documento completo.
+        """
+        previous_rows, current_rows = changes.previous_rows(), changes.current_rows()
+
+        old_paths, new_paths = layout_image_paths(previous_rows), layout_image_paths(current_rows)
+        removed = old_paths - new_paths - {self.featured_image.name}
+        if removed:
+            # Una imagen quitada de estas filas puede seguir en otra
+            # (solo al quitar imágenes: se buscan en el resto de las filas)
+            candidates = [
+                row for row in self.layout
+                if id(row) not in changes.touched
+                and any(path in json.dumps(row, ensure_ascii=False) for path in removed)
+            ]
+            removed -= layout_image_paths(candidates)
+        if removed:
+            self.asset_refs.filter(path__in=removed).delete()
+        added = new_paths - old_paths
+        if added:
+            PublicationAsset.objects.bulk_create(
+                [PublicationAsset(publication=self, path=path) for path in added],
+                ignore_conflicts=True
+            )
+
+        # El título no cambia: la diferencia de pesos es la de las filas tocadas
+        delta = term_weights('', current_rows)
+        delta.subtract(term_weights('', previous_rows))
+        self.update_search_terms({term: value for term, value in delta.items() if value})
+
+        self.sync_layout_rows(changes.written_positions(), previous_count=len(changes.positions))
+
+    def update_search_terms(self, delta):
+        """Suma a los pesos del índice las diferencias de `delta` ({término: diferencia})"""
+        if not delta:
+            return
+        current = {
+            term: (pk, weight)
+            for pk, term, weight in self.search_terms.filter(term__in=delta).values_list('id', 'term', 'weight')
+        }
+        removed, changed, added = [], [], []
+        for term, value in delta.items():
+            pk, weight = current.get(term, (None, 0))
+            if weight + value <= 0:
+                if pk is not None:
+                    removed.append(pk)
+            elif pk is None:
+                added.append(PublicationTerm(publication=self, term=term, weight=weight + value))
+            else:
+                changed.append(PublicationTerm(pk=pk, weight=weight + value))
+        if removed:
+            PublicationTerm.objects.filter(pk__in=removed).delete()
+        if changed:
+            PublicationTerm.objects.bulk_update(changed, ['weight'], batch_size=500)
+        if added:
+            PublicationTerm.objects.bulk_create(added, batch_size=500, ignore_conflicts=True)
+
+    def sync_search_terms(self):
+        """Actualiza el índice de búsqueda con el título y el layout: solo las diferencias"""
+        weights = term_weights(self.title, self.layout)
+        current = {
+            term: (pk, weight)
+            for pk, term, weight in self.search_terms.values_list('id', 'term', 'weight')
+        }
+
+        removed = [pk for term, (pk, _) in current.items() if term not in weights]
+        if removed:
+            PublicationTerm.objects.filter(pk__in=removed).delete()
+        changed = [
+            PublicationTerm(pk=pk, weight=weights[term])
+            for term, (pk, weight) in current.items()
+            if term in weights and weights[term] != weight
+        ]
+        if changed:
+            PublicationTerm.objects.bulk_update(changed, ['weight'], batch_size=500)
+        added = [
+            PublicationTerm(publication=self, term=term, weight=weight)
+            for term, weight in weights.items()
+            if term not in current
+        ]
+        if added:
+            PublicationTerm.objects.bulk_create(added, batch_size=500, ignore_conflicts=True)
+
+    def sync_layout_rows(self, positions=None, previous_count=None):
+        """
+        Copia cada fila del layout en PublicationRow: solo se escriben las filas
+        que cambiaron. Con `positions` (tras un parche) solo se revisan esas.
+        """
+        rows = list(self.layout or [])
+        layout_rows = self.layout_rows.all()
+        if positions is not None:
+            layout_rows = layout_rows.filter(position__in=positions)
+        current = {
+            position: (pk, digest)
+            for pk, position, digest in layout_rows.values_list('id', 'position', 'digest')
+        }
+
+        if positions is None:
+            previous_count = len(current)
+            positions = range(len(rows))
+        if previous_count > len(rows):
+            self.layout_rows.filter(position__gte=len(rows)).delete()
+        changed, added = [], []
+        for position in positions:
+            row = rows[position]
+            digest = PublicationRow.make_digest(row)
+            if position not in current:
+                added.append(PublicationRow(publication=self, position=position, data=row, digest=digest))
+            elif current[position][1] != digest:
+                changed.append(PublicationRow(pk=current[position][0], data=row, digest=digest))
+        if changed:
+            PublicationRow.objects.bulk_update(changed, ['data', 'digest'], batch_size=100)
+        if added:
+            PublicationRow.objects.bulk_create(added, batch_size=100)
         
 
 class Section(BaseModel):
@@ -138,6 +340,14 @@ class Section(BaseModel):
     slug = models.SlugField(unique=True, blank=True)  # Permitir que esté en blanco inicialmente
     is_active = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0)
+    # Publicaciones publicadas y la fecha de la más reciente: los mantiene
+    # Publication al guardar o eliminar (refresh_publication_stats)
+    published_count = models.PositiveIntegerField(default=0)
+    latest_publish_date = models.DateTimeField(null=True, blank=True)
+    # Aparte de updated_at: publicar no cambia el ETag de las demás publicaciones de la sección
+    stats_updated_at = models.DateTimeField(null=True, blank=True)
+
+    STATS_FIELDS = ('published_count', 'latest_publish_date', 'stats_updated_at')
 
     class Meta:
         ordering = ['order']
@@ -161,25 +371,51 @@ class Section(BaseModel):
                 })
 
     def save(self, *args, **kwargs):
+        # LayoutChanges de un parche: solo se recalcula lo que tocaron sus filas
+        changes = kwargs.pop('layout_changes', None)
         # Generar slug automáticamente si no se proporciona o está vacío
         if not self.slug and self.title:
             self.slug = slugify(self.title)
             
-        # Asegurarnos de que el slug sea único
+        # Asegurarnos de que el slug sea único (una sola consulta por prefijo)
         if self.slug:
-            orig_slug = self.slug
-            counter = 1
-            while Section.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-                self.slug = f"{orig_slug}-{counter}"
-                counter += 1
+            self.slug = allocate_slugs(Section, [self.slug], exclude_pk=self.pk)[0]
+
+        # Una instancia leída antes de publicar algo no debe pisar los contadores
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.STATS_FIELDS
+            ]
                 
         super().save(*args, **kwargs)
 
+    @classmethod
+    def refresh_publication_stats(cls, section_ids=None, using=DEFAULT_DB_ALIAS):
+        """
+        Recalcula published_count y latest_publish_date de las secciones
+        indicadas (todas si es None) en un solo UPDATE con subconsultas.
+        Marca stats_updated_at para que cambie el ETag de /api/public/sections/.
+        """
+        published = Publication.objects.filter(section=OuterRef('pk'), status='published').order_by()
+        sections = cls.objects.using(using)
+        if section_ids is not None:
+            sections = sections.filter(pk__in=section_ids)
+        return sections.update(
+            published_count=Coalesce(
+                Subquery(published.values('section').annotate(total=Count('pk')).values('total')), 0
+            ),
+            latest_publish_date=Subquery(published.order_by('-publish_date').values('publish_date')[:1]),
+            stats_updated_at=timezone.now(),
+        )
+
     def __str__(self):
         return self.title
     
     
 
+# Igual que Publication: las fotos reemplazadas las elimina gc_media
+@cleanup.ignore
 class Biography(BaseModel):
     name = models.CharField(max_length=150)
     position = models.CharField(max_length=150)
@@ -191,4 +427,195 @@ class Biography(BaseModel):
     order = models.PositiveIntegerField(default=0)
 
     class Meta:
-        ordering = ['order', 'name']
\ No newline at end of file
+        ordering = ['order', 'name']
+
+
+class MediaAsset(BaseModel):
+    """
+    Imagen guardada por contenido (SHA-256 del archivo subido): la misma imagen
+    subida varias veces se procesa y almacena una sola vez, con una URL
+    inmutable. Los archivos que ninguna publicación referencia (ver
+    PublicationAsset) los elimina el comando gc_media.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    path = models.CharField(max_length=255, unique=True)
+    variants = models.JSONField(default=list, blank=True)
+
+    @classmethod
+    def find(cls, image_file, digest=None):
+        """Busca una imagen ya almacenada con el mismo contenido"""
+        digest = digest or ImageHandler.compute_hash(image_file)
+        asset = cls.objects.filter(sha256=digest).first()
+        if asset and os.path.isfile(os.path.join(settings.MEDIA_ROOT, asset.path)):
+            # Reutilizada ahora: gc_media no la elimina durante el período de gracia
+            cls.objects.filter(pk=asset.pk).update(updated_at=timezone.now())
+            return asset
+        return None
+
+    @classmethod
+    def store(cls, image_file, handler=None, created_by_id=None):
+        """Guarda la imagen en el almacén por contenido; si ya existe no se procesa"""
+        digest = ImageHandler.compute_hash(image_file)
+        asset = cls.find(image_file, digest)
+        if asset:
+            return asset
+
+        path, variants = cls.process(image_file, digest, handler)
+        asset, _ = cls.objects.update_or_create(
+            sha256=digest,
+            defaults={'path': path, 'variants': variants},
+            create_defaults={'path': path, 'variants': variants, 'created_by_id': created_by_id},
+        )
+        return asset
+
+    @staticmethod
+    def process(image_file, digest, handler=None):
+        """Procesa y guarda la imagen con su nombre por contenido, sin tocar la base"""
+        handler = handler or ImageHandler(image_file, directory=settings.UPLOAD_PATHS['assets'])
+        ext = os.path.splitext(image_file.name)[1].lower()
+        path = handler.process_image(filename=f'{digest[:2]}/{digest}{ext}')
+        return path, handler.variants
+
+    def publications(self):
+        """Publicaciones que usan esta imagen (por el índice de PublicationAsset)"""
+        return Publication.objects.filter(asset_refs__path=self.path)
+
+
+class PublicationAsset(models.Model):
+    """
+    Referencia normalizada de una publicación a un archivo de MEDIA (imagen
+    destacada o del layout). Se mantiene de forma incremental al guardar.
+    """
+    publication = models.ForeignKey(
+        Publication,
+        on_delete=models.CASCADE,
+        related_name='asset_refs'
+    )
+    path = models.CharField(max_length=255, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['publication', 'path'], name='unique_publication_asset'),
+        ]
+
+    def __str__(self):
+        return f"{self.publication_id}: {self.path}"
+
+    @classmethod
+    def rebuild(cls, publications, batch_size=500):
+        """Crea las referencias que falten (p. ej. tras un bulk_create, que no llama a save())"""
+        refs = []
+        rows = publications.values_list('pk', 'featured_image', 'layout')
+        for pk, featured_image, layout in rows.iterator(chunk_size=batch_size):
+            paths = layout_image_paths(layout)
+            if featured_image:
+                paths.add(featured_image)
+            refs.extend(cls(publication_id=pk, path=path) for path in paths)
+        cls.objects.bulk_create(refs, batch_size=batch_size, ignore_conflicts=True)
+
+
+class PublicationTerm(models.Model):
+    """
+    Índice invertido para la búsqueda pública: términos normalizados del
+    título y de las celdas de texto del layout, con su peso. Se mantiene de
+    forma incremental al guardar la publicación.
+    """
+    publication = models.ForeignKey(
+        Publication,
+        on_delete=models.CASCADE,
+        related_name='search_terms'
+    )
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            # También es el índice por término que usa la búsqueda
+            models.UniqueConstraint(fields=['term', 'publication'], name='unique_term_publication'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.publication_id})"
+
+    @classmethod
+    def search(cls, terms, section_slug=None):
+        """
+        Publicaciones publicadas que contienen alguno de los términos, por
+        relevancia: primero las que contienen más términos y luego por la suma
+        de peso × idf (los términos poco frecuentes pesan más). Retorna filas
+        {'publication', 'matched', 'score'}.
+        """
+        rows = cls.objects.filter(term__in=terms, publication__status='published')
+        if section_slug:
+            rows = rows.filter(publication__section__slug=section_slug)
+
+        total = Publication.objects.filter(status='published').count()
+        frequencies = rows.order_by().values_list('term').annotate(count=Count('id'))
+        idf = {term: math.log(1 + total / count) for term, count in frequencies}
+        if not idf:
+            return rows.none().values('publication')
+
+        score = Sum(Case(
+            *[When(term=term, then=F('weight') * Value(value)) for term, value in idf.items()],
+            default=Value(0.0),
+            output_field=models.FloatField()
+        ))
+        # Desempate por publication_id: ordenar por 'publication' usaría el
+        # Meta.ordering de Publication (fecha ascendente, con un JOIN)
+        return rows.values('publication').annotate(
+            matched=Count('id'),
+            score=score
+        ).order_by('-matched', '-score', '-publication_id')
+
+    @classmethod
+    def rebuild(cls, publications, batch_size=500):
+        """Indexa publicaciones sin pasar por save() (p. ej. tras un bulk_create)"""
+        terms = []
+        rows = publications.values_list('pk', 'title', 'layout')
+        for pk, title, layout in rows.iterator(chunk_size=batch_size):
+            terms.extend(
+                cls(publication_id=pk, term=term, weight=weight)
+                for term, weight in term_weights(title, layout).items()
+            )
+        cls.objects.bulk_create(terms, batch_size=batch_size, ignore_conflicts=True)
+
+
+class PublicationRow(models.Model):
+    """
+    Copia de una fila del layout de una publicación. Permite servir el detalle
+    por rangos de filas (?rows=0-20) sin leer ni decodificar el layout completo.
+    """
+    publication = models.ForeignKey(
+        Publication,
+        on_delete=models.CASCADE,
+        related_name='layout_rows'
+    )
+    position = models.PositiveIntegerField()
+    data = models.JSONField(default=dict)
+    # Huella del contenido: al guardar solo se reescriben las filas que cambiaron
+    digest = models.CharField(max_length=32)
+
+    class Meta:
+        ordering = ['position']
+        constraints = [
+            models.UniqueConstraint(fields=['publication', 'position'], name='unique_publication_row'),
+        ]
+
+    def __str__(self):
+        return f"{self.publication_id}: fila {self.position}"
+
+    @staticmethod
+    def make_digest(row):
+        raw = json.dumps(row, sort_keys=True, separators=(',', ':'))
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def rebuild(cls, publications, batch_size=500):
+        """Copia las filas de publicaciones guardadas sin save() (p. ej. tras un bulk_create)"""
+        rows = []
+        for pk, layout in publications.values_list('pk', 'layout').iterator(chunk_size=batch_size):
+            rows.extend(
+                cls(publication_id=pk, position=position, data=row, digest=cls.make_digest(row))
+                for position, row in enumerate(layout or [])
+            )
+        cls.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
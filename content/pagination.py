@@ -0,0 +1,172 @@
+# content/pagination.py
+import base64
+import json
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class PublicationKeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (publish_date, id), el mismo orden de
+    Publication.Meta.ordering. Cada página filtra a partir de la última fila
+    vista en lugar de usar OFFSET, por lo que una página profunda cuesta lo
+    mismo que la primera. El COUNT(*) es opcional (?with_count=1).
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    count_query_param = 'with_count'
+    invalid_cursor_message = 'Cursor inválido'
+    page_size = api_settings.PAGE_SIZE
+
+    @classmethod
+    def is_requested(cls, request):
+        params = request.query_params
+        return params.get(cls.mode_query_param) == 'cursor' or cls.cursor_query_param in params
+
+    def encode_cursor(self, publication, reverse):
+        payload = {
+            'd': publication.publish_date.isoformat(),
+            'i': publication.pk,
+        }
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        encoded = base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            payload = json.loads(raw)
+            publish_date = parse_datetime(payload['d'])
+            pk = int(payload['i'])
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if publish_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return publish_date, pk, reverse
+
+    def filter_queryset(self, queryset, request):
+        """Consulta de la página (con una fila extra) a partir del cursor"""
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        self.reverse = False
+        queryset = queryset.order_by('-publish_date', '-id')
+        if self.cursor is not None:
+            publish_date, pk, self.reverse = self.cursor
+            if self.reverse:
+                queryset = queryset.filter(
+                    Q(publish_date__gt=publish_date) | Q(publish_date=publish_date, id__gt=pk)
+                ).order_by('publish_date', 'id')
+            else:
+                queryset = queryset.filter(
+                    Q(publish_date__lt=publish_date) | Q(publish_date=publish_date, id__lt=pk)
+                )
+        # Se pide una fila extra para saber si hay más sin contar
+        return queryset[:self.page_size + 1]
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param) in ('1', 'true')
+
+    def set_results(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        self.results = results
+        return results
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self.filter_queryset(queryset, request)
+        self.count = queryset.order_by().count() if self.wants_count(request) else None
+        return self.set_results(list(page))
+
+    async def apaginate_queryset(self, queryset, request):
+        page = self.filter_queryset(queryset, request)
+        self.count = await queryset.order_by().acount() if self.wants_count(request) else None
+        return self.set_results([item async for item in page.aiterator()])
+
+    def get_next_link(self):
+        if not self.has_next or not self.results:
+            return None
+        return self.encode_cursor(self.results[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.results:
+            return None
+        return self.encode_cursor(self.results[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            response = {'count': self.count, **response}
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetPaginationMixin:
+    """
+    Usa la paginación por cursor cuando la petición la solicita
+    (?pagination=cursor o ?cursor=...) y la paginación global en otro caso.
+    """
+    keyset_pagination_class = PublicationKeysetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.keyset_pagination_class.is_requested(self.request):
+                self._paginator = self.keyset_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """
+    PageNumberPagination para las vistas asíncronas: el COUNT y la página se
+    leen con el ORM asíncrono y los enlaces y mensajes son los de DRF, así que
+    la respuesta es idéntica a la de la vista síncrona.
+    """
+
+    async def apaginate_queryset(self, queryset, request):
+        paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+        # count es un cached_property: con el valor ya calculado el paginador no consulta
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        self.page.object_list = [item async for item in self.page.object_list.aiterator()]
+        self.request = request
+        return list(self.page)
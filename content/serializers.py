@@ -1,5 +1,25 @@
 from rest_framework import serializers
+from django.conf import settings
 from .models import Section, Publication, Biography
+from .utils.layout_patch import layout_version
+from .utils.layout_schema import validate_layout
+
+
+def variant_urls(variants, request=None):
+    """Convierte el manifiesto de derivados (paths) en URLs para srcset"""
+    result = []
+    for variant in variants or []:
+        variant = dict(variant)
+        url = settings.MEDIA_URL + variant.pop('path')
+        variant['url'] = request.build_absolute_uri(url) if request else url
+        result.append(variant)
+    return result
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    def to_representation(self, value):
+        return variant_urls(value, self.context.get('request'))
+
 
 class SectionSerializer(serializers.ModelSerializer):
     slug = serializers.SlugField(read_only=True)
@@ -19,17 +39,33 @@ class SectionSerializer(serializers.ModelSerializer):
 class PublicationSerializer(serializers.ModelSerializer):
     section = SectionSerializer(read_only=True)
     section_id = serializers.IntegerField(write_only=True)
+    featured_image_variants = ImageVariantsField()
+    # Versión del layout para las ediciones parciales (patch_layout)
+    version = serializers.SerializerMethodField()
     
     class Meta:
         model = Publication
         fields = [
             'id', 'title', 'status', 'layout', 
             'section', 'section_id', 'publish_date',
-            'featured_image', 'is_featured', 'created_at'
+            'featured_image', 'featured_image_variants', 'is_featured', 'created_at',
+            'excerpt', 'first_image', 'word_count', 'reading_time', 'version'
         ]
-        read_only_fields = ['created_at']
-        
-        
+        read_only_fields = [
+            'created_at', 'excerpt', 'first_image', 'word_count', 'reading_time'
+        ]
+
+    def get_version(self, obj):
+        return layout_version(obj) if obj.updated_at else None
+
+    def validate_layout(self, value):
+        # Mismo validador que update_layout: estructura, límites y HTML saneado
+        try:
+            return validate_layout(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+
 class BiographySerializer(serializers.ModelSerializer):
     class Meta:
         model = Biography
@@ -44,14 +80,38 @@ class BiographySerializer(serializers.ModelSerializer):
 class PublicPublicationSerializer(serializers.ModelSerializer):
     section_slug = serializers.CharField(source='section.slug', read_only=True)
     section_title = serializers.CharField(source='section.title', read_only=True)
+    featured_image_variants = ImageVariantsField()
 
     class Meta:
         model = Publication
         fields = [
             'id', 'title', 'layout', 'section_slug', 
-            'section_title', 'publish_date', 'featured_image'
+            'section_title', 'publish_date', 'featured_image',
+            'featured_image_variants', 'row_count'
         ]
 
+
+# Serializador liviano para listados públicos: usa el resumen precalculado
+# y deja el layout completo para el detalle
+class PublicPublicationListSerializer(serializers.ModelSerializer):
+    section_slug = serializers.CharField(source='section.slug', read_only=True)
+    section_title = serializers.CharField(source='section.title', read_only=True)
+    featured_image_variants = ImageVariantsField()
+
+    class Meta:
+        model = Publication
+        fields = [
+            'id', 'title', 'section_slug', 'section_title',
+            'publish_date', 'featured_image', 'featured_image_variants',
+            'excerpt', 'first_image', 'word_count', 'reading_time'
+        ]
+
+# Secciones públicas (menú): los contadores vienen precalculados en la fila
+class PublicSectionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Section
+        fields = ['id', 'title', 'slug', 'order', 'published_count', 'latest_publish_date']
+
 # Nuevo serializador para biografías públicas
 class PublicBiographySerializer(serializers.ModelSerializer):
     class Meta:
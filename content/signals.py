@@ -0,0 +1,39 @@
+# content/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Section, Publication, Biography
+from .utils.public_cache import bump_version, bump_version_on_commit
+
+
+@receiver(post_delete, sender=Publication)
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def invalidate_public_publications(sender, **kwargs):
+    # Las publicaciones públicas incluyen título y slug de la sección,
+    # por eso cualquier cambio en Section también las invalida
+    bump_version_on_commit('publications')
+
+
+@receiver(post_save, sender=Publication)
+def invalidate_on_publication_save(sender, instance, **kwargs):
+    # Publication.save() indica si la publicación era o queda publicada
+    if getattr(instance, 'changes_public_output', True):
+        bump_version_on_commit('publications')
+
+
+@receiver(post_delete, sender=Publication)
+def refresh_section_stats(sender, instance, **kwargs):
+    # También en los delete() de querysets y en cascada, que no llaman a Publication.delete()
+    if instance.status == 'published':
+        Section.refresh_publication_stats([instance.section_id])
+
+
+@receiver(post_save, sender=Biography)
+@receiver(post_delete, sender=Biography)
+def invalidate_public_biographies(sender, **kwargs):
+    bump_version_on_commit('biographies')
+
+
+def invalidate_public_cache(sender, **kwargs):
+    # Tras migrar, la forma de las respuestas puede haber cambiado
+    bump_version()
@@ -1,3 +1,1367 @@
-from django.test import TestCase
+import importlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (
+    AsyncClient, Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from whitenoise.middleware import WhiteNoiseMiddleware
+from .models import Section, Publication, PublicationAsset, PublicationRow, PublicationTerm, Biography, MediaAsset
+from .pagination import PublicationKeysetPagination
+from .utils.compression import SUFFIXES, available_encodings
+from .utils.html_sanitizer import sanitize_html
+from .utils.image_handler import ImageHandler
+from .utils.importer import ContentImporter, DirectoryImageSource, ImportValidationError
+from .utils.layout import html_to_text, json_size, summarize_layout
+from .utils.layout_patch import layout_version
+from .utils.layout_schema import LayoutSchema
+from .utils.metrics import Registry, collect, registry
+from .utils.ordering import ORDER_GAP
+from .utils.public_cache import get_version
+from .utils.search import term_weights
+from .utils.snapshot import MANIFEST_NAME, SnapshotBuilder
 
-# Create your tests here.
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class QueryBudgetTests(TestCase):
+    """
+    Presupuesto de consultas por endpoint: la cantidad de consultas debe ser
+    la misma con 10 que con 1000 filas (sin N+1) y no superar el presupuesto.
+    """
+    sizes = (10, 1000)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(username='editor', password='x', is_staff=True)
+        )
+        self.sections = [Section.objects.create(title=f'Sección {i}') for i in range(5)]
+
+    def fill(self, total):
+        """Completa la base hasta `total` publicaciones y biografías"""
+        now = timezone.now()
+        start = Publication.objects.count()
+        Publication.objects.bulk_create([
+            Publication(
+                title=f'Publicación {i}',
+                status='published',
+                section=self.sections[i % len(self.sections)],
+                publish_date=now - timedelta(hours=i),
+                featured_image='publications/test.jpg',
+                is_featured=True,
+            )
+            for i in range(start, total)
+        ])
+        PublicationTerm.rebuild(Publication.objects.filter(search_terms__isnull=True))
+        start = Biography.objects.count()
+        Biography.objects.bulk_create([
+            Biography(name=f'Persona {i}', position='Docente', biography='...', order=i)
+            for i in range(start, total)
+        ])
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def assertQueryBudget(self, url, budget):
+        counts = []
+        for size in self.sizes:
+            self.fill(size)
+            path = url() if callable(url) else url
+            counts.append(self.count_queries(path))
+        self.assertEqual(len(set(counts)), 1, f'{path}: consultas por tamaño {dict(zip(self.sizes, counts))}')
+        self.assertLessEqual(counts[0], budget, path)
+
+    def first_publication_url(self, prefix):
+        return lambda: f'{prefix}{Publication.objects.values_list("id", flat=True).first()}/'
+
+    def test_publication_list(self):
+        self.assertQueryBudget('/api/publications/', 2)
+
+    def test_publication_list_cursor(self):
+        self.assertQueryBudget('/api/publications/?pagination=cursor', 1)
+
+    def test_publication_list_by_section(self):
+        self.assertQueryBudget(lambda: f'/api/publications/?section={self.sections[0].id}', 2)
+
+    def test_publication_featured(self):
+        self.assertQueryBudget('/api/publications/featured/', 1)
+
+    def test_publication_detail(self):
+        self.assertQueryBudget(self.first_publication_url('/api/publications/'), 1)
+
+    def test_section_list(self):
+        self.assertQueryBudget('/api/sections/', 2)
+
+    def test_biography_list(self):
+        self.assertQueryBudget('/api/biographies/', 2)
+
+    def test_public_publication_list(self):
+        # Validadores (ETag) + COUNT + página
+        self.assertQueryBudget('/api/public/publications/', 3)
+
+    def test_public_publication_detail(self):
+        self.assertQueryBudget(self.first_publication_url('/api/public/publication/'), 2)
+
+    def test_public_publication_detail_rows(self):
+        # Validadores + publicación sin layout + rango de PublicationRow
+        self.assertQueryBudget(
+            lambda: self.first_publication_url('/api/public/publication/')() + '?rows=0-20', 3
+        )
+
+    def test_public_biography_list(self):
+        self.assertQueryBudget('/api/public/biographies/', 3)
+
+    def test_public_sections(self):
+        # Validadores + secciones: los contadores ya están en la fila
+        self.assertQueryBudget('/api/public/sections/', 2)
+
+    def test_public_home(self):
+        # Validadores + destacadas + últimas por sección (una consulta con ROW_NUMBER)
+        self.assertQueryBudget('/api/public/home/', 3)
+
+    def test_public_search(self):
+        # Total publicadas + frecuencias (idf) + COUNT + página rankeada + publicaciones
+        self.assertQueryBudget('/api/public/publications/search/?q=publicacion', 5)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AsyncPublicReadTests(TestCase):
+    """
+    Las vistas públicas asíncronas (config/urls_asgi.py) responden lo mismo
+    que las síncronas, con las mismas consultas.
+    """
+
+    def setUp(self):
+        section = Section.objects.create(title='Sección')
+        now = timezone.now()
+        self.publication = Publication.objects.create(
+            title='Publicación',
+            status='published',
+            section=section,
+            publish_date=now,
+            layout=[{'cells': [{'type': 'text', 'content': f'<p>Fila {i}</p>'}]} for i in range(5)],
+        )
+        Publication.objects.bulk_create([
+            Publication(title=f'Publicación {i}', status='published', section=section,
+                        publish_date=now - timedelta(hours=i + 1), is_featured=i % 5 == 0)
+            for i in range(25)
+        ])
+        self.biography = Biography.objects.create(name='Persona', position='Docente', biography='...')
+        Biography.objects.bulk_create([
+            Biography(name=f'Persona {i}', position='Docente', biography='...', order=i + 1)
+            for i in range(15)
+        ])
+
+    def assertSameResponse(self, url, budget):
+        cache.clear()
+        with override_settings(ROOT_URLCONF='config.urls'):
+            expected = Client().get(url)
+        cache.clear()
+        with override_settings(ROOT_URLCONF='config.urls_asgi'):
+            with CaptureQueriesContext(connection) as queries:
+                response = async_to_sync(AsyncClient().get)(url)
+        self.assertEqual(response.status_code, expected.status_code, url)
+        self.assertEqual(response.content, expected.content, url)
+        self.assertEqual(response.get('ETag'), expected.get('ETag'), url)
+        self.assertLessEqual(len(queries), budget, url)
+
+    def test_publication_list(self):
+        self.assertSameResponse('/api/public/publications/', 3)
+        self.assertSameResponse('/api/public/publications/?page=2', 3)
+        self.assertSameResponse('/api/public/publications/?page=9', 2)
+
+    def test_publication_list_cursor(self):
+        self.assertSameResponse('/api/public/publications/?pagination=cursor', 2)
+        self.assertSameResponse('/api/public/publications/?pagination=cursor&with_count=1', 3)
+
+    def test_publication_detail(self):
+        self.assertSameResponse(f'/api/public/publication/{self.publication.id}/', 2)
+        self.assertSameResponse(f'/api/public/publications/{self.publication.id}/', 2)
+        self.assertSameResponse(f'/api/public/publication/{self.publication.id}/?rows=1-3', 3)
+        self.assertSameResponse(f'/api/public/publication/{self.publication.id}/?rows=x', 0)
+        self.assertSameResponse('/api/public/publication/999999/', 2)
+
+    def test_home(self):
+        self.assertSameResponse('/api/public/home/', 3)
+        self.assertSameResponse('/api/public/home/?per_section=2', 3)
+        self.assertSameResponse('/api/public/home/?per_section=x', 0)
+
+    def test_sections(self):
+        self.assertSameResponse('/api/public/sections/', 2)
+
+    def test_biographies(self):
+        self.assertSameResponse('/api/public/biographies/', 3)
+        self.assertSameResponse('/api/public/biographies/?page=2', 3)
+        self.assertSameResponse(f'/api/public/biographies/{self.biography.id}/', 2)
+        self.assertSameResponse('/api/public/biographies/999999/', 2)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ConditionalRequestTests(TestCase):
+    """ETag de los listados públicos: 304 solo si el listado no cambió"""
+    url = '/api/public/publications/'
+
+    def setUp(self):
+        cache.clear()
+        section = Section.objects.create(title='Sección')
+        self.publications = [
+            Publication.objects.create(
+                title=f'Publicación {i}', status='published', section=section,
+                publish_date=timezone.now() - timedelta(hours=i), featured_image='publications/test.jpg',
+            )
+            for i in range(3)
+        ]
+
+    def get(self, **headers):
+        return Client().get(self.url, headers=headers)
+
+    def test_matching_etag(self):
+        response = self.get()
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.get(if_none_match=response['ETag']).status_code, 304)
+
+    def test_after_edit(self):
+        etag = self.get()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.publications[1].title = 'Otro título'
+            self.publications[1].save()
+        response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_after_unpublish(self):
+        etag = self.get()['ETag']
+        removed = self.publications[2]
+        with self.captureOnCommitCallbacks(execute=True):
+            removed.status = 'draft'
+            removed.save()
+        for headers in ({'if_none_match': etag}, {'if_modified_since': 'Fri, 01 Jan 2100 00:00:00 GMT'}):
+            response = self.get(**headers)
+            self.assertEqual(response.status_code, 200, headers)
+            self.assertNotIn(removed.id, [item['id'] for item in response.json()['results']])
+
+    def test_biography_detail_last_modified(self):
+        biography = Biography.objects.create(name='Persona', position='Docente', biography='...')
+        url = f'/api/public/biographies/{biography.id}/'
+        response = Client().get(url)
+        self.assertIn('Last-Modified', response)
+        since = response['Last-Modified']
+        self.assertEqual(Client().get(url, headers={'if_modified_since': since}).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            biography.is_active = False
+            biography.save()
+        self.assertEqual(Client().get(url, headers={'if_modified_since': since}).status_code, 404)
+
+    def test_draft_edits_keep_cache(self):
+        version = get_version('publications')
+        with self.captureOnCommitCallbacks(execute=True):
+            draft = Publication.objects.create(
+                title='Borrador', section=self.publications[0].section,
+                publish_date=timezone.now(), featured_image='publications/test.jpg',
+            )
+            draft = Publication.objects.get(pk=draft.pk)
+            draft.title = 'Borrador corregido'
+            draft.save()
+            draft.layout = [{'cells': [{'type': 'text', 'content': '<p>Texto</p>'}]}]
+            draft.save(update_fields=['layout', 'updated_at'])
+        self.assertEqual(get_version('publications'), version)
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.status = 'published'
+            draft.save()
+        self.assertNotEqual(get_version('publications'), version)
+
+
+class SectionStatsTests(TestCase):
+    """Los contadores de Section siguen a las publicaciones publicadas"""
+
+    def setUp(self):
+        self.news, self.events = Section.objects.create(title='Noticias'), Section.objects.create(title='Eventos')
+        self.now = timezone.now()
+
+    def create(self, section, status='published', hours=0):
+        return Publication.objects.create(
+            title='Publicación', status=status, section=section,
+            publish_date=self.now - timedelta(hours=hours), featured_image='publications/test.jpg',
+        )
+
+    def assertStats(self, section, count, latest):
+        section.refresh_from_db()
+        self.assertEqual((section.published_count, section.latest_publish_date), (count, latest))
+
+    def test_create_and_status_change(self):
+        first = self.create(self.news, hours=2)
+        draft = self.create(self.news, status='draft')
+        self.assertStats(self.news, 1, first.publish_date)
+        draft.status = 'published'
+        draft.save()
+        self.assertStats(self.news, 2, draft.publish_date)
+        draft.status = 'archived'
+        draft.save()
+        self.assertStats(self.news, 1, first.publish_date)
+
+    def test_move_and_delete(self):
+        publication = self.create(self.news)
+        publication.section = self.events
+        publication.save()
+        self.assertStats(self.news, 0, None)
+        self.assertStats(self.events, 1, publication.publish_date)
+        Publication.objects.filter(pk=publication.pk).delete()
+        self.assertStats(self.events, 0, None)
+
+    def test_stale_section_save_keeps_stats(self):
+        stale = Section.objects.get(pk=self.news.pk)
+        publication = self.create(self.news)
+        stale.title = 'Noticias y avisos'
+        stale.save()
+        self.assertStats(self.news, 1, publication.publish_date)
+
+    def test_save_compares_loaded_values(self):
+        self.create(self.news)
+        publication = Publication.objects.get()
+        publication.title = 'Otro título'
+        with CaptureQueriesContext(connection) as queries:
+            publication.save()
+        self.assertFalse([
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and 'FROM "content_publication"' in query['sql']
+        ])
+        publication.status = 'draft'
+        publication.save()
+        self.assertStats(self.news, 0, None)
+        deferred = Publication.objects.only('id', 'title').get()
+        deferred.status = 'published'
+        deferred.save()
+        self.assertStats(self.news, 1, deferred.publish_date)
+
+    def test_failed_sync_rolls_back_save(self):
+        publication = self.create(self.news, status='draft')
+        publication.status = 'published'
+        with mock.patch.object(Publication, 'sync_asset_refs', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                publication.save()
+        self.assertEqual(Publication.objects.get(pk=publication.pk).status, 'draft')
+        self.assertStats(self.news, 0, None)
+
+
+class AssetRefsTests(TestCase):
+    """Las imágenes insertadas en las celdas de texto también son referencias"""
+
+    def test_inline_images_are_referenced(self):
+        layout = [{'cells': [
+            {'type': 'image', 'content': '/media/assets/ab/celda.jpg'},
+            {'type': 'text', 'content': (
+                '<p>Texto <img src="/media/assets/cd/inline.webp" alt=""> '
+                '<IMG SRC="https://example.com/externa.jpg"></p>'
+            )},
+        ]}]
+        publication = Publication.objects.create(
+            title='Publicación', section=Section.objects.create(title='Noticias'), layout=layout,
+            publish_date=timezone.now(), featured_image='publications/test.jpg',
+        )
+        self.assertEqual(
+            set(PublicationAsset.objects.filter(publication=publication).values_list('path', flat=True)),
+            {'publications/test.jpg', 'assets/ab/celda.jpg', 'assets/cd/inline.webp'}
+        )
+
+
+@override_settings(PUBLICATION_EXCERPT_LENGTH=40, PUBLICATION_WORDS_PER_MINUTE=4)
+class SummaryFieldsTests(TestCase):
+    """Resumen precalculado para los listados: extracto, primera imagen, palabras y lectura"""
+
+    layout = [
+        {'cells': [{'type': 'text', 'content': '<h2>Título &amp; subtítulo</h2>'}]},
+        {'cells': [
+            {'type': 'image', 'content': '/media/assets/ab/primera.jpg'},
+            {'type': 'text', 'content': '<p>Uno   dos\n<strong>tres</strong> cuatro cinco seis siete</p>'},
+        ]},
+        {'cells': [{'type': 'image', 'content': '/media/assets/cd/segunda.jpg'}]},
+    ]
+
+    def create(self, layout):
+        return Publication.objects.create(
+            title='Publicación', section=Section.objects.create(title='Noticias'), status='published',
+            publish_date=timezone.now(), featured_image='publications/test.jpg', layout=layout,
+        )
+
+    def assertSummary(self, publication):
+        publication.refresh_from_db()
+        self.assertEqual(
+            (publication.excerpt, publication.first_image, publication.word_count, publication.reading_time),
+            ('Título & subtítulo Uno dos tres cuatro…', '/media/assets/ab/primera.jpg', 10, 3)
+        )
+
+    def test_computed_on_save(self):
+        publication = self.create([])
+        self.assertEqual((publication.excerpt, publication.word_count, publication.reading_time), ('', 0, 0))
+        publication.layout = self.layout
+        publication.save()
+        self.assertSummary(publication)
+
+    def test_backfill_migration(self):
+        publication = self.create(self.layout)
+        Publication.objects.filter(pk=publication.pk).update(excerpt='', first_image='', word_count=0, reading_time=0)
+        migration = importlib.import_module('content.migrations.0008_publication_summary_fields')
+        migration.fill_summary_fields(apps, None)
+        self.assertSummary(publication)
+
+    def test_public_listing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            publication = self.create(self.layout)
+        item = self.client.get('/api/public/publications/').json()['results'][0]
+        self.assertNotIn('layout', item)
+        self.assertEqual(item['excerpt'], 'Título & subtítulo Uno dos tres cuatro…')
+        self.assertEqual((item['word_count'], item['reading_time']), (10, 3))
+        self.assertEqual(item['id'], publication.pk)
+
+
+@mock.patch.object(PublicationKeysetPagination, 'page_size', 4)
+class KeysetPaginationTests(TestCase):
+    """Paginación por cursor con muchas publicaciones en la misma fecha"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(username='editor', password='x', is_staff=True)
+        )
+        section = Section.objects.create(title='Noticias')
+        now = timezone.now().replace(microsecond=123456)
+        # 3 fechas repetidas 5 veces (los empates cruzan páginas) y una que
+        # solo se distingue por un microsegundo
+        dates = [now - timedelta(days=i % 3) for i in range(15)] + [now - timedelta(microseconds=1)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for i, publish_date in enumerate(dates):
+                Publication.objects.create(
+                    title=f'Publicación {i}', section=section, status='published',
+                    publish_date=publish_date, featured_image='publications/test.jpg',
+                )
+        self.expected = list(Publication.objects.order_by('-publish_date', '-id').values_list('id', flat=True))
+
+    def walk(self, url, direction='next'):
+        pages = []
+        while url:
+            data = self.client.get(url).json()
+            pages.append([item['id'] for item in data['results']])
+            url = data[direction]
+        return pages
+
+    def test_pages_follow_the_order(self):
+        for url in ('/api/publications/?pagination=cursor', '/api/public/publications/?pagination=cursor'):
+            with self.subTest(url=url):
+                pages = self.walk(url)
+                self.assertEqual(sum(pages, []), self.expected)
+                self.assertEqual([len(page) for page in pages], [4, 4, 4, 4])
+
+    def test_previous_links(self):
+        pages = self.walk('/api/public/publications/?pagination=cursor')
+        last = self.client.get('/api/public/publications/?pagination=cursor').json()
+        # Se avanza hasta la última página y se vuelve con los enlaces previous
+        while last['next']:
+            last = self.client.get(last['next']).json()
+        backwards = self.walk(last['previous'], direction='previous')
+        self.assertEqual(backwards, pages[-2::-1])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/public/publications/', {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class SanitizerTests(SimpleTestCase):
+    """El HTML se sanea con la lista blanca: conserva lo que emite TinyMCE"""
+
+    def assertClean(self, html, expected):
+        self.assertEqual(sanitize_html(html), expected)
+
+    def test_removes_scripts_and_handlers(self):
+        self.assertClean('<p onclick="x()">Hola<script>alert(1)</script></p>', '<p>Hola</p>')
+        self.assertClean('<a href=" java\tscript:alert(1)">x</a>', '<a>x</a>')
+        self.assertClean('<img src="data:text/html,x" alt="a">', '<img alt="a">')
+        self.assertClean('<marquee><b>texto</b></marquee>', '<b>texto</b>')
+
+    def test_balances_and_escapes(self):
+        self.assertClean('<p><b>uno<i>dos</p>tres', '<p><b>uno<i>dos</i></b></p>tres')
+        self.assertClean('1 < 2 & "x"', '1 &lt; 2 &amp; "x"')
+
+    def test_new_tab_links(self):
+        self.assertClean(
+            '<a href="https://example.com" target="_blank" rel="opener">x</a>',
+            '<a rel="noopener noreferrer" href="https://example.com" target="_blank">x</a>'
+        )
+
+    def test_styles_and_ids(self):
+        self.assertClean(
+            '<span id="nota" style="font-size: 14pt; font-family: \'Times New Roman\', serif; '
+            'background: url(x); position: fixed">x</span>',
+            '<span id="nota" style="font-size: 14pt; font-family: &#x27;Times New Roman&#x27;, serif">x</span>'
+        )
+
+    def test_embeds(self):
+        self.assertClean(
+            '<iframe src="https://www.youtube.com/embed/abc" width="560" allowfullscreen="allowfullscreen" '
+            'onload="x()">alternativo</iframe>',
+            '<iframe src="https://www.youtube.com/embed/abc" width="560" allowfullscreen></iframe>'
+        )
+        self.assertClean('<iframe src="//player.vimeo.com/video/1"></iframe>', '<iframe src="//player.vimeo.com/video/1"></iframe>')
+        self.assertClean('<p>a<iframe src="https://evil.example/embed">b</iframe>c</p>', '<p>ac</p>')
+        self.assertClean('<iframe src="http://www.youtube.com/embed/abc"></iframe>', '')
+
+    def test_video(self):
+        self.assertClean(
+            '<video controls="controls" width="400" poster="javascript:x"><source src="/media/v.mp4" type="video/mp4" /></video>',
+            '<video controls width="400"><source src="/media/v.mp4" type="video/mp4"></video>'
+        )
+
+    def test_nesting_limit(self):
+        html = sanitize_html('<div>' * 150 + 'x')
+        self.assertEqual(html.count('<div>'), 100)
+        self.assertEqual(html.count('</div>'), 100)
+
+
+class LayoutSchemaTests(SimpleTestCase):
+    """Límites y limpieza del validador de layouts"""
+
+    def setUp(self):
+        self.schema = LayoutSchema(max_bytes=1000, max_rows=3, max_cells=2, max_cell_length=200, max_depth=6)
+
+    def assertInvalid(self, layout):
+        with self.assertRaises(ValueError):
+            self.schema.validate_layout(layout)
+
+    def test_cleans_content(self):
+        layout = [{'cells': [
+            {'type': 'text', 'content': '<p>Hola<script>x</script></p>'},
+            {'type': 'image', 'content': ' /media/a.jpg '},
+        ], 'align': 'left'}]
+        self.schema.validate_layout(layout)
+        self.assertEqual([cell['content'] for cell in layout[0]['cells']], ['<p>Hola</p>', '/media/a.jpg'])
+
+    def test_structure(self):
+        self.assertInvalid({'cells': []})
+        self.assertInvalid([{'cells': 'x'}])
+        self.assertInvalid([{'cells': [{'type': 'text'}]}])
+        self.assertInvalid([{'cells': [{'type': 'script', 'content': ''}]}])
+        self.assertInvalid([{'cells': [{'type': 'text', 'content': 1}]}])
+        self.assertInvalid([{'cells': [{'type': 'image', 'content': 'javascript:alert(1)'}]}])
+
+    def test_limits(self):
+        self.assertInvalid([{'cells': []}] * 4)
+        self.assertInvalid([{'cells': [{'type': 'text', 'content': ''}] * 3}])
+        self.assertInvalid([{'cells': [{'type': 'text', 'content': 'x' * 201}]}])
+        self.assertInvalid([{'cells': [{'type': 'text', 'content': 'x' * 200}] * 2}] * 3)
+        self.assertInvalid([{'cells': [], 'options': [[[[[1]]]]]}])
+        self.schema.validate_layout([{'cells': [], 'options': [[1]]}])
+
+
+class SanitizeLayoutsMigrationTests(TestCase):
+    """La migración 0015 sanea los layouts ya guardados sin perder el formato del editor"""
+
+    def test_sanitizes_stored_layouts(self):
+        publication = Publication.objects.create(
+            title='Publicación', section=Section.objects.create(title='Noticias'),
+            publish_date=timezone.now(), featured_image='publications/test.jpg',
+            layout=[{'cells': [{'type': 'text', 'content': '<p>Hola</p>'}]}],
+        )
+        embed = '<iframe src="https://www.youtube.com/embed/abc" allowfullscreen></iframe>'
+        raw = f'<p style="font-size: 14pt" onclick="x()">Hola<script>robar()</script></p>{embed}'
+        Publication.objects.filter(pk=publication.pk).update(layout=[{'cells': [{'type': 'text', 'content': raw}]}])
+
+        migration = importlib.import_module('content.migrations.0015_sanitize_layouts')
+        migration.sanitize_layouts(apps, None)
+
+        publication.refresh_from_db()
+        clean = f'<p style="font-size: 14pt">Hola</p>{embed}'
+        self.assertEqual(publication.layout[0]['cells'][0]['content'], clean)
+        self.assertEqual(publication.excerpt, 'Hola')
+        row = publication.layout_rows.get(position=0)
+        self.assertEqual((row.data, row.digest), (publication.layout[0], PublicationRow.make_digest(publication.layout[0])))
+
+
+class LayoutPatchTests(TestCase):
+    """Edición del layout con JSON Patch y escrituras condicionales por versión"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(username='editor', password='x', is_staff=True)
+        )
+        self.publication = Publication.objects.create(
+            title='Publicación', section=Section.objects.create(title='Noticias'),
+            publish_date=timezone.now(), featured_image='publications/test.jpg',
+            layout=[
+                {'cells': [{'type': 'text', 'content': '<p>Uno</p>'}], 'align': 'left'},
+                {'cells': [{'type': 'text', 'content': '<p>Dos</p>'}]},
+            ],
+        )
+        self.url = f'/api/publications/{self.publication.pk}/patch_layout/'
+
+    def patch(self, operations, version=None, **extra):
+        data = {'operations': operations}
+        if version is not None:
+            data['version'] = version
+        return self.client.patch(self.url, data, format='json', **extra)
+
+    def version(self):
+        self.publication.refresh_from_db()
+        return layout_version(self.publication)
+
+    def test_missing_version(self):
+        response = self.patch([{'op': 'remove', 'path': '/1'}])
+        self.assertEqual(response.status_code, 428)
+
+    def test_stale_version(self):
+        stale = self.version()
+        self.assertEqual(self.patch([{'op': 'remove', 'path': '/1'}], stale).status_code, 200)
+        response = self.patch([{'op': 'remove', 'path': '/0'}], stale)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['version'], self.version())
+        response = self.patch([{'op': 'remove', 'path': '/0'}], HTTP_IF_MATCH=f'"{stale}"')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(len(self.publication.layout), 1)
+
+    def test_operations(self):
+        steps = [
+            ({'op': 'add', 'path': '/-', 'value': {'cells': [{'type': 'text', 'content': '<p>Tres</p>'}]}},
+             ['<p>Uno</p>', '<p>Dos</p>', '<p>Tres</p>']),
+            ({'op': 'replace', 'path': '/1/cells/0/content', 'value': '<p>Dos <script>x</script></p>'},
+             ['<p>Uno</p>', '<p>Dos </p>', '<p>Tres</p>']),
+            ({'op': 'move', 'from': '/2', 'path': '/0'},
+             ['<p>Tres</p>', '<p>Uno</p>', '<p>Dos </p>']),
+            ({'op': 'remove', 'path': '/0'},
+             ['<p>Uno</p>', '<p>Dos </p>']),
+        ]
+        for operation, contents in steps:
+            response = self.patch([operation], self.version())
+            self.assertEqual(response.status_code, 200, operation)
+            self.assertEqual(response['ETag'], f'"{response.json()["version"]}"')
+            self.publication.refresh_from_db()
+            self.assertEqual([row['cells'][0]['content'] for row in self.publication.layout], contents)
+            self.assertEqual(self.publication.row_count, len(contents))
+
+        self.assertEqual(self.patch([{'op': 'remove', 'path': '/0/align'}], self.version()).status_code, 200)
+        self.publication.refresh_from_db()
+        self.assertNotIn('align', self.publication.layout[0])
+
+    def test_total_size(self):
+        schema = LayoutSchema(max_bytes=200, max_rows=500, max_cells=12, max_cell_length=200, max_depth=8)
+        operation = {'op': 'add', 'path': '/-', 'value': {'cells': [{'type': 'text', 'content': 'x' * 150}]}}
+        with mock.patch('content.utils.layout_patch.get_schema', return_value=schema):
+            response = self.patch([operation], self.version())
+        self.assertEqual(response.status_code, 400)
+        self.publication.refresh_from_db()
+        self.assertEqual(len(self.publication.layout), 2)
+
+    def test_cell_limit_per_row(self):
+        cell = {'type': 'text', 'content': '<p>Celda</p>'}
+        response = self.patch([{'op': 'add', 'path': '/0/cells/-', 'value': dict(cell)} for _ in range(20)], self.version())
+        self.assertEqual(response.status_code, 400)
+        # Fila llena (12 celdas) a la que se mueve una celda de otra fila
+        full = [{'op': 'add', 'path': '/0/cells/-', 'value': dict(cell)} for _ in range(11)]
+        self.assertEqual(self.patch(full, self.version()).status_code, 200)
+        response = self.patch([{'op': 'move', 'from': '/1/cells/0', 'path': '/0/cells/0'}], self.version())
+        self.assertEqual(response.status_code, 400)
+        self.publication.refresh_from_db()
+        self.assertEqual([len(row['cells']) for row in self.publication.layout], [12, 1])
+
+    def assertDerivedDataMatchesLayout(self):
+        """Lo actualizado con las filas del parche es igual a recalcularlo con el documento"""
+        publication = Publication.objects.get(pk=self.publication.pk)
+        layout = publication.layout
+        summary = summarize_layout(layout)
+        self.assertEqual({field: getattr(publication, field) for field in summary}, summary)
+        self.assertEqual(publication.layout_size, json_size(layout))
+        self.assertEqual(
+            dict(publication.search_terms.values_list('term', 'weight')),
+            dict(term_weights(publication.title, layout))
+        )
+        self.assertEqual(set(publication.asset_refs.values_list('path', flat=True)), publication.media_paths())
+        self.assertEqual(
+            list(publication.layout_rows.values_list('position', 'data', 'digest')),
+            [(position, row, PublicationRow.make_digest(row)) for position, row in enumerate(layout)]
+        )
+
+    def test_incremental_sync(self):
+        image = {'type': 'image', 'content': '/media/assets/aa/foto.jpg'}
+        steps = [
+            [{'op': 'replace', 'path': '/0/cells/0/content', 'value': '<p>Uno nuevo <img src="/media/assets/bb/x.png"></p>'}],
+            [{'op': 'add', 'path': '/1', 'value': {'cells': [dict(image), {'type': 'text', 'content': '<p>Dos dos</p>'}]}}],
+            [{'op': 'add', 'path': '/-', 'value': {'cells': [dict(image)]}}],
+            [{'op': 'move', 'from': '/2', 'path': '/0'}],
+            [{'op': 'remove', 'path': '/1'}],
+            [{'op': 'move', 'from': '/0/cells/0', 'path': '/2/cells/-'}, {'op': 'remove', 'path': '/2/cells/0'}],
+            [{'op': 'replace', 'path': '/0', 'value': {'cells': [{'type': 'text', 'content': '<p>Tres</p>'}]}}],
+            [{'op': 'add', 'path': '/0/align', 'value': 'center'}, {'op': 'replace', 'path': '/0/align', 'value': 'right'}],
+        ]
+        for operations in steps:
+            response = self.patch(operations, self.version())
+            self.assertEqual(response.status_code, 200, operations)
+            self.assertDerivedDataMatchesLayout()
+
+    def test_patch_cost_independent_of_layout_size(self):
+        costs = []
+        for size in (10, 300):
+            self.publication.layout = [
+                {'cells': [{'type': 'text', 'content': '<p>' + f'palabra{i} ' * 60 + '</p>'}]} for i in range(size)
+            ]
+            self.publication.save()
+            # El primer parche tras un guardado completo calcula el tamaño del documento
+            self.patch([{'op': 'replace', 'path': '/1/cells/0/content', 'value': '<p>Inicio</p>'}], self.version())
+            version = self.version()
+            with mock.patch('content.utils.layout.html_to_text', wraps=html_to_text) as to_text, \
+                    mock.patch.object(PublicationRow, 'make_digest', wraps=PublicationRow.make_digest) as digest, \
+                    CaptureQueriesContext(connection) as queries:
+                operation = {'op': 'replace', 'path': '/5/cells/0/content', 'value': '<p>Texto editado</p>'}
+                self.assertEqual(self.patch([operation], version).status_code, 200)
+            costs.append((len(queries), to_text.call_count, digest.call_count))
+            self.assertDerivedDataMatchesLayout()
+        self.assertEqual(costs[0], costs[1])
+
+    def test_invalid_operation(self):
+        response = self.patch([{'op': 'remove', 'path': '/0/cells/0/content'}], self.version())
+        self.assertEqual(response.status_code, 400)
+
+    def test_update_layout_stale_version(self):
+        url = f'/api/publications/{self.publication.pk}/update_layout/'
+        stale = self.version()
+        self.assertEqual(self.patch([{'op': 'remove', 'path': '/1'}], stale).status_code, 200)
+        response = self.client.patch(url, {'layout': [{'cells': []}], 'version': stale}, format='json')
+        self.assertEqual(response.status_code, 409)
+        response = self.client.patch(url, {'layout': [{'cells': []}], 'version': self.version()}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+class OrderingTests(TestCase):
+    """Reordenamiento y movimiento con orden disperso (huecos de ORDER_GAP)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(username='editor', password='x', is_staff=True)
+        )
+
+    def biographies(self, *orders):
+        return [
+            Biography.objects.create(name=f'Persona {i}', order=order).pk
+            for i, order in enumerate(orders)
+        ]
+
+    def orders(self):
+        return list(Biography.objects.order_by('order', 'name').values_list('pk', 'order'))
+
+    def move(self, pk, after=None, url='/api/biographies/move/'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(url, {'id': pk, 'after': after}, format='json')
+
+    def test_move_uses_the_gap(self):
+        a, b, c = self.biographies(ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP)
+        version = get_version('biographies')
+        response = self.move(c, after=a)
+        self.assertEqual(response.json(), {'status': 'ok', 'updated': 1})
+        self.assertEqual(self.orders(), [(a, ORDER_GAP), (c, ORDER_GAP + ORDER_GAP // 2), (b, 2 * ORDER_GAP)])
+        self.assertNotEqual(get_version('biographies'), version)
+
+        response = self.move(b)
+        self.assertEqual(response.json()['updated'], 1)
+        self.assertEqual([pk for pk, _ in self.orders()], [b, a, c])
+
+    def test_move_renumbers_without_gap(self):
+        a, b, c = self.biographies(1, 2, 3)
+        response = self.move(c, after=a)
+        self.assertEqual(response.json()['updated'], 3)
+        self.assertEqual(self.orders(), [(a, ORDER_GAP), (c, 2 * ORDER_GAP), (b, 3 * ORDER_GAP)])
+
+    def test_reorder(self):
+        a, b = self.biographies(ORDER_GAP, 2 * ORDER_GAP)
+        version = get_version('biographies')
+        data = [{'id': a, 'order': 2 * ORDER_GAP}, {'id': b, 'order': ORDER_GAP}]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/biographies/reorder/', data, format='json')
+        self.assertEqual(response.json()['updated'], 2)
+        self.assertEqual([pk for pk, _ in self.orders()], [b, a])
+        self.assertNotEqual(get_version('biographies'), version)
+
+        # Sin cambios: no se escribe ni se invalida la caché
+        version = get_version('biographies')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/biographies/reorder/', data, format='json')
+        self.assertEqual(response.json()['updated'], 0)
+        self.assertEqual(get_version('biographies'), version)
+
+    def test_unknown_ids(self):
+        a, = self.biographies(ORDER_GAP)
+        section = Section.objects.create(title='Noticias').pk
+        for url, pk in (('/api/biographies/', a), ('/api/sections/', section)):
+            with self.subTest(url=url):
+                self.assertEqual(self.move(pk + 100, url=url + 'move/').status_code, 400)
+                self.assertEqual(self.move(pk, after=pk + 100, url=url + 'move/').status_code, 400)
+                response = self.client.patch(url + 'reorder/', [{'id': pk + 100, 'order': 1}], format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.orders(), [(a, ORDER_GAP)])
+
+
+class SnapshotTests(TestCase):
+    """export_snapshot regenera solo los archivos cuyas dependencias cambiaron"""
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.news = Section.objects.create(title='Noticias')
+            culture = Section.objects.create(title='Cultura')
+            self.publications = [
+                Publication.objects.create(
+                    title=f'Publicación {i}', section=section, status='published',
+                    publish_date=timezone.now() - timedelta(days=i), featured_image='publications/test.jpg',
+                    layout=[{'cells': [{'type': 'text', 'content': f'<p>Texto {i}</p>'}]}],
+                )
+                for i, section in enumerate((self.news, self.news, culture))
+            ]
+            Biography.objects.create(name='Autora')
+
+    def build(self):
+        # Se envejecen los archivos para reconocer los que se reescriben
+        old = time.time() - 3600
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                os.utime(os.path.join(directory, name), (old, old))
+        builder = SnapshotBuilder(root=self.root, base_url='https://ejemplo.cl')
+        result = builder.build()
+        rewritten = set()
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                if os.path.getmtime(path) > old and name.endswith('.json') and name != MANIFEST_NAME:
+                    rewritten.add(os.path.relpath(path, self.root))
+        return result, rewritten
+
+    def read(self, path):
+        with open(os.path.join(self.root, path), encoding='utf-8') as fp:
+            return json.load(fp)
+
+    def test_incremental_rebuild(self):
+        (written, unchanged, removed), rewritten = self.build()
+        self.assertEqual((written, unchanged, removed), (len(rewritten), 0, 0))
+        self.assertEqual(len(rewritten), 10)
+
+        self.assertEqual(self.build(), ((0, 10, 0), set()))
+
+        edited, _, moved_out = self.publications
+        with self.captureOnCommitCallbacks(execute=True):
+            edited.title = 'Título nuevo'
+            edited.save()
+        (written, unchanged, removed), rewritten = self.build()
+        self.assertEqual(rewritten, {
+            'home.json',
+            'publications/all/1.json',
+            f'publications/section/{self.news.slug}/1.json',
+            f'publication/{edited.pk}.json',
+        })
+        self.assertEqual((written, unchanged, removed), (4, 6, 0))
+        self.assertEqual(self.read(f'publication/{edited.pk}.json')['title'], 'Título nuevo')
+
+        # Al despublicar se elimina su archivo (y sus versiones comprimidas)
+        with self.captureOnCommitCallbacks(execute=True):
+            moved_out.status = 'draft'
+            moved_out.save()
+        (written, unchanged, removed), rewritten = self.build()
+        self.assertEqual(removed, 1)
+        self.assertFalse(any(
+            name.startswith(f'{moved_out.pk}.json')
+            for name in os.listdir(os.path.join(self.root, 'publication'))
+        ))
+        self.assertNotIn(f'publication/{edited.pk}.json', rewritten)
+
+
+@override_settings(IMAGE_VARIANT_WIDTHS=[320, 640, 1024], IMAGE_VARIANT_FORMATS=['webp'])
+class ImageUploadTests(TestCase):
+    """Subida de imágenes: derivados responsivos y almacén por contenido"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(username='editor', password='x', is_staff=True)
+        )
+
+    def upload(self, image_format='JPEG', size=(1200, 900), color=(120, 60, 30), query=''):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color).save(buffer, image_format)
+        image_file = SimpleUploadedFile(
+            f'foto.{image_format.lower()}', buffer.getvalue(), content_type=f'image/{image_format.lower()}'
+        )
+        return self.client.post(f'/api/upload-image/{query}', {'image': image_file}, format='multipart')
+
+    def test_variants_manifest(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 200)
+        variants = response.json()['variants']
+        self.assertEqual(
+            [(variant['format'], variant['width'], variant['height']) for variant in variants],
+            [('jpeg', 320, 240), ('jpeg', 640, 480), ('jpeg', 1024, 768), ('jpeg', 1200, 900),
+             ('webp', 320, 240), ('webp', 640, 480), ('webp', 1024, 768)]
+        )
+        self.assertEqual(response.json()['url'], variants[3]['url'])
+        for variant in variants:
+            path = os.path.join(self.media_root, variant['url'].split(settings.MEDIA_URL, 1)[1])
+            self.assertEqual(os.path.getsize(path), variant['bytes'])
+            with Image.open(path) as image:
+                self.assertEqual((image.format.lower(), image.size), (variant['format'], (variant['width'], variant['height'])))
+        self.assertEqual(MediaAsset.objects.get().variants[3]['path'], MediaAsset.objects.get().path)
+
+    def test_identical_uploads_share_one_asset(self):
+        process_image = ImageHandler.process_image
+        with mock.patch.object(ImageHandler, 'process_image', autospec=True, side_effect=process_image) as processed:
+            first, second = self.upload().json(), self.upload().json()
+            # Mismo contenido subido como imagen destacada de una publicación
+            buffer = io.BytesIO()
+            Image.new('RGB', (1200, 900), (120, 60, 30)).save(buffer, 'JPEG')
+            publication = Publication.objects.create(
+                title='Publicación', section=Section.objects.create(title='Noticias'),
+                publish_date=timezone.now(),
+                featured_image=SimpleUploadedFile('otra.jpg', buffer.getvalue(), content_type='image/jpeg'),
+            )
+        self.assertEqual(processed.call_count, 1)
+        asset = MediaAsset.objects.get()
+        self.assertEqual(first, second)
+        self.assertEqual(publication.featured_image.name, asset.path)
+        self.assertEqual(publication.featured_image_variants, asset.variants)
+        # Otro contenido: otra imagen
+        self.upload(color=(1, 2, 3))
+        self.assertEqual(MediaAsset.objects.count(), 2)
+
+    def test_small_and_gif_images(self):
+        # Más angosta que todos los anchos: un solo derivado por formato, a su ancho
+        variants = self.upload(size=(300, 300)).json()['variants']
+        self.assertEqual([(variant['format'], variant['width']) for variant in variants], [('jpeg', 300), ('webp', 300)])
+        # Los GIF se sirven tal cual
+        variants = self.upload('GIF', color=(1, 2, 3)).json()['variants']
+        self.assertEqual([(variant['format'], variant['width']) for variant in variants], [('gif', 1200)])
+
+
+class ImageJobTests(TransactionTestCase):
+    """Procesamiento en segundo plano (?async=1) y consulta del estado del trabajo"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(username='editor', password='x', is_staff=True)
+        )
+
+    def upload(self, truncate=0):
+        buffer = io.BytesIO()
+        Image.new('RGB', (640, 480), (120, 60, 30)).save(buffer, 'JPEG')
+        content = buffer.getvalue()
+        if truncate:
+            content = content[:-truncate]
+        image_file = SimpleUploadedFile('foto.jpg', content, content_type='image/jpeg')
+        return self.client.post('/api/upload-image/?async=1', {'image': image_file}, format='multipart')
+
+    def wait(self, status_url):
+        # El trabajo corre en el pool de hilos del proceso
+        deadline = time.monotonic() + 10
+        while True:
+            data = self.client.get(status_url).json()
+            if data['status'] not in ('pending', 'processing') or time.monotonic() > deadline:
+                return data
+            time.sleep(0.02)
+
+    def test_async_upload(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertIn(f"{settings.MEDIA_URL}{settings.UPLOAD_PATHS['temp']}", job['url'])
+
+        data = self.wait(job['status_url'])
+        self.assertEqual(data['status'], 'done')
+        asset = MediaAsset.objects.get()
+        self.assertEqual(data['url'], f'http://testserver{settings.MEDIA_URL}{asset.path}')
+        self.assertEqual(len(data['variants']), len(asset.variants))
+
+        # Ya almacenada: se responde directamente, sin trabajo
+        response = self.upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['url'], data['url'])
+
+    def test_failed_job(self):
+        response = self.upload(truncate=200)
+        self.assertEqual(response.status_code, 202)
+        data = self.wait(response.json()['status_url'])
+        self.assertEqual(data['status'], 'error')
+        self.assertIn('dañada o incompleta', data['error'])
+        # Sigue disponible la imagen sin procesar
+        self.assertEqual(data['url'], response.json()['url'])
+        self.assertFalse(MediaAsset.objects.exists())
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get('/api/upload-image/desconocido/').status_code, 404)
+
+
+class SearchTests(TestCase):
+    """Búsqueda pública: orden por términos encontrados, peso × idf y id"""
+
+    def setUp(self):
+        self.news = Section.objects.create(title='Noticias')
+        self.other = Section.objects.create(title='Cultura')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.both = self.create('Energía solar', 'Una planta de energía.')
+            self.older_body = self.create('Paneles', 'Solar, solar y más solar.')
+            self.title = self.create('Solar', 'Un techo nuevo.')
+            self.newer_body = self.create('Techos', 'Solar, solar y más solar.')
+            self.create('Eólica', 'Viento en el sur.')
+            self.create('Energía solar', 'Borrador solar.', status='draft')
+            self.in_other = self.create('Museo solar', '', section=self.other)
+
+    def create(self, title, text, status='published', section=None):
+        return Publication.objects.create(
+            title=title, section=section or self.news, status=status,
+            publish_date=timezone.now(), featured_image='publications/test.jpg',
+            layout=[{'cells': [{'type': 'text', 'content': f'<p>{text}</p>'}]}],
+        ).pk
+
+    def search(self, **params):
+        response = self.client.get('/api/public/publications/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['results']]
+
+    def test_ranking(self):
+        # Primero la que tiene los dos términos; luego el título (peso 5) sobre
+        # tres apariciones en el cuerpo; a igual puntaje, la más nueva
+        self.assertEqual(
+            self.search(q='energía solar'),
+            [self.both, self.in_other, self.title, self.newer_body, self.older_body]
+        )
+        # Sin tildes ni mayúsculas
+        self.assertEqual(self.search(q='ENERGIA Solar'), self.search(q='energía solar'))
+        self.assertEqual(
+            self.search(q='energía solar', section_slug=self.news.slug),
+            [self.both, self.title, self.newer_body, self.older_body]
+        )
+
+    def test_query_without_terms(self):
+        response = self.client.get('/api/public/publications/search/', {'q': 'de la'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ImageValidationTests(TestCase):
+    """Los archivos truncados se rechazan en la única decodificación (decode)"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+
+    def upload(self, image_format, content_type, truncate=0):
+        buffer = io.BytesIO()
+        Image.new('RGB', (640, 480), (120, 60, 30)).save(buffer, image_format)
+        content = buffer.getvalue()
+        if truncate:
+            content = content[:-truncate]
+        return SimpleUploadedFile(f'foto.{image_format.lower()}', content, content_type=content_type)
+
+    def test_valid_image_is_processed(self):
+        handler = ImageHandler(self.upload('JPEG', 'image/jpeg'), directory='test')
+        self.assertTrue(handler.validate())
+        self.assertEqual(handler.process_image('foto.jpg'), 'test/foto.jpg')
+
+    def test_truncated_images_are_rejected(self):
+        cases = (
+            ('JPEG', 'image/jpeg', (1920, 1080)),
+            # Más grande que el tamaño final: se decodifica reducida (draft)
+            ('JPEG', 'image/jpeg', (320, 240)),
+            ('PNG', 'image/png', (1920, 1080)),
+        )
+        for image_format, content_type, max_size in cases:
+            with self.subTest(image_format=image_format, max_size=max_size):
+                handler = ImageHandler(
+                    self.upload(image_format, content_type, truncate=200),
+                    directory='test',
+                    max_size=max_size
+                )
+                # La validación solo lee la cabecera
+                self.assertTrue(handler.validate())
+                with self.assertRaisesMessage(ValueError, 'dañada o incompleta'):
+                    handler.process_image(f'foto.{image_format.lower()}')
+                self.assertEqual(os.listdir(os.path.join(self.media_root, 'test')), [])
+
+    def test_truncated_upload_returns_400(self):
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(username='editor', password='x', is_staff=True)
+        )
+        response = client.post(
+            '/api/upload-image/',
+            {'image': self.upload('JPEG', 'image/jpeg', truncate=200)},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('dañada o incompleta', response.json()['error'])
+
+
+class ImporterTests(TestCase):
+    """Importación masiva desde NDJSON con un directorio de imágenes"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        images = tempfile.TemporaryDirectory()
+        self.addCleanup(images.cleanup)
+        self.images = images.name
+        for name, color, size in (('portada.jpg', (200, 30, 30), (640, 480)),
+                                  ('foto.png', (30, 200, 30), (400, 300)),
+                                  ('mini.jpg', (30, 30, 200), (100, 100))):
+            Image.new('RGB', size, color).save(os.path.join(self.images, name))
+        self.news = Section.objects.create(title='Noticias')
+
+    def publication(self, title, **item):
+        return {
+            'type': 'publication', 'title': title, 'section': 'noticias', 'status': 'published',
+            'publish_date': '2024-05-01T10:00:00+00:00', 'featured_image': 'portada.jpg',
+            'layout': [
+                {'cells': [{'type': 'text', 'content': '<p onclick="x()">Hola mundo<script>alert(1)</script></p>'}]},
+                {'cells': [{'type': 'image', 'content': 'foto.png'}]},
+            ],
+            **item,
+        }
+
+    def run_import(self, *items):
+        path = os.path.join(self.images, 'datos.ndjson')
+        with open(path, 'w', encoding='utf-8') as fp:
+            fp.write('\n'.join(json.dumps(item) for item in items))
+        return call_command('import_content', path, images=self.images, stdout=io.StringIO())
+
+    def items(self):
+        return [
+            {'type': 'section', 'title': 'Cultura', 'is_active': False},
+            self.publication('Uno'),
+            self.publication('Dos', section='Cultura', is_featured=True),
+        ]
+
+    def test_import(self):
+        # Publicación previa: sus filas derivadas no se tocan
+        previous = Publication.objects.create(
+            title='Previa', section=self.news, publish_date=timezone.now(),
+            featured_image='publications/test.jpg', layout=[{'cells': []}],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_import(*self.items())
+
+        imported = Publication.objects.exclude(pk=previous.pk)
+        self.assertEqual(imported.count(), 2)
+        self.assertFalse(Section.objects.get(title='Cultura').is_active)
+        self.assertEqual(MediaAsset.objects.count(), 2)
+        self.assertEqual(PublicationRow.objects.filter(publication__in=imported).count(), 4)
+        self.assertEqual(PublicationRow.objects.filter(publication=previous).count(), 1)
+        self.assertEqual(PublicationAsset.objects.filter(publication__in=imported).count(), 4)
+        for publication in imported:
+            text, image = [row['cells'][0]['content'] for row in publication.layout]
+            self.assertEqual(text, '<p>Hola mundo</p>')
+            self.assertEqual(publication.excerpt, 'Hola mundo')
+            self.assertEqual(image, settings.MEDIA_URL + MediaAsset.objects.get(path__endswith='.png').path)
+            self.assertEqual(publication.row_count, 2)
+            self.assertTrue(PublicationTerm.objects.filter(publication=publication, term='hola').exists())
+        self.assertEqual(Section.objects.get(title='Cultura').published_count, 1)
+
+    def test_import_without_bulk_insert_ids(self):
+        # MySQL: bulk_create no devuelve los id, se inserta fila por fila
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.run_import(*self.items())
+        self.assertEqual(len(callbacks), 1)  # una sola invalidación de la caché
+        self.assertEqual(PublicationRow.objects.count(), 4)
+        self.assertEqual(PublicationTerm.objects.values('publication').distinct().count(), 2)
+
+    def test_import_is_idempotent(self):
+        self.run_import(*self.items())
+        counts = [model.objects.count() for model in (Section, Publication, PublicationRow, PublicationTerm, MediaAsset)]
+        importer = ContentImporter(DirectoryImageSource(self.images))
+        result = importer.run(json.dumps(item) for item in self.items())
+        self.assertEqual(
+            (result['sections'], result['publications'], result['publications_skipped'], result['images_processed']),
+            (0, 0, 2, 0)
+        )
+        self.assertEqual(
+            [model.objects.count() for model in (Section, Publication, PublicationRow, PublicationTerm, MediaAsset)],
+            counts
+        )
+
+    def test_invalid_items_abort_the_import(self):
+        cases = (
+            ({'type': 'section', 'title': 'Cultura', 'is_active': 'false'}, 'is_active debe ser true o false'),
+            (self.publication('Uno', is_featured=1), 'is_featured debe ser true o false'),
+            (self.publication('Uno', featured_image='mini.jpg'), 'demasiado pequeña'),
+        )
+        importer = ContentImporter(DirectoryImageSource(self.images))
+        for item, message in cases:
+            with self.subTest(message=message):
+                with self.assertRaises(ImportValidationError) as context:
+                    importer.run([json.dumps(item)])
+                self.assertIn(message, '\n'.join(context.exception.errors))
+        self.assertFalse(Publication.objects.exists())
+        self.assertFalse(MediaAsset.objects.exists())
+
+
+class GcMediaTests(TestCase):
+    """gc_media elimina solo los archivos sin referencias y fuera del período de gracia"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        old = time.time() - 48 * 3600
+        for path in self.files():
+            full_path = os.path.join(self.media_root, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'wb') as fp:
+                fp.write(b'x' * 10)
+            if not path.startswith('uploads/temp/'):
+                os.utime(full_path, (old, old))
+
+        Publication.objects.create(
+            title='Publicación', section=Section.objects.create(title='Noticias'),
+            publish_date=timezone.now(), featured_image='assets/ab/portada.jpg',
+            layout=[{'cells': [{'type': 'text', 'content': '<p><img src="/media/assets/cd/inline.png"></p>'}]}],
+        )
+        Biography.objects.create(name='Autora', photo='biographys/autora.jpg')
+        MediaAsset.objects.create(sha256='1' * 64, path='assets/ef/huerfana.jpg')
+        MediaAsset.objects.create(sha256='2' * 64, path='assets/ef/reciente.jpg')
+        MediaAsset.objects.filter(path='assets/ef/huerfana.jpg').update(updated_at=timezone.now() - timedelta(days=2))
+        self.orphans = {'assets/ef/huerfana.jpg', 'assets/ef/huerfana_w320.webp', 'publications/vieja.jpg'}
+
+    def files(self):
+        return [
+            'assets/ab/portada.jpg',
+            # Derivado de una imagen referenciada
+            'assets/ab/portada_w320.webp',
+            'assets/cd/inline.png',
+            'biographys/autora.jpg',
+            # Sin referencias, pero su MediaAsset se usó hace poco
+            'assets/ef/reciente.jpg',
+            # Dentro del período de gracia (archivo reciente)
+            'uploads/temp/nueva.jpg',
+            'assets/ef/huerfana.jpg',
+            'assets/ef/huerfana_w320.webp',
+            'publications/vieja.jpg',
+        ]
+
+    def remaining(self):
+        return {path for path in self.files() if os.path.exists(os.path.join(self.media_root, path))}
+
+    def test_removes_orphans(self):
+        call_command('gc_media', stdout=io.StringIO())
+        self.assertEqual(self.remaining(), set(self.files()) - self.orphans)
+        self.assertEqual(list(MediaAsset.objects.values_list('path', flat=True)), ['assets/ef/reciente.jpg'])
+
+    def test_dry_run_removes_nothing(self):
+        out = io.StringIO()
+        call_command('gc_media', dry_run=True, stdout=out)
+        self.assertEqual(self.remaining(), set(self.files()))
+        self.assertEqual(MediaAsset.objects.count(), 2)
+        self.assertEqual(
+            {line.removeprefix('[dry-run] ') for line in out.getvalue().splitlines() if line.startswith('[dry-run]')},
+            self.orphans
+        )
+
+
+class MetricsFilesTests(SimpleTestCase):
+    """Archivos de métricas por worker en METRICS_DIR"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.enterContext(override_settings(METRICS_DIR=self.directory))
+
+    def test_only_serving_processes_flush(self):
+        registry = Registry()
+        registry.inc('http_requests_total', route='/x')
+        registry.flush(force=True)
+        self.assertEqual(os.listdir(self.directory), [])
+        registry.mark_serving()
+        registry.flush(force=True)
+        self.assertEqual(os.listdir(self.directory), [registry.filename])
+
+    def test_dead_workers_are_merged(self):
+        # pid de un proceso que ya terminó
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        for start in (1, 2):
+            with open(os.path.join(self.directory, f'{process.pid}-{start}.json'), 'w') as fp:
+                json.dump({
+                    'counters': [['http_requests_total', [['route', '/x']], 3]],
+                    'histograms': [['db_queries_per_request', [['route', '/x']], [1, 2, 0, 0, 0, 0, 0, 0, 0], 2.0, 3]],
+                }, fp)
+
+        for _ in range(2):
+            counters, histograms = collect()
+            key = ('http_requests_total', (('route', '/x'),))
+            self.assertEqual(counters[key], 6)
+            entry = histograms[('db_queries_per_request', (('route', '/x'),))]
+            self.assertEqual((entry['buckets'][:2], entry['count']), ([2, 4], 6))
+        # Queda el consolidado (y el archivo de este proceso, que sigue vivo)
+        files = {name for name in os.listdir(self.directory) if name.endswith('.json')}
+        self.assertEqual(files - {registry.filename}, {'merged.json'})
+
+
+class StaticCompressionTests(SimpleTestCase):
+    """Los estáticos se sirven con las versiones que genera `precompress`"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(STATIC_ROOT=directory.name))
+        with open(os.path.join(directory.name, 'app.js'), 'w') as fp:
+            fp.write('console.log("hola");\n' * 100)
+        call_command('precompress', stdout=io.StringIO())
+
+    def get(self, accept_encoding):
+        middleware = WhiteNoiseMiddleware(lambda request: HttpResponse(status=404))
+        response = middleware(RequestFactory().get('/static/app.js', HTTP_ACCEPT_ENCODING=accept_encoding))
+        body = b''.join(response.streaming_content)
+        response.close()
+        return response, body
+
+    def test_precompressed_variants_are_served(self):
+        for encoding in available_encodings():
+            with self.subTest(encoding=encoding):
+                response, body = self.get(encoding)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Encoding'], encoding)
+                self.assertIn('Accept-Encoding', response['Vary'])
+                path = os.path.join(settings.STATIC_ROOT, 'app.js' + SUFFIXES[encoding])
+                with open(path, 'rb') as fp:
+                    self.assertEqual(body, fp.read())
+
+        response, body = self.get('identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(body, b'console.log("hola");\n' * 100)
@@ -1,6 +1,6 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
-from .views import SectionViewSet, PublicationViewSet, BiographyViewSet, ImageUploadView
+from .views import SectionViewSet, PublicationViewSet, BiographyViewSet, ImageUploadView, ImageJobStatusView, ContentImportView, MetricsView
 
 router = DefaultRouter()
 router.register(r'sections', SectionViewSet)
@@ -10,6 +10,9 @@ router.register(r'biographies', BiographyViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('upload-image/', ImageUploadView.as_view(), name='upload-image'),
+    path('upload-image/<str:job_id>/', ImageJobStatusView.as_view(), name='upload-image-status'),
+    path('import/', ContentImportView.as_view(), name='content-import'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
 
 # Asegurar que los archivos media sean servidos en desarrollo
@@ -2,12 +2,17 @@
 
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views_public import PublicPublicationViewSet, PublicPublicationDetailView, PublicBiographyViewSet
+from .views_public import (
+    PublicPublicationViewSet, PublicPublicationDetailView, PublicBiographyViewSet, PublicHomeView,
+    PublicSectionListView
+)
 
 router = DefaultRouter()
 router.register(r'publications', PublicPublicationViewSet, basename='public-publication')
 router.register(r'biographies', PublicBiographyViewSet, basename='public-biography')
 
 urlpatterns = [
+    path('home/', PublicHomeView.as_view(), name='public-home'),
+    path('sections/', PublicSectionListView.as_view(), name='public-section-list'),
     path('publication/<int:id>/', PublicPublicationDetailView.as_view(), name='public-publication-detail'),
 ] + router.urls
\ No newline at end of file
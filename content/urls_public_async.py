@@ -0,0 +1,16 @@
+# content/urls_public_async.py
+
+from django.urls import path, re_path
+from . import views_public_async
+
+# Mismas rutas y nombres que urls_public; lo que no está aquí (búsqueda)
+# lo sigue atendiendo la vista síncrona
+urlpatterns = [
+    path('home/', views_public_async.home, name='public-home'),
+    path('sections/', views_public_async.section_list, name='public-section-list'),
+    path('publication/<int:id>/', views_public_async.publication_detail, name='public-publication-detail'),
+    re_path(r'^publications/$', views_public_async.publication_list, name='public-publication-list'),
+    re_path(r'^publications/(?P<id>\d+)/$', views_public_async.publication_detail),
+    re_path(r'^biographies/$', views_public_async.biography_list, name='public-biography-list'),
+    re_path(r'^biographies/(?P<pk>\d+)/$', views_public_async.biography_detail, name='public-biography-detail'),
+]
@@ -0,0 +1,95 @@
+# utils/compression.py
+import gzip
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+# Por debajo de este tamaño comprimir no compensa (cabeceras y CPU del cliente)
+MIN_SIZE = 256
+# Orden de preferencia cuando el cliente acepta varias con el mismo peso
+ENCODINGS = ('br', 'gzip')
+# Extensiones de archivos estáticos que vale la pena precomprimir
+COMPRESSIBLE_EXTENSIONS = {'.js', '.css', '.json', '.svg', '.html', '.txt', '.xml', '.map'}
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+# Niveles al comprimir dentro de una petición (al cachear una respuesta): casi
+# el mismo tamaño que el máximo con mucha menos CPU. Los máximos quedan para lo
+# que se comprime fuera de línea (precompress y la exportación estática)
+INLINE_LEVELS = {'gzip': 6, 'br': 5}
+BEST_LEVELS = {'gzip': 9, 'br': 11}
+
+
+def compress(body, encoding, best=False):
+    """
+    Comprime con el nivel en línea o, con `best`, con el máximo. mtime=0 deja
+    el gzip determinista (mismo contenido, mismos bytes).
+    """
+    level = (BEST_LEVELS if best else INLINE_LEVELS).get(encoding)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    raise ValueError(f'Codificación no soportada: {encoding}')
+
+
+def available_encodings():
+    return [encoding for encoding in ENCODINGS if encoding != 'br' or brotli is not None]
+
+
+def compress_variants(body, best=False):
+    """{codificación: bytes} con el original ('identity') y sus versiones comprimidas"""
+    variants = {'identity': body}
+    if len(body) < MIN_SIZE:
+        return variants
+    for encoding in available_encodings():
+        compressed = compress(body, encoding, best)
+        # Solo si de verdad ahorra bytes
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+
+def parse_accept_encoding(header):
+    """{codificación: q} de la cabecera Accept-Encoding"""
+    accepted = {}
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(header, variants):
+    """La mejor codificación disponible que acepta el cliente ('identity' si ninguna)"""
+    accepted = parse_accept_encoding(header)
+    best, best_q = 'identity', 0.0
+    for encoding in ENCODINGS:
+        if encoding not in variants:
+            continue
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def apply_encoding(response, request, variants):
+    """Escribe en `response` la variante elegida según Accept-Encoding"""
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'), variants)
+    response.content = variants[encoding]
+    if encoding != 'identity':
+        response['Content-Encoding'] = encoding
+    response['Content-Length'] = str(len(response.content))
+    # Las cachés intermedias deben distinguir las variantes
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
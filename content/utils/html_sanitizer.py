@@ -0,0 +1,160 @@
+# utils/html_sanitizer.py
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+# Etiquetas que genera el editor (TinyMCE); el resto se elimina conservando el texto
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'div', 'span', 'blockquote', 'pre', 'code',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'strong', 'b', 'em', 'i', 'u', 's', 'strike', 'sub', 'sup',
+    'ul', 'ol', 'li', 'a', 'img', 'figure', 'figcaption',
+    'table', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'video', 'source',
+}
+VOID_TAGS = {'br', 'hr', 'img', 'source'}
+# Etiquetas que se eliminan junto con su contenido
+DROP_CONTENT_TAGS = {'script', 'style', 'template', 'noscript', 'iframe', 'object', 'embed', 'textarea', 'select'}
+
+ALLOWED_ATTRIBUTES = {
+    '*': {'class', 'style', 'title', 'id'},
+    'a': {'href', 'target', 'rel'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan'},
+    'ol': {'start'},
+    'video': {'src', 'poster', 'width', 'height', 'controls', 'loop', 'muted', 'playsinline', 'preload'},
+    'source': {'src', 'type'},
+    'iframe': {'src', 'width', 'height', 'allow', 'allowfullscreen', 'frameborder', 'referrerpolicy'},
+}
+# Atributos booleanos: se conservan aunque no tengan valor
+BOOLEAN_ATTRIBUTES = {'controls', 'loop', 'muted', 'playsinline', 'allowfullscreen'}
+# Videos insertados (media embed de TinyMCE): solo iframes https de estos hosts
+ALLOWED_EMBED_HOSTS = {
+    'www.youtube.com', 'youtube.com', 'www.youtube-nocookie.com', 'player.vimeo.com',
+}
+# Anidamiento máximo conservado: las etiquetas más profundas se eliminan (su
+# texto se conserva); acota el costo de cerrar etiquetas con HTML malicioso
+MAX_NESTING = 100
+URL_ATTRIBUTES = {'href', 'src', 'poster'}
+ALLOWED_SCHEMES = {'', 'http', 'https', 'mailto', 'tel'}
+ALLOWED_STYLES = {
+    'text-align', 'color', 'background-color', 'font-weight', 'font-style',
+    'text-decoration', 'padding-left', 'margin-left', 'width', 'height',
+    'font-size', 'font-family',
+}
+
+
+def is_safe_url(url):
+    # Los navegadores ignoran espacios y controles dentro del esquema ("java\tscript:")
+    cleaned = ''.join(ch for ch in url if ch > ' ').lower()
+    return urlparse(cleaned).scheme in ALLOWED_SCHEMES
+
+
+def is_allowed_embed(url):
+    # TinyMCE puede emitir la URL sin esquema (//www.youtube.com/...)
+    parts = urlparse(url.strip())
+    return parts.scheme in ('https', '') and (parts.hostname or '') in ALLOWED_EMBED_HOSTS
+
+
+def clean_style(style):
+    """Conserva solo las propiedades de formato permitidas y sin url()/expression()"""
+    declarations = []
+    for declaration in style.split(';'):
+        name, _, value = declaration.partition(':')
+        name, value = name.strip().lower(), value.strip()
+        lowered = value.lower()
+        if name in ALLOWED_STYLES and value and 'url(' not in lowered and 'expression' not in lowered:
+            declarations.append(f'{name}: {value}')
+    return '; '.join(declarations)
+
+
+class Sanitizer(HTMLParser):
+    """
+    Reescribe el HTML con una lista blanca de etiquetas y atributos. El
+    resultado queda balanceado (se cierran las etiquetas abiertas) y el texto
+    escapado. Es lineal en el tamaño de la entrada.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.output = []
+        self.stack = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            # Un iframe permitido se conserva vacío: su contenido es solo el texto alternativo
+            self.handle_embed(tag, attrs)
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+        if tag not in VOID_TAGS and len(self.stack) >= MAX_NESTING:
+            return
+        self.output.append(f'<{tag}{self.clean_attributes(tag, attrs)}>')
+        if tag not in VOID_TAGS:
+            self.stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.handle_embed(tag, attrs)
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.stack and self.stack[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.dropping = max(0, self.dropping - 1)
+            return
+        if self.dropping or tag not in self.stack:
+            return
+        # Cierra también las etiquetas que quedaron abiertas dentro
+        while self.stack:
+            open_tag = self.stack.pop()
+            self.output.append(f'</{open_tag}>')
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.output.append(escape(data, quote=False))
+
+    def handle_embed(self, tag, attrs):
+        if tag == 'iframe' and not self.dropping and is_allowed_embed(dict(attrs).get('src') or ''):
+            self.output.append(f'<iframe{self.clean_attributes(tag, attrs)}></iframe>')
+
+    def clean_attributes(self, tag, attrs):
+        allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(tag, set())
+        # Los enlaces a otra pestaña no deben dar acceso a window.opener
+        new_tab = tag == 'a' and dict(attrs).get('target') == '_blank'
+        result = [' rel="noopener noreferrer"'] if new_tab else []
+        for name, value in attrs:
+            if name not in allowed or (new_tab and name == 'rel'):
+                continue
+            if name in BOOLEAN_ATTRIBUTES:
+                result.append(f' {name}')
+                continue
+            if value is None:
+                continue
+            if name in URL_ATTRIBUTES and not is_safe_url(value):
+                continue
+            if name == 'style':
+                value = clean_style(value)
+                if not value:
+                    continue
+            result.append(f' {name}="{escape(value)}"')
+        return ''.join(result)
+
+    def result(self):
+        self.close()
+        while self.stack:
+            self.output.append(f'</{self.stack.pop()}>')
+        return ''.join(self.output)
+
+
+def sanitize_html(html):
+    """HTML limpio para guardar: se calcula una vez al escribir, nunca al leer"""
+    sanitizer = Sanitizer()
+    sanitizer.feed(html or '')
+    return sanitizer.result()
@@ -1,59 +1,114 @@
 # utils/image_handler.py
 from PIL import Image
+import hashlib
+import io
 import os
 from django.conf import settings
-from datetime import datetime
-import uuid
 from pathlib import Path
 import logging
+from .metrics import timed
 
 logger = logging.getLogger(__name__)
 
+# Opciones de guardado por formato (el resto de formatos usa los valores por defecto)
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'WEBP': {'quality': 80, 'method': 4},
+    'PNG': {'optimize': True},
+}
+
 class ImageHandler:
     def __init__(self, image_file, directory='uploads', max_size=(1920, 1080)):
         self.image_file = image_file
         self.directory = directory
         self.max_size = max_size
         self.upload_path = os.path.join(settings.MEDIA_ROOT, directory)
+        self.variants = []
+        self.image = None
         Path(self.upload_path).mkdir(parents=True, exist_ok=True)
 
-    def process_image(self):
-        """Procesa la imagen: optimiza, redimensiona y guarda"""
-        try:
+    def open(self):
+        """
+        Abre la imagen una sola vez. Solo se lee la cabecera: la validación
+        y el procesamiento comparten este mismo objeto.
+        """
+        if self.image is None:
             # Asegurarse de que el puntero del archivo esté al inicio
             self.image_file.seek(0)
-            
-            # Abrir la imagen
-            image = Image.open(self.image_file)
-            
+            with timed('image_stage_duration_seconds', stage='open'):
+                self.image = self._open(self.image_file)
+        return self.image
+
+    def validate(self):
+        """
+        Valida el archivo con la imagen ya abierta (solo la cabecera). Los
+        archivos truncados o dañados se detectan al decodificar, en decode()
+        """
+        try:
+            image = self.open()
+            with timed('image_stage_duration_seconds', stage='validate'):
+                self._check_file(self.image_file)
+                self._check_image(image)
+            return True
+        except Exception as e:
+            logger.error(f"Error validating image: {str(e)}")
+            raise ValueError(str(e))
+
+    def decode(self):
+        """
+        Decodifica la imagen abierta cerca del tamaño final. En JPEG, draft() hace
+        que el decodificador escale (1/2, 1/4 u 1/8) en lugar de producir la imagen
+        a resolución nativa, así la memoria depende del tamaño de salida.
+        Es la única lectura completa del archivo: si está truncado o dañado
+        falla aquí.
+        """
+        # Se suelta la referencia para que el original se libere al convertir
+        image, self.image = self.open(), None
+
+        too_big = image.size[0] > self.max_size[0] or image.size[1] > self.max_size[1]
+        try:
+            if too_big and image.format == 'JPEG':
+                image.draft('RGB', self.max_size)
+
             # Convertir a RGB si es necesario
             if image.mode in ('RGBA', 'P'):
                 image = image.convert('RGB')
-            
+
             # Redimensionar si excede el tamaño máximo
-            if image.size[0] > self.max_size[0] or image.size[1] > self.max_size[1]:
+            if too_big:
                 image.thumbnail(self.max_size, Image.LANCZOS)
+            # Si draft() ya dejó el tamaño final, thumbnail() no decodifica
+            image.load()
+        except (OSError, SyntaxError) as e:
+            raise ValueError(f"La imagen está dañada o incompleta: {str(e)}")
+        return image
+
+    def process_image(self, filename):
+        """
+        Procesa la imagen: optimiza, redimensiona, guarda y genera los derivados.
+        `filename` es relativo al directorio (MediaAsset usa el hash del contenido).
+        """
+        try:
+            # Abrir la imagen (si la validación ya lo hizo, se reutiliza)
+            source_format = self.open().format
+            # Decodificar y reducir al tamaño final son una sola etapa (draft)
+            with timed('image_stage_duration_seconds', stage='resize'):
+                image = self.decode()
             
-            # Generar nombre único usando timestamp y uuid
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            unique_id = uuid.uuid4().hex[:8]
-            original_name = os.path.splitext(self.image_file.name)[0]
-            ext = os.path.splitext(self.image_file.name)[1].lower()
-            
-            # Sanitizar el nombre original
-            safe_name = "".join(c for c in original_name if c.isalnum() or c in ('-', '_'))[:30]
-            
-            # Construir nombre final
-            filename = f"{timestamp}_{safe_name}_{unique_id}{ext}"
             filepath = os.path.join(self.upload_path, filename)
+            Path(filepath).parent.mkdir(parents=True, exist_ok=True)
             
             # Guardar imagen optimizada
-            image.save(
+            self._save(
+                image,
                 filepath, 
                 quality=85, 
                 optimize=True,
                 progressive=True
             )
+
+            # Derivados por ancho para srcset
+            self.variants = self.save_variants(image, filename, source_format)
             
             # Retornar path relativo para la URL
             return os.path.join(self.directory, filename)
@@ -62,39 +117,105 @@ class ImageHandler:
             logger.error(f"Error processing image: {str(e)}")
             raise ValueError(f"Error procesando imagen: {str(e)}")
 
+    def save_variants(self, image, filename, source_format=None, main_size=None):
+        """
+        Genera derivados de la imagen para cada ancho de IMAGE_VARIANT_WIDTHS en
+        el formato original (fallback) y en los formatos de IMAGE_VARIANT_FORMATS.
+        Retorna el manifiesto: ancho, alto, bytes, formato y path de cada variante,
+        incluida la imagen principal (que puede ser más grande que `image`).
+        """
+        stem, ext = os.path.splitext(filename)
+        main_size = main_size or image.size
+        manifest = [self._manifest_entry(filename, main_size)]
+
+        # Los GIF pueden ser animados: se sirven tal cual
+        if source_format == 'GIF':
+            return manifest
+
+        extensions = [ext] + [
+            f'.{fmt}' for fmt in settings.IMAGE_VARIANT_FORMATS if f'.{fmt}' != ext
+        ]
+        widths = sorted({min(width, image.width) for width in settings.IMAGE_VARIANT_WIDTHS}, reverse=True)
+
+        current = image
+        for width in widths:
+            if width != current.width:
+                # Se reduce desde el derivado anterior: más rápido que desde el original
+                height = max(1, round(current.height * width / current.width))
+                with timed('image_stage_duration_seconds', stage='resize'):
+                    current = current.resize((width, height), Image.LANCZOS)
+            for variant_ext in extensions:
+                # La principal ya es el derivado de ese ancho en el formato original
+                if variant_ext == ext and width == main_size[0]:
+                    continue
+                variant_name = f'{stem}_w{width}{variant_ext}'
+                variant_format = Image.registered_extensions().get(variant_ext)
+                self._save(
+                    current,
+                    os.path.join(self.upload_path, variant_name),
+                    image_format=variant_format,
+                    **SAVE_OPTIONS.get(variant_format, {})
+                )
+                manifest.append(self._manifest_entry(variant_name, current.size))
+
+        return sorted(manifest, key=lambda entry: (entry['format'], entry['width']))
+
+    def _save(self, image, filepath, image_format=None, **options):
+        """Codifica en memoria y luego escribe: así se miden por separado"""
+        if image_format is None:
+            image_format = Image.registered_extensions().get(os.path.splitext(filepath)[1].lower())
+        buffer = io.BytesIO()
+        with timed('image_stage_duration_seconds', stage='encode'):
+            image.save(buffer, format=image_format, **options)
+        with timed('image_stage_duration_seconds', stage='save'):
+            with open(filepath, 'wb') as fp:
+                fp.write(buffer.getbuffer())
+
+    def _manifest_entry(self, filename, size):
+        ext = os.path.splitext(filename)[1].lower()
+        return {
+            'width': size[0],
+            'height': size[1],
+            'bytes': os.path.getsize(os.path.join(self.upload_path, filename)),
+            'format': Image.registered_extensions().get(ext, ext.lstrip('.')).lower(),
+            'path': os.path.join(self.directory, filename),
+        }
+
+    @staticmethod
+    def compute_hash(image_file):
+        """SHA-256 del contenido del archivo, leído por bloques"""
+        sha256 = hashlib.sha256()
+        image_file.seek(0)
+        for chunk in image_file.chunks():
+            sha256.update(chunk)
+        image_file.seek(0)
+        return sha256.hexdigest()
+
     @staticmethod
-    def validate_image(image_file):
-        """Valida el archivo de imagen"""
+    def _open(fp):
+        """Abre una imagen (solo cabecera) rechazando bombas de descompresión"""
         try:
-            # Verificar tamaño máximo (5MB)
-            if image_file.size > settings.IMAGE_UPLOAD_MAX_SIZE:
-                raise ValueError("La imagen no debe superar los 5MB")
-                
-            # Verificar tipo de archivo
-            if image_file.content_type not in settings.IMAGE_UPLOAD_ALLOWED_TYPES:
-                raise ValueError("Tipo de archivo no permitido")
-                
-            # Verificar que sea una imagen válida
-            try:
-                image_file.seek(0)
-                img = Image.open(image_file)
-                img.verify()
-                image_file.seek(0)
-                
-                # Abrir de nuevo para verificar dimensiones
-                img = Image.open(image_file)
-                
-                # Verificar dimensiones mínimas
-                if img.size[0] < 200 or img.size[1] < 200:
-                    raise ValueError("La imagen es demasiado pequeña (mínimo 200x200)")
-                
-                image_file.seek(0)
-                
-            except Exception as e:
-                raise ValueError(f"Archivo de imagen inválido: {str(e)}")
-                
-            return True
-            
+            image = Image.open(fp)
         except Exception as e:
-            logger.error(f"Error validating image: {str(e)}")
-            raise ValueError(str(e))
\ No newline at end of file
+            raise ValueError(f"Archivo de imagen inválido: {str(e)}")
+
+        # Las dimensiones declaradas se controlan antes de decodificar nada
+        if image.size[0] * image.size[1] > settings.IMAGE_MAX_PIXELS:
+            raise ValueError("La imagen tiene demasiados píxeles")
+        return image
+
+    @staticmethod
+    def _check_file(image_file):
+        # Verificar tamaño máximo (5MB)
+        if image_file.size > settings.IMAGE_UPLOAD_MAX_SIZE:
+            raise ValueError("La imagen no debe superar los 5MB")
+            
+        # Verificar tipo de archivo
+        if image_file.content_type not in settings.IMAGE_UPLOAD_ALLOWED_TYPES:
+            raise ValueError("Tipo de archivo no permitido")
+
+    @staticmethod
+    def _check_image(image):
+        # Verificar dimensiones mínimas
+        if image.size[0] < 200 or image.size[1] < 200:
+            raise ValueError("La imagen es demasiado pequeña (mínimo 200x200)")
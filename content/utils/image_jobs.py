@@ -0,0 +1,79 @@
+# utils/image_jobs.py
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.db import connection
+from ..models import MediaAsset
+
+logger = logging.getLogger(__name__)
+
+# Pool de procesamiento por worker. Pillow libera el GIL al decodificar,
+# redimensionar y codificar, por lo que los hilos alcanzan para no
+# bloquear los hilos que atienden peticiones.
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_PROCESSING_WORKERS,
+            thread_name_prefix='image-jobs'
+        )
+    return _executor
+
+
+def _job_key(job_id):
+    return f'image-job:{job_id}'
+
+
+def _set_job(job_id, **data):
+    # El estado vive en la caché compartida: cualquier worker puede consultarlo
+    cache.set(_job_key(job_id), {'job_id': job_id, **data}, settings.IMAGE_JOB_TIMEOUT)
+
+
+def get_job(job_id):
+    """Devuelve el estado de un trabajo o None si no existe"""
+    return cache.get(_job_key(job_id))
+
+
+def submit_image_job(image_file, created_by_id=None):
+    """
+    Guarda la imagen sin procesar y encola su optimización y almacenamiento
+    por contenido (MediaAsset).
+    Retorna el estado inicial del trabajo (con el path provisorio).
+    """
+    job_id = uuid.uuid4().hex
+    ext = os.path.splitext(image_file.name)[1].lower()
+    raw_path = os.path.join(settings.UPLOAD_PATHS['temp'], f'{job_id}{ext}')
+    full_path = os.path.join(settings.MEDIA_ROOT, raw_path)
+    Path(full_path).parent.mkdir(parents=True, exist_ok=True)
+
+    image_file.seek(0)
+    with open(full_path, 'wb') as destination:
+        for chunk in image_file.chunks():
+            destination.write(chunk)
+
+    _set_job(job_id, status='pending', path=raw_path, variants=[])
+    get_executor().submit(_run_job, job_id, raw_path, image_file.name, created_by_id)
+    return get_job(job_id) or {'job_id': job_id, 'status': 'pending', 'path': raw_path, 'variants': []}
+
+
+def _run_job(job_id, raw_path, name, created_by_id):
+    _set_job(job_id, status='processing', path=raw_path, variants=[])
+    try:
+        with open(os.path.join(settings.MEDIA_ROOT, raw_path), 'rb') as raw:
+            asset = MediaAsset.store(File(raw, name=name), created_by_id=created_by_id)
+        _set_job(job_id, status='done', path=asset.path, variants=asset.variants)
+    except Exception as e:
+        logger.error(f"Error processing image job {job_id}: {str(e)}")
+        # La imagen sin procesar sigue disponible en su URL provisoria
+        _set_job(job_id, status='error', path=raw_path, variants=[], error=str(e))
+    finally:
+        # El hilo no pertenece a una petición: cerrar su conexión explícitamente
+        connection.close()
@@ -0,0 +1,373 @@
+# utils/importer.py
+import json
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from django.conf import settings
+from django.core.files import File
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+from ..models import Section, Publication, PublicationAsset, PublicationTerm, PublicationRow, MediaAsset
+from .image_handler import ImageHandler
+from .layout import iter_cells, summarize_layout
+from .layout_schema import validate_layout
+from .public_cache import bump_version_on_commit
+from .slugs import allocate_slugs
+
+STATUSES = {choice for choice, _ in Publication._meta.get_field('status').choices}
+
+
+class ImportValidationError(ValueError):
+    """Errores de validación del archivo importado (uno por línea con problemas)"""
+
+    def __init__(self, errors):
+        super().__init__('\n'.join(errors))
+        self.errors = errors
+
+
+class DirectoryImageSource:
+    """Imágenes referenciadas por nombre dentro de un directorio"""
+
+    def __init__(self, root):
+        self.root = os.path.realpath(root)
+
+    @contextmanager
+    def open(self, name):
+        path = os.path.realpath(os.path.join(self.root, name))
+        # No se permite salir del directorio con '..' o rutas absolutas
+        if os.path.commonpath([self.root, path]) != self.root or not os.path.isfile(path):
+            raise ValueError(f"Imagen no encontrada: {name}")
+        with open(path, 'rb') as fp:
+            image_file = File(fp, name=os.path.basename(name))
+            # Como en una subida: ImageHandler.validate() controla el tipo declarado
+            image_file.content_type = mimetypes.guess_type(path)[0]
+            yield image_file
+
+
+class UploadedImageSource:
+    """Imágenes subidas en la misma petición, referenciadas por su nombre de archivo"""
+
+    def __init__(self, files):
+        self.files = {image_file.name: image_file for image_file in files}
+
+    @contextmanager
+    def open(self, name):
+        if name not in self.files:
+            raise ValueError(f"Imagen no encontrada: {name}")
+        image_file = self.files[name]
+        image_file.seek(0)
+        yield image_file
+
+
+def is_local_image(content):
+    """Contenido de una celda de imagen que es un nombre de archivo a importar (no una URL)"""
+    if not isinstance(content, str) or not content:
+        return False
+    return not urlparse(content).scheme and not content.startswith('/')
+
+
+def parse_bool(item, key, default):
+    """Valor booleano del JSON; cualquier otro tipo (p. ej. "false" o 0) es un error"""
+    value = item.get(key, default)
+    if not isinstance(value, bool):
+        raise ValueError(f"{key} debe ser true o false")
+    return value
+
+
+def parse_lines(lines):
+    """Lee NDJSON: retorna (secciones, publicaciones) con su número de línea"""
+    sections, publications, errors = [], [], []
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            errors.append(f"Línea {number}: JSON inválido ({e})")
+            continue
+        if not isinstance(item, dict) or item.get('type') not in ('section', 'publication'):
+            errors.append(f"Línea {number}: 'type' debe ser 'section' o 'publication'")
+            continue
+        (sections if item['type'] == 'section' else publications).append((number, item))
+    if errors:
+        raise ImportValidationError(errors)
+    return sections, publications
+
+
+class ContentImporter:
+    """
+    Importación masiva de secciones y publicaciones desde NDJSON. Se valida
+    todo antes de escribir; las imágenes se procesan en paralelo (una vez por
+    contenido) y las filas se insertan con bulk_create en una transacción.
+    """
+
+    def __init__(self, images, user=None, base_url='', batch_size=500, workers=4):
+        self.images = images
+        self.user = user
+        self.base_url = base_url.rstrip('/')
+        self.batch_size = batch_size
+        self.workers = workers
+
+    def run(self, lines):
+        section_items, publication_items = parse_lines(lines)
+        sections, new_sections = self.prepare_sections(section_items)
+        rows = self.validate_publications(publication_items, sections, new_sections)
+        stored, stats = self.store_images(rows)
+
+        with transaction.atomic():
+            created_sections = self.create_sections(new_sections)
+            sections = {**sections, **created_sections}
+            pending = self.skip_existing(rows, sections)
+            publications = [self.build_publication(row, sections, stored) for row in pending]
+            ids = self.create_publications(publications)
+            # bulk_create no llama a save(): los índices se completan por id
+            for start in range(0, len(ids), self.batch_size):
+                imported = Publication.objects.filter(id__in=ids[start:start + self.batch_size])
+                PublicationAsset.rebuild(imported, self.batch_size)
+                PublicationTerm.rebuild(imported, self.batch_size)
+                PublicationRow.rebuild(imported, self.batch_size)
+            Section.refresh_publication_stats({publication.section_id for publication in publications})
+            bump_version_on_commit('publications')
+
+        return {
+            'sections': len(new_sections),
+            'publications': len(publications),
+            'publications_skipped': len(rows) - len(pending),
+            **stats,
+        }
+
+    def prepare_sections(self, items):
+        """Secciones existentes por slug y título, y las nuevas a crear"""
+        sections = {}
+        for section in Section.objects.all():
+            sections[section.slug] = section
+            sections[section.title.lower()] = section
+
+        errors, new_sections = [], {}
+        for number, item in items:
+            title = str(item.get('title') or '').strip()
+            if not title or len(title) > 200:
+                errors.append(f"Línea {number}: la sección necesita un título de hasta 200 caracteres")
+                continue
+            try:
+                order = max(0, int(item.get('order') or 0))
+            except (TypeError, ValueError):
+                errors.append(f"Línea {number}: order debe ser numérico")
+                continue
+            try:
+                is_active = parse_bool(item, 'is_active', True)
+            except ValueError as e:
+                errors.append(f"Línea {number}: {e}")
+                continue
+            if title.lower() in sections or title.lower() in new_sections:
+                continue  # Ya existe: se reutiliza
+            new_sections[title.lower()] = Section(
+                title=title,
+                slug=slugify(item.get('slug') or title),
+                is_active=is_active,
+                order=order,
+                created_by=self.user,
+            )
+        if errors:
+            raise ImportValidationError(errors)
+        return sections, list(new_sections.values())
+
+    def create_sections(self, new_sections):
+        if not new_sections:
+            return {}
+        slugs = allocate_slugs(Section, [section.slug for section in new_sections])
+        for section, slug in zip(new_sections, slugs):
+            section.slug = slug
+        Section.objects.bulk_create(new_sections, batch_size=self.batch_size)
+        # MySQL no devuelve los id de bulk_create: se releen por slug
+        created = {}
+        for section in Section.objects.filter(slug__in=slugs):
+            created[section.slug] = section
+            created[section.title.lower()] = section
+        return created
+
+    def skip_existing(self, rows, sections):
+        """
+        Descarta las publicaciones ya importadas (misma sección, título y fecha)
+        y las repetidas en el archivo: importar dos veces no duplica contenido
+        """
+        titles = sorted({row['title'] for row in rows})
+        existing = set()
+        for start in range(0, len(titles), self.batch_size):
+            existing.update(
+                Publication.objects.filter(title__in=titles[start:start + self.batch_size])
+                .values_list('section_id', 'title', 'publish_date')
+            )
+        pending = []
+        for row in rows:
+            key = (sections[row['section']].pk, row['title'], row['publish_date'])
+            if key not in existing:
+                existing.add(key)
+                pending.append(row)
+        return pending
+
+    def create_publications(self, publications):
+        """Inserta las publicaciones y retorna sus id, tomados de los objetos creados"""
+        if connection.features.can_return_rows_from_bulk_insert:
+            Publication.objects.bulk_create(publications, batch_size=self.batch_size)
+        else:
+            # MySQL no devuelve los id de un INSERT de varias filas: uno por fila
+            # (sin pasar por save(), que recalcularía lo que ya trae cada objeto)
+            for publication in publications:
+                # La caché pública se invalida una sola vez, al final de run()
+                publication.changes_public_output = False
+                publication.save_base(force_insert=True)
+        return [publication.pk for publication in publications]
+
+    def validate_publications(self, items, sections, new_sections):
+        """Valida las publicaciones; la sección puede venir por slug o por título"""
+        errors, rows = [], []
+        # Nombre con que se referencia una sección -> clave en el mapa de secciones
+        known = {key: key for key in sections}
+        for section in new_sections:
+            known.setdefault(section.slug, section.title.lower())
+            known.setdefault(section.title.lower(), section.title.lower())
+        for number, item in items:
+            title = str(item.get('title') or '').strip()
+            section = str(item.get('section') or '').strip()
+            status = item.get('status', 'draft')
+            publish_date = parse_datetime(str(item.get('publish_date') or ''))
+            layout = item.get('layout', [])
+            featured_image = item.get('featured_image')
+
+            problems = []
+            if not title or len(title) > 200:
+                problems.append('título vacío o de más de 200 caracteres')
+            if section not in known and section.lower() not in known:
+                problems.append(f"sección desconocida '{section}'")
+            if status not in STATUSES:
+                problems.append(f"estado inválido '{status}'")
+            if publish_date is None:
+                problems.append('publish_date inválida')
+            try:
+                validate_layout(layout)
+            except ValueError as e:
+                problems.append(f'layout inválido ({e})')
+            if not is_local_image(featured_image):
+                problems.append('featured_image debe ser un nombre de archivo')
+            try:
+                is_featured = parse_bool(item, 'is_featured', False)
+            except ValueError as e:
+                problems.append(str(e))
+            if problems:
+                errors.append(f"Línea {number}: {', '.join(problems)}")
+                continue
+
+            if timezone.is_naive(publish_date):
+                publish_date = timezone.make_aware(publish_date)
+            rows.append({
+                'title': title,
+                'section': known.get(section) or known[section.lower()],
+                'status': status,
+                'publish_date': publish_date,
+                'layout': layout,
+                'featured_image': featured_image,
+                'is_featured': is_featured,
+            })
+        if errors:
+            raise ImportValidationError(errors)
+        return rows
+
+    def image_names(self, rows):
+        names = set()
+        for row in rows:
+            names.add(row['featured_image'])
+            for cell in iter_cells(row['layout']):
+                if cell.get('type') == 'image' and is_local_image(cell.get('content')):
+                    names.add(cell['content'])
+        return sorted(names)
+
+    def _hash(self, name):
+        with self.images.open(name) as image_file:
+            # Las mismas comprobaciones que una subida (tamaño, tipo y dimensiones)
+            ImageHandler(image_file, directory=settings.UPLOAD_PATHS['assets']).validate()
+            return ImageHandler.compute_hash(image_file)
+
+    def _process(self, name, digest):
+        with self.images.open(name) as image_file:
+            return MediaAsset.process(image_file, digest)
+
+    def store_images(self, rows):
+        """
+        Valida cada imagen como una subida y procesa en paralelo cada imagen
+        distinta (por contenido) que aún no está en el almacén.
+        Retorna {nombre: (path, variants)} y estadísticas.
+        """
+        names = self.image_names(rows)
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {name: executor.submit(self._hash, name) for name in names}
+            digests = {}
+            for name, future in futures.items():
+                try:
+                    digests[name] = future.result()
+                except Exception as e:
+                    errors.append(f"Imagen {name}: {e}")
+            if errors:
+                raise ImportValidationError(errors)
+
+            existing = {
+                asset.sha256: (asset.path, asset.variants)
+                for asset in MediaAsset.objects.filter(sha256__in=set(digests.values()))
+            }
+            # Un nombre por contenido nuevo: dos archivos iguales se procesan una vez
+            pending = {}
+            for name, digest in digests.items():
+                if digest not in existing:
+                    pending.setdefault(digest, name)
+            futures = {
+                digest: executor.submit(self._process, name, digest)
+                for digest, name in pending.items()
+            }
+            processed = {}
+            for digest, future in futures.items():
+                try:
+                    processed[digest] = future.result()
+                except Exception as e:
+                    errors.append(f"Imagen {pending[digest]}: {e}")
+            if errors:
+                raise ImportValidationError(errors)
+
+        MediaAsset.objects.bulk_create([
+            MediaAsset(sha256=digest, path=path, variants=variants, created_by=self.user)
+            for digest, (path, variants) in processed.items()
+        ], batch_size=self.batch_size, ignore_conflicts=True)
+
+        stored = {name: existing.get(digest) or processed[digest] for name, digest in digests.items()}
+        return stored, {'images_processed': len(processed), 'images_reused': len(names) - len(pending)}
+
+    def build_publication(self, row, sections, stored):
+        layout = row['layout']
+        for cell in iter_cells(layout):
+            if cell.get('type') == 'image' and is_local_image(cell.get('content')):
+                path = stored[cell['content']][0]
+                cell['content'] = f"{self.base_url}{settings.MEDIA_URL}{path}"
+
+        path, variants = stored[row['featured_image']]
+        publication = Publication(
+            title=row['title'],
+            section=sections[row['section']],
+            status=row['status'],
+            publish_date=row['publish_date'],
+            layout=layout,
+            featured_image=path,
+            featured_image_variants=variants,
+            is_featured=row['is_featured'],
+            created_by=self.user,
+        )
+        # El resumen de los listados normalmente lo calcula save()
+        for field, value in summarize_layout(layout).items():
+            setattr(publication, field, value)
+        publication.row_count = len(layout)
+        return publication
@@ -0,0 +1,176 @@
+# utils/layout.py
+import json
+import math
+import re
+from html import unescape
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+from django.conf import settings
+from django.utils.html import strip_tags
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def iter_cells(layout):
+    """Recorre todas las celdas de un layout (lista de filas con 'cells')"""
+    for row in layout or []:
+        if not isinstance(row, dict):
+            continue
+        for cell in row.get('cells', []) or []:
+            if isinstance(cell, dict):
+                yield cell
+
+
+def media_path(url):
+    """
+    Convierte una URL de MEDIA en su ruta relativa a MEDIA_ROOT.
+    Retorna '' para URLs externas (que no son archivos nuestros).
+    """
+    url_path = urlparse(url).path
+    if not url_path.startswith(settings.MEDIA_URL):
+        return ''
+    return url_path[len(settings.MEDIA_URL):]
+
+
+class ImageSourceParser(HTMLParser):
+    """Recoge el src de las etiquetas <img> de un fragmento HTML"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.sources = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'img':
+            src = dict(attrs).get('src')
+            if src:
+                self.sources.append(src)
+
+
+def html_image_sources(html):
+    """URLs de las imágenes insertadas en el HTML de una celda de texto"""
+    parser = ImageSourceParser()
+    parser.feed(html)
+    parser.close()
+    return parser.sources
+
+
+def layout_image_paths(layout):
+    """
+    Rutas (relativas a MEDIA_ROOT) de las imágenes usadas en un layout: celdas
+    de imagen e imágenes insertadas en el HTML de las celdas de texto.
+    """
+    paths = set()
+    for cell in iter_cells(layout):
+        content = cell.get('content')
+        if not isinstance(content, str):
+            continue
+        if cell.get('type') == 'image':
+            urls = [content]
+        elif cell.get('type') == 'text' and '<img' in content.lower():
+            urls = html_image_sources(content)
+        else:
+            continue
+        paths.update(path for path in map(media_path, urls) if path)
+    return paths
+
+
+def html_to_text(html):
+    """Convierte el HTML de TinyMCE en texto plano normalizado"""
+    return WHITESPACE_RE.sub(' ', unescape(strip_tags(html or ''))).strip()
+
+
+def layout_text(layout):
+    """Texto plano de todas las celdas de texto de un layout"""
+    texts = (
+        html_to_text(cell['content'])
+        for cell in iter_cells(layout)
+        if cell.get('type') == 'text' and isinstance(cell.get('content'), str)
+    )
+    return ' '.join(text for text in texts if text)
+
+
+def make_excerpt(text, length):
+    """Recorta el texto sin cortar palabras a la mitad"""
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(' ', 1)[0].rstrip(' .,;:') + '…'
+
+
+def _summary(excerpt, first_image, word_count):
+    return {
+        'excerpt': excerpt,
+        'first_image': first_image[:500],
+        'word_count': word_count,
+        'reading_time': math.ceil(word_count / settings.PUBLICATION_WORDS_PER_MINUTE),
+    }
+
+
+def summarize_layout(layout):
+    """
+    Calcula los campos de resumen de una publicación a partir de su layout:
+    extracto, primera imagen, cantidad de palabras y minutos de lectura.
+    """
+    texts = []
+    first_image = ''
+    for cell in iter_cells(layout):
+        content = cell.get('content')
+        if not content or not isinstance(content, str):
+            continue
+        if cell.get('type') == 'text':
+            text = html_to_text(content)
+            if text:
+                texts.append(text)
+        elif cell.get('type') == 'image' and not first_image:
+            first_image = content
+
+    text = ' '.join(texts)
+    return _summary(make_excerpt(text, settings.PUBLICATION_EXCERPT_LENGTH), first_image, len(text.split()))
+
+
+def layout_words(rows):
+    """Cantidad de palabras de las celdas de texto de unas filas (es aditiva por celda)"""
+    return sum(
+        len(html_to_text(cell['content']).split())
+        for cell in iter_cells(rows)
+        if cell.get('type') == 'text' and isinstance(cell.get('content'), str)
+    )
+
+
+def layout_lead(layout):
+    """
+    Extracto y primera imagen recorriendo solo el comienzo del layout: el
+    HTML se convierte a texto hasta superar el largo del extracto (el
+    resultado es el mismo que con el texto completo).
+    """
+    length = settings.PUBLICATION_EXCERPT_LENGTH
+    texts, size, first_image = [], 0, ''
+    for cell in iter_cells(layout):
+        content = cell.get('content')
+        if not content or not isinstance(content, str):
+            continue
+        if cell.get('type') == 'text' and size <= length:
+            text = html_to_text(content)
+            if text:
+                size += len(text) + (1 if texts else 0)
+                texts.append(text)
+        elif cell.get('type') == 'image' and not first_image:
+            first_image = content
+        if first_image and size > length:
+            break
+    return make_excerpt(' '.join(texts), length), first_image
+
+
+def update_summary(layout, word_count, previous_rows, current_rows):
+    """
+    Resumen tras un parche: el extracto y la primera imagen salen del
+    comienzo del layout y las palabras se ajustan con las filas que
+    cambiaron, sin convertir a texto el documento completo.
+    """
+    excerpt, first_image = layout_lead(layout)
+    word_count = max(0, word_count + layout_words(current_rows) - layout_words(previous_rows))
+    return _summary(excerpt, first_image, word_count)
+
+
+def json_size(value):
+    """Bytes de `value` en JSON compacto (UTF-8): la medida de LAYOUT_MAX_BYTES"""
+    return len(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
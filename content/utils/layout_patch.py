@@ -0,0 +1,234 @@
+# utils/layout_patch.py
+import calendar
+import copy
+from datetime import timezone
+from django.utils.http import quote_etag
+from .layout import json_size
+from .layout_schema import get_schema, validate_row, validate_cell
+
+
+def layout_version(publication):
+    """Versión del layout para escrituras condicionales: updated_at en microsegundos (UTC)"""
+    updated_at = publication.updated_at.astimezone(timezone.utc)
+    return str(calendar.timegm(updated_at.utctimetuple()) * 1_000_000 + updated_at.microsecond)
+
+
+def layout_etag(publication):
+    return quote_etag(layout_version(publication))
+
+
+def request_version(request):
+    """Versión que el cliente dice haber editado: cabecera If-Match o campo 'version'"""
+    header = request.headers.get('If-Match', '')
+    if header:
+        return header.strip().removeprefix('W/').strip('"')
+    version = request.data.get('version') if isinstance(request.data, dict) else None
+    return str(version) if version is not None else None
+
+
+def _index(token, size, allow_end=False):
+    """Índice de un puntero JSON sobre una lista: '-' (solo al agregar) es el final"""
+    if token == '-' and allow_end:
+        return size
+    if not token.isdigit() or (len(token) > 1 and token.startswith('0')):
+        raise ValueError(f"Índice inválido '{token}'")
+    index = int(token)
+    if index > size or (index == size and not allow_end):
+        raise ValueError(f"Índice fuera de rango '{token}'")
+    return index
+
+
+def _parse_path(path):
+    """
+    Rutas admitidas (JSON Pointer sobre el layout):
+        /<fila>                      fila completa
+        /<fila>/<campo>              campo de la fila (no 'cells')
+        /<fila>/cells/<celda>        celda completa
+        /<fila>/cells/<celda>/<campo> campo de la celda
+    """
+    if not isinstance(path, str) or not path.startswith('/'):
+        raise ValueError(f"Ruta inválida '{path}'")
+    tokens = [token.replace('~1', '/').replace('~0', '~') for token in path[1:].split('/')]
+    if len(tokens) > 4 or (len(tokens) > 2 and tokens[1] != 'cells') or (len(tokens) == 2 and tokens[1] == 'cells'):
+        raise ValueError(f"Ruta no admitida '{path}'")
+    return tokens
+
+
+def _locate(layout, tokens, allow_end=False):
+    """
+    Retorna (contenedor, clave, elemento) del destino de la ruta. `elemento`
+    es la fila o celda afectada cuando el destino es uno de sus campos, para
+    validarla después.
+    """
+    last = len(tokens) == 1
+    row_index = _index(tokens[0], len(layout), allow_end and last)
+    if last:
+        return layout, row_index, None
+    row = layout[row_index]
+    if len(tokens) == 2:
+        return row, tokens[1], row
+    cells = row.setdefault('cells', [])
+    last = len(tokens) == 3
+    cell_index = _index(tokens[2], len(cells), allow_end and last)
+    if last:
+        return cells, cell_index, None
+    return cells[cell_index], tokens[3], cells[cell_index]
+
+
+class LayoutChanges:
+    """
+    Filas que tocó un parche (por identidad del objeto, así los índices que
+    se corren al agregar o eliminar filas no importan): la copia original de
+    cada fila modificada o eliminada y las filas modificadas o agregadas que
+    siguen en el layout. `moved` indica que cambiaron posiciones.
+    """
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.positions = {id(row): position for position, row in enumerate(layout)}
+        self.previous = {}
+        self.touched = {}
+        self.moved = False
+        self.size = None
+
+    def touch(self, row):
+        """Registra la fila antes de modificarla (la copia se toma una sola vez)"""
+        key = id(row)
+        if key in self.positions and key not in self.previous:
+            self.previous[key] = copy.deepcopy(row)
+        self.touched[key] = row
+
+    def add(self, row):
+        self.touched[id(row)] = row
+        self.moved = True
+
+    def remove(self, row):
+        key = id(row)
+        if key in self.positions and key not in self.previous:
+            self.previous[key] = row
+        self.touched.pop(key, None)
+        self.moved = True
+
+    def previous_rows(self):
+        """Contenido anterior de las filas originales que cambiaron o se eliminaron"""
+        return list(self.previous.values())
+
+    def current_rows(self):
+        """Filas modificadas o agregadas, tal como quedaron"""
+        return list(self.touched.values())
+
+    def written_positions(self):
+        """Posiciones finales cuyo contenido cambió o que ahora ocupa otra fila"""
+        if not self.moved:
+            return sorted(self.positions[key] for key in self.touched)
+        return [
+            position for position, row in enumerate(self.layout)
+            if id(row) in self.touched or self.positions.get(id(row)) != position
+        ]
+
+    def layout_size(self, previous_size):
+        """
+        Tamaño del layout en JSON compacto a partir del anterior: solo se
+        serializan las filas que cambiaron ('[' + filas separadas por ',' + ']')
+        """
+        if previous_size is None:
+            return json_size(self.layout)
+        rows_size = previous_size - 2 - max(len(self.positions) - 1, 0)
+        rows_size += sum(map(json_size, self.current_rows())) - sum(map(json_size, self.previous_rows()))
+        return 2 + rows_size + max(len(self.layout) - 1, 0)
+
+
+def _validator(tokens):
+    # Filas y sus campos se validan como fila; celdas y sus campos como celda
+    return validate_row if len(tokens) <= 2 else validate_cell
+
+
+def apply_layout_patch(layout, operations, size=None):
+    """
+    Aplica sobre `layout` (en el lugar) un JSON Patch (RFC 6902) con las
+    operaciones add, replace, remove y move. Solo se validan las filas o
+    celdas que tocan las operaciones, no el documento completo (y se
+    sanean); al final se verifica la cantidad de celdas de las filas
+    tocadas y el tamaño total del documento (`size`, el tamaño anterior si
+    se conoce, evita serializarlo completo). Retorna el LayoutChanges del
+    parche, con el tamaño nuevo en `size`. Lanza ValueError si alguna
+    operación no es válida.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise ValueError('Se esperaba una lista de operaciones')
+    changes = LayoutChanges(layout)
+    for number, operation in enumerate(operations, 1):
+        try:
+            _apply(layout, operation, changes)
+        except (TypeError, KeyError, IndexError, AttributeError, ValueError) as e:
+            raise ValueError(f"Operación {number}: {e}")
+    schema = get_schema()
+    schema.check_row_count(layout)
+    # add y move de celdas no pasan por validate_row: el límite por fila se verifica aquí
+    for row in changes.current_rows():
+        schema.check_cell_count(row)
+    changes.size = changes.layout_size(size)
+    schema.check_size(changes.size)
+    return changes
+
+
+def _apply(layout, operation, changes):
+    op = operation.get('op')
+    tokens = _parse_path(operation.get('path'))
+    validate = _validator(tokens)
+
+    if op == 'add':
+        value = operation['value']
+        container, key, parent = _locate(layout, tokens, allow_end=True)
+        if isinstance(container, list):
+            validate(value)
+            if container is layout:
+                changes.add(value)
+            else:
+                changes.touch(layout[int(tokens[0])])
+            container.insert(key, value)
+        else:
+            if key == 'cells':
+                raise ValueError("Las celdas se modifican una a una")
+            changes.touch(layout[int(tokens[0])])
+            container[key] = value
+            validate(parent)
+    elif op == 'replace':
+        value = operation['value']
+        container, key, parent = _locate(layout, tokens)
+        if isinstance(container, dict) and key not in container:
+            raise ValueError(f"No existe el campo '{key}'")
+        if key == 'cells':
+            raise ValueError("Las celdas se modifican una a una")
+        if container is layout:
+            changes.remove(container[key])
+            changes.add(value)
+        else:
+            changes.touch(layout[int(tokens[0])])
+        container[key] = value
+        validate(parent if parent is not None else value)
+    elif op == 'remove':
+        container, key, parent = _locate(layout, tokens)
+        if key in ('cells', 'type', 'content'):
+            raise ValueError(f"No se puede eliminar el campo '{key}'")
+        if container is layout:
+            changes.remove(container[key])
+        else:
+            changes.touch(layout[int(tokens[0])])
+        del container[key]
+    elif op == 'move':
+        source = _parse_path(operation.get('from'))
+        if len(source) != len(tokens) or len(tokens) not in (1, 3):
+            raise ValueError('Solo se pueden mover filas o celdas completas')
+        container, key, _ = _locate(layout, source)
+        if container is layout:
+            changes.moved = True
+        else:
+            changes.touch(layout[int(source[0])])
+        value = container.pop(key)
+        target, index, _ = _locate(layout, tokens, allow_end=True)
+        if target is not layout:
+            changes.touch(layout[int(tokens[0])])
+        target.insert(index, value)
+    else:
+        raise ValueError(f"Operación no admitida '{op}'")
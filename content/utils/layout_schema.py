@@ -0,0 +1,164 @@
+# utils/layout_schema.py
+from functools import lru_cache
+from django.conf import settings
+from .html_sanitizer import sanitize_html, is_safe_url
+
+
+class Budget:
+    """Tamaño restante (en caracteres) de lo que se valida: se corta apenas se agota"""
+
+    def __init__(self, limit):
+        self.remaining = limit
+
+    def charge(self, amount):
+        self.remaining -= amount
+        if self.remaining < 0:
+            raise ValueError('El layout excede el tamaño máximo permitido')
+
+
+class LayoutSchema:
+    """
+    Validador del layout, construido una sola vez con los límites de la
+    configuración. Todas las escrituras (API, JSON Patch, importación, admin)
+    pasan por aquí: valida la estructura, acota tamaño, filas, celdas y
+    anidamiento, y deja el contenido limpio (HTML saneado) para que las
+    lecturas no tengan que hacerlo.
+
+    El recorrido es iterativo y cobra cada valor contra el presupuesto de
+    tamaño, así un payload malicioso se rechaza en cuanto excede un límite.
+    """
+
+    def __init__(self, max_bytes, max_rows, max_cells, max_cell_length, max_depth):
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.max_cells = max_cells
+        self.max_cell_length = max_cell_length
+        self.max_depth = max_depth
+        # Limpieza del contenido según el tipo de celda
+        self.cleaners = {
+            'text': sanitize_html,
+            'image': self.clean_url,
+            'video': self.clean_url,
+        }
+
+    def validate_layout(self, layout):
+        if not isinstance(layout, list):
+            raise ValueError('El layout debe ser una lista de filas')
+        self.check_row_count(layout)
+        budget = Budget(self.max_bytes)
+        for row in layout:
+            self.validate_row(row, budget)
+        return layout
+
+    def check_row_count(self, layout):
+        if len(layout) > self.max_rows:
+            raise ValueError(f'El layout no puede tener más de {self.max_rows} filas')
+
+    def check_cell_count(self, row):
+        if len(row.get('cells', [])) > self.max_cells:
+            raise ValueError(f'Una fila no puede tener más de {self.max_cells} celdas')
+
+    def check_size(self, size):
+        """Tamaño total del documento (JSON compacto, en bytes; ver json_size)"""
+        if size > self.max_bytes:
+            raise ValueError('El layout excede el tamaño máximo permitido')
+
+    def validate_row(self, row, budget=None):
+        budget = budget or Budget(self.max_bytes)
+        if not isinstance(row, dict) or not isinstance(row.get('cells', []), list):
+            raise ValueError('Cada fila debe tener una lista de celdas')
+        self.check_cell_count(row)
+        cells = row.get('cells', [])
+        for key, value in row.items():
+            if key != 'cells':
+                self.check_value(key, value, budget, depth=3)
+        for cell in cells:
+            self.validate_cell(cell, budget)
+        return row
+
+    def validate_cell(self, cell, budget=None):
+        budget = budget or Budget(self.max_bytes)
+        if not isinstance(cell, dict) or 'type' not in cell or 'content' not in cell:
+            raise ValueError('Cada celda debe tener tipo y contenido')
+        clean = self.cleaners.get(cell['type']) if isinstance(cell['type'], str) else None
+        if clean is None:
+            raise ValueError('Tipo de celda no válido')
+
+        content = cell['content']
+        if content is not None:
+            if not isinstance(content, str):
+                raise ValueError('El contenido de la celda debe ser texto')
+            if len(content) > self.max_cell_length:
+                raise ValueError(f'El contenido de una celda no puede superar {self.max_cell_length} caracteres')
+            budget.charge(len(content))
+            cell['content'] = clean(content)
+
+        for key, value in cell.items():
+            if key not in ('type', 'content'):
+                self.check_value(key, value, budget, depth=5)
+        return cell
+
+    def check_value(self, key, value, budget, depth):
+        """
+        Valores adicionales de filas y celdas (opciones del editor): tamaño y
+        anidamiento. `depth` cuenta desde el layout (1) pasando por fila (2),
+        lista de celdas (3) y celda (4).
+        """
+        budget.charge(len(key))
+        pending = [(value, depth)]
+        while pending:
+            value, depth = pending.pop()
+            if depth > self.max_depth:
+                raise ValueError('El layout excede el anidamiento máximo permitido')
+            if isinstance(value, dict):
+                budget.charge(sum(len(key) for key in value) + 1)
+                pending.extend((item, depth + 1) for item in value.values())
+            elif isinstance(value, list):
+                budget.charge(len(value) + 1)
+                pending.extend((item, depth + 1) for item in value)
+            elif isinstance(value, str):
+                budget.charge(len(value))
+            else:
+                budget.charge(1)
+
+    def clean_url(self, url):
+        if not is_safe_url(url):
+            raise ValueError('URL no permitida en la celda')
+        return url.strip()
+
+
+@lru_cache(maxsize=None)
+def get_schema():
+    return LayoutSchema(
+        max_bytes=settings.LAYOUT_MAX_BYTES,
+        max_rows=settings.LAYOUT_MAX_ROWS,
+        max_cells=settings.LAYOUT_MAX_CELLS_PER_ROW,
+        max_cell_length=settings.LAYOUT_MAX_CELL_LENGTH,
+        max_depth=settings.LAYOUT_MAX_DEPTH,
+    )
+
+
+def validate_layout(layout):
+    """Valida y limpia un layout completo (en el lugar). Lanza ValueError"""
+    return get_schema().validate_layout(layout)
+
+
+def validate_row(row):
+    return get_schema().validate_row(row)
+
+
+def validate_cell(cell):
+    return get_schema().validate_cell(cell)
+
+
+def check_payload_size(request):
+    """
+    Rechaza por Content-Length antes de leer el cuerpo: DRF no aplica
+    DATA_UPLOAD_MAX_MEMORY_SIZE y el JSON se parsearía completo.
+    """
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        length = 0
+    if length > settings.LAYOUT_MAX_BYTES:
+        raise ValueError('El layout excede el tamaño máximo permitido')
@@ -0,0 +1,274 @@
+# utils/metrics.py
+import atexit
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Sin fcntl (Windows) no se consolidan los archivos de workers terminados
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# name: (tipo, ayuda, buckets)
+DEFINITIONS = {
+    'http_requests_total': ('counter', 'Peticiones atendidas', None),
+    'http_request_duration_seconds': ('histogram', 'Latencia de las peticiones', LATENCY_BUCKETS),
+    'http_response_bytes_total': ('counter', 'Bytes enviados en el cuerpo de las respuestas', None),
+    'db_queries_per_request': ('histogram', 'Consultas SQL por petición', QUERY_BUCKETS),
+    'db_query_duration_seconds_total': ('counter', 'Tiempo en consultas SQL', None),
+    'image_stage_duration_seconds': ('histogram', 'Tiempo por etapa del procesamiento de imágenes', LATENCY_BUCKETS),
+}
+
+# Totales de los workers que ya terminaron, consolidados al leer las métricas
+MERGED_NAME = 'merged.json'
+LOCK_NAME = 'collect.lock'
+WORKER_FILE_RE = re.compile(r'^(?P<pid>\d+)-\d+\.json$')
+
+
+class Registry:
+    """
+    Métricas acumuladas en memoria por proceso. Cada worker de gunicorn vuelca
+    las suyas a su propio archivo en METRICS_DIR (sin compartir escrituras,
+    por lo que no hacen falta bloqueos entre procesos) y el endpoint suma los
+    archivos de todos los workers. Solo vuelcan los procesos que atendieron
+    peticiones (MetricsMiddleware): un comando de manage.py no deja archivos.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counters = {}
+        self.histograms = {}
+        self.last_flush = 0.0
+        self.serving = False
+        self.pid = os.getpid()
+        # pid + inicio: un worker nuevo con el mismo pid no pisa los totales del anterior
+        self.filename = f'{self.pid}-{time.time_ns()}.json'
+
+    def check_fork(self):
+        # Con --preload los workers heredan el registro del proceso maestro
+        if os.getpid() != self.pid:
+            self.reset()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.check_fork()
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        buckets = DEFINITIONS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.check_fork()
+            entry = self.histograms.get(key)
+            if entry is None:
+                entry = self.histograms[key] = {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+            index = bisect_left(buckets, value)
+            if index < len(buckets):
+                entry['buckets'][index] += 1
+            entry['sum'] += value
+            entry['count'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            self.check_fork()
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [
+                    [name, list(labels), list(entry['buckets']), entry['sum'], entry['count']]
+                    for (name, labels), entry in self.histograms.items()
+                ],
+            }
+
+    def mark_serving(self):
+        with self.lock:
+            self.check_fork()
+            self.serving = True
+
+    def flush(self, force=False):
+        """Vuelca las métricas del proceso a su archivo (como mucho cada METRICS_FLUSH_INTERVAL)"""
+        if not self.serving or os.getpid() != self.pid:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self.last_flush = now
+        try:
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            path = os.path.join(settings.METRICS_DIR, self.filename)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as fp:
+                json.dump(self.snapshot(), fp)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"No se pudieron guardar las métricas: {e}")
+
+
+registry = Registry()
+atexit.register(lambda: registry.flush(force=True))
+
+
+@contextmanager
+def timed(name, **labels):
+    """Mide el bloque y lo registra en el histograma `name`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(name, time.perf_counter() - start, **labels)
+
+
+def _read(path):
+    try:
+        with open(path, encoding='utf-8') as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return None  # Un worker escribiendo: se toma en la próxima lectura
+
+
+def _accumulate(counters, histograms, data):
+    for name, labels, value in data.get('counters', []):
+        key = (name, tuple(map(tuple, labels)))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, buckets, total, count in data.get('histograms', []):
+        key = (name, tuple(map(tuple, labels)))
+        entry = histograms.setdefault(key, {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0})
+        entry['buckets'] = [a + b for a, b in zip(entry['buckets'], buckets)]
+        entry['sum'] += total
+        entry['count'] += count
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Existe, aunque sea de otro usuario
+    return True
+
+
+def _merge_dead_workers():
+    """
+    Suma en merged.json los archivos de los workers que ya terminaron y los
+    elimina: los totales no bajan (Prometheus no ve un reinicio del contador)
+    y METRICS_DIR no crece con cada reinicio de gunicorn. merged.json anota
+    los archivos ya sumados, así una interrupción a mitad no los cuenta dos veces.
+    """
+    dead = []
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+        match = WORKER_FILE_RE.match(os.path.basename(path))
+        if match and not _is_alive(int(match.group('pid'))):
+            dead.append(path)
+    if not dead:
+        return
+
+    merged_path = os.path.join(settings.METRICS_DIR, MERGED_NAME)
+    merged = _read(merged_path) or {}
+    sources = set(merged.get('sources', []))
+    counters, histograms = {}, {}
+    _accumulate(counters, histograms, merged)
+    for path in dead:
+        name = os.path.basename(path)
+        data = None if name in sources else _read(path)
+        if data is not None:
+            _accumulate(counters, histograms, data)
+            sources.add(name)
+
+    tmp_path = f'{merged_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fp:
+        json.dump({
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': [
+                [name, labels, entry['buckets'], entry['sum'], entry['count']]
+                for (name, labels), entry in histograms.items()
+            ],
+            'sources': sorted(name for name in sources if os.path.exists(os.path.join(settings.METRICS_DIR, name))),
+        }, fp)
+    os.replace(tmp_path, merged_path)
+    for path in dead:
+        if os.path.basename(path) in sources:
+            os.remove(path)
+
+
+@contextmanager
+def _collect_lock():
+    """Una lectura a la vez: ninguna ve a medias la consolidación de otra"""
+    if fcntl is None:
+        yield False
+        return
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    with open(os.path.join(settings.METRICS_DIR, LOCK_NAME), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def collect():
+    """Suma las métricas de todos los workers (archivos de METRICS_DIR)"""
+    registry.flush(force=True)
+    counters, histograms = {}, {}
+    with _collect_lock() as locked:
+        if locked:
+            try:
+                _merge_dead_workers()
+            except OSError as e:
+                logger.error(f"No se pudieron consolidar las métricas: {e}")
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            data = _read(path)
+            if data is not None:
+                _accumulate(counters, histograms, data)
+    return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    items = [*labels, *extra]
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+def render_prometheus():
+    """Métricas en el formato de texto de Prometheus (0.0.4)"""
+    counters, histograms = collect()
+    lines = []
+    for name, (kind, help_text, buckets) in DEFINITIONS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+            continue
+        for (metric, labels), entry in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, entry['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {entry["count"]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {entry["sum"]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {entry["count"]}')
+    return '\n'.join(lines) + '\n'
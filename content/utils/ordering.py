@@ -0,0 +1,97 @@
+# utils/ordering.py
+from django.db import transaction
+from django.utils import timezone
+
+# Separación entre valores de `order` consecutivos al renumerar: deja huecos
+# para que mover un elemento reescriba solo esa fila
+ORDER_GAP = 1024
+
+
+def parse_order_items(data):
+    """Valida el cuerpo de un reordenamiento: lista de {'id', 'order'}"""
+    if not isinstance(data, list):
+        raise ValueError('Se esperaba una lista de elementos con id y order')
+    orders = {}
+    for item in data:
+        try:
+            pk, order = int(item['id']), int(item['order'])
+        except (TypeError, KeyError, ValueError):
+            raise ValueError('Cada elemento debe tener id y order numéricos')
+        if order < 0:
+            raise ValueError('El orden no puede ser negativo')
+        orders[pk] = order
+    return orders
+
+
+def _write_orders(model, orders, current, touch):
+    """Escribe en un solo UPDATE (CASE ... WHEN) las filas cuyo orden cambió"""
+    changed = [
+        model(pk=pk, order=order)
+        for pk, order in orders.items()
+        if pk in current and current[pk] != order
+    ]
+    if not changed:
+        return 0
+    fields = ['order']
+    if touch:
+        # bulk_update no toca updated_at: se marca para que cambie el ETag público
+        now = timezone.now()
+        for obj in changed:
+            obj.updated_at = now
+        fields.append('updated_at')
+    return model.objects.bulk_update(changed, fields, batch_size=len(changed))
+
+
+def apply_order(model, data, touch=False):
+    """
+    Aplica un orden completo o parcial en una transacción y una sola
+    sentencia. Retorna la cantidad de filas modificadas.
+    """
+    orders = parse_order_items(data)
+    with transaction.atomic():
+        current = dict(
+            model.objects.select_for_update()
+            .filter(pk__in=orders)
+            .values_list('pk', 'order')
+        )
+        missing = set(orders) - set(current)
+        if missing:
+            raise ValueError(f'No existen los elementos: {sorted(missing)}')
+        return _write_orders(model, orders, current, touch)
+
+
+def move_item(model, pk, after=None, touch=False):
+    """
+    Mueve un elemento a continuación de `after` (None = al principio) usando
+    orden disperso: toma un valor entre los vecinos y reescribe una sola
+    fila. Si no queda hueco entre ellos, renumera la lista con ORDER_GAP.
+    Retorna la cantidad de filas modificadas.
+    """
+    try:
+        pk = int(pk)
+        after = int(after) if after is not None else None
+    except (TypeError, ValueError):
+        raise ValueError('Los identificadores deben ser numéricos')
+
+    with transaction.atomic():
+        rows = list(
+            model.objects.select_for_update()
+            .order_by(*model._meta.ordering, 'pk')
+            .values_list('pk', 'order')
+        )
+        current = dict(rows)
+        if pk not in current or after == pk or (after is not None and after not in current):
+            raise ValueError('Elemento no encontrado')
+
+        ids = [row_pk for row_pk, _ in rows if row_pk != pk]
+        index = 0 if after is None else ids.index(after) + 1
+
+        low = current[ids[index - 1]] if index > 0 else -1
+        high = current[ids[index]] if index < len(ids) else low + 2 * ORDER_GAP
+        order = (low + high) // 2
+        if low < order < high:
+            return _write_orders(model, {pk: order}, current, touch)
+
+        ids.insert(index, pk)
+        orders = {row_pk: (i + 1) * ORDER_GAP for i, row_pk in enumerate(ids)}
+        return _write_orders(model, orders, current, touch)
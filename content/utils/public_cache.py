@@ -0,0 +1,226 @@
+# utils/public_cache.py
+import hashlib
+import json
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from .compression import compress_variants, apply_encoding
+
+# Espacios de nombres de la caché pública. Cada uno tiene su propia versión:
+# al cambiar el contenido se cambia la versión y todas las claves antiguas
+# quedan huérfanas (expiran solas), sin tener que adivinar un TTL.
+NAMESPACES = ('publications', 'biographies')
+
+
+def _version_key(namespace):
+    return f'public:{namespace}:version'
+
+
+def get_version(namespace):
+    """Devuelve la versión vigente de un espacio de nombres"""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key, 0)
+    return version
+
+
+async def aget_version(namespace):
+    """get_version para las vistas asíncronas"""
+    key = _version_key(namespace)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key, 0)
+    return version
+
+
+def bump_version(*namespaces):
+    """Invalida todas las respuestas cacheadas de los espacios indicados"""
+    for namespace in namespaces or NAMESPACES:
+        # Un valor nuevo (y no un incr) evita carreras entre workers y
+        # sigue siendo válido si la clave de versión fue desalojada
+        cache.set(_version_key(namespace), time.time_ns(), timeout=None)
+
+
+def bump_version_on_commit(*namespaces):
+    """Invalida la caché cuando la transacción en curso se confirme"""
+    transaction.on_commit(lambda: bump_version(*namespaces))
+
+
+def _digest(request, parts):
+    # El host y el esquema forman parte de la clave porque las URLs
+    # absolutas (imágenes, paginación) dependen de ellos
+    raw = '|'.join([request.build_absolute_uri('/')] + [str(part) for part in parts])
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def make_key(request, namespace, *parts):
+    """Construye la clave versionada de una respuesta pública"""
+    return f'public:{namespace}:{get_version(namespace)}:{_digest(request, parts)}'
+
+
+async def amake_key(request, namespace, *parts):
+    return f'public:{namespace}:{await aget_version(namespace)}:{_digest(request, parts)}'
+
+
+def make_validators(parts, *stamps):
+    """
+    Calcula (etag, last_modified) a partir de valores baratos de obtener
+    (conteos y fechas de modificación), sin serializar la respuesta.
+    """
+    raw = '|'.join(str(value) for value in [*parts, *stamps])
+    # Débil: el mismo contenido se sirve con distintas codificaciones (gzip, br)
+    etag = 'W/' + quote_etag(hashlib.md5(raw.encode('utf-8')).hexdigest())
+    dates = [stamp for stamp in stamps if hasattr(stamp, 'timestamp')]
+    return etag, max(dates) if dates else None
+
+
+def _validator_aggregates(related_stamps):
+    aggregates = {
+        'count': Count('pk'),
+        'last_modified': Max('updated_at'),
+    }
+    for field in related_stamps:
+        aggregates[field] = Max(field)
+    return aggregates
+
+
+def _listing_validators(parts, values):
+    # Solo ETag: MAX(updated_at) no cambia al despublicar o eliminar una fila,
+    # así que un If-Modified-Since recibiría un 304 con el listado anterior.
+    # El COUNT sí cambia y forma parte del ETag.
+    etag, _ = make_validators(parts, *values.values())
+    return etag, None
+
+
+def queryset_validators(queryset, parts, *related_stamps):
+    """Validadores de un listado: ETag a partir de COUNT y MAX(updated_at) en una sola consulta"""
+    values = queryset.order_by().aggregate(**_validator_aggregates(related_stamps))
+    return _listing_validators(parts, values)
+
+
+async def aqueryset_validators(queryset, parts, *related_stamps):
+    values = await queryset.order_by().aaggregate(**_validator_aggregates(related_stamps))
+    return _listing_validators(parts, values)
+
+
+def _set_validators(response, etag, last_modified):
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Obliga a revalidar siempre en vez de usar frescura heurística
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def _render(request, entry):
+    """
+    Respuesta JSON con la variante precomprimida que acepta el cliente. Otros
+    formatos (la API navegable) se renderizan normalmente a partir del JSON.
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    if renderer is None or renderer.format == 'json':
+        response = HttpResponse(content_type='application/json')
+        return apply_encoding(response, request, entry['variants'])
+    return Response(json.loads(entry['variants']['identity']))
+
+
+def _entry(data, etag, last_modified):
+    return {
+        'variants': compress_variants(JSONRenderer().render(data)),
+        'etag': etag,
+        'last_modified': last_modified,
+    }
+
+
+def _cached_entry(entry):
+    if entry is not None and 'variants' not in entry:
+        return None  # Entrada con el formato anterior (solo datos)
+    return entry
+
+
+def _not_modified(request, etag, last_modified):
+    """Respuesta 304 si la petición condicional coincide, None en otro caso"""
+    if not (etag or last_modified):
+        return None
+    not_modified = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if not_modified is None:
+        return None
+    return _set_validators(not_modified, etag, last_modified)
+
+
+def cached_response(request, namespace, parts, build, validators=None):
+    """
+    Devuelve la respuesta cacheada o la construye con `build()` y la guarda.
+
+    Si se indica `validators()` (que debe devolver (etag, last_modified)), la
+    respuesta lleva ETag/Last-Modified y las peticiones condicionales reciben
+    un 304 sin serializar nada.
+
+    Se guarda el JSON ya renderizado y comprimido (gzip y brotli) una sola
+    vez; cada petición recibe la variante que indica su Accept-Encoding.
+    """
+    key = make_key(request, namespace, *parts)
+    entry = _cached_entry(cache.get(key))
+
+    if entry is not None:
+        etag, last_modified = entry['etag'], entry['last_modified']
+    elif validators is not None:
+        etag, last_modified = validators()
+    else:
+        etag, last_modified = None, None
+
+    not_modified = _not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    if entry is None:
+        entry = _entry(build(), etag, last_modified)
+        cache.set(key, entry, settings.PUBLIC_API_CACHE_TIMEOUT)
+
+    return _set_validators(_render(request, entry), etag, last_modified)
+
+
+async def acached_response(request, namespace, parts, build, validators=None):
+    """
+    cached_response para las vistas asíncronas: `build()` y `validators()`
+    son corrutinas. Renderizar y comprimir (gzip 6 y brotli 5, los niveles en
+    línea) es CPU pura, así que se hace en un hilo aparte para no frenar el
+    event loop.
+    """
+    key = await amake_key(request, namespace, *parts)
+    entry = _cached_entry(await cache.aget(key))
+
+    if entry is not None:
+        etag, last_modified = entry['etag'], entry['last_modified']
+    elif validators is not None:
+        etag, last_modified = await validators()
+    else:
+        etag, last_modified = None, None
+
+    not_modified = _not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    if entry is None:
+        data = await build()
+        entry = await sync_to_async(_entry, thread_sensitive=False)(data, etag, last_modified)
+        await cache.aset(key, entry, settings.PUBLIC_API_CACHE_TIMEOUT)
+
+    return _set_validators(_render(request, entry), etag, last_modified)
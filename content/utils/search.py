@@ -0,0 +1,47 @@
+# utils/search.py
+import re
+import unicodedata
+from collections import Counter
+from .layout import layout_text
+
+# Peso de una aparición en el título frente a una en el cuerpo
+TITLE_WEIGHT = 5
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 10
+
+TERM_RE = re.compile(r'\w+')
+
+# Palabras demasiado frecuentes para distinguir publicaciones (sin tildes)
+STOPWORDS = frozenset('''
+    al algo algunas algunos ante antes como con contra cual cuando de del desde donde durante el ella
+    ellos en entre era es esa ese eso esta estas este esto estos fue ha hay hasta la las le les lo los
+    mas me mi muy nada ni no nos o otra otras otro otros para pero poco por porque que quien se ser si
+    sin sobre son su sus tambien tanto todo todos tu un una uno unos y ya yo
+'''.split())
+
+
+def normalize(text):
+    """Minúsculas y sin tildes: 'Sección' y 'seccion' son el mismo término"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    return [
+        term for term in TERM_RE.findall(normalize(text or ''))
+        if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH and term not in STOPWORDS
+    ]
+
+
+def term_weights(title, layout):
+    """Términos de una publicación con su peso (frecuencia; el título pesa más)"""
+    weights = Counter(tokenize(layout_text(layout)))
+    for term in tokenize(title):
+        weights[term] += TITLE_WEIGHT
+    return weights
+
+
+def query_terms(query):
+    """Términos de una búsqueda, sin repetir y con un máximo"""
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
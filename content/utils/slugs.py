@@ -0,0 +1,30 @@
+# utils/slugs.py
+from django.db.models import Q
+
+
+def allocate_slugs(model, bases, exclude_pk=None, field='slug'):
+    """
+    Asigna slugs únicos para `bases` (en el mismo orden) con una sola consulta:
+    se leen los slugs existentes que empiezan por alguna de las bases y los
+    sufijos -1, -2, ... se resuelven en memoria.
+    """
+    prefixes = {base for base in bases if base}
+    taken = set()
+    if prefixes:
+        query = Q()
+        for prefix in prefixes:
+            query |= Q(**{f'{field}__startswith': prefix})
+        queryset = model.objects.filter(query)
+        if exclude_pk is not None:
+            queryset = queryset.exclude(pk=exclude_pk)
+        taken = set(queryset.values_list(field, flat=True))
+
+    slugs = []
+    for base in bases:
+        slug, counter = base, 1
+        while base and slug in taken:
+            slug = f"{base}-{counter}"
+            counter += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
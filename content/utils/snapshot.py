@@ -0,0 +1,214 @@
+# utils/snapshot.py
+import hashlib
+import json
+import logging
+import os
+from urllib.parse import urlparse
+from django.conf import settings
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from ..models import Publication, Section, Biography
+from .compression import compress_variants, SUFFIXES
+from ..views_public import (
+    PublicPublicationViewSet, PublicPublicationDetailView, PublicBiographyViewSet, PublicHomeView,
+    PublicSectionListView, public_sections
+)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def fingerprint(*parts):
+    """Huella de las dependencias de un archivo: si no cambia, no se regenera"""
+    raw = json.dumps(parts, default=str, sort_keys=True, separators=(',', ':'))
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def paginate(items, page_size):
+    """Divide en páginas como la API (siempre al menos una página, aunque esté vacía)"""
+    pages = [items[i:i + page_size] for i in range(0, len(items), page_size)]
+    return pages or [[]]
+
+
+class SnapshotBuilder:
+    """
+    Exporta la API pública a archivos JSON estáticos:
+
+        home.json
+        sections.json
+        publications/all/<página>.json
+        publications/section/<slug>/<página>.json
+        publication/<id>.json
+        biographies/<página>.json
+        biography/<id>.json
+
+    Cada archivo se genera llamando a la vista real (misma respuesta que la
+    API) y guarda en manifest.json la huella de lo que lo compone: filas,
+    updated_at y totales. En cada ejecución solo se regeneran los archivos
+    cuya huella cambió y se eliminan los que ya no corresponden.
+    """
+
+    def __init__(self, root=None, base_url=None, static_url=None, full=False, dry_run=False):
+        self.root = root or settings.PUBLIC_SNAPSHOT_ROOT
+        self.static_url = (static_url or settings.PUBLIC_SNAPSHOT_URL).rstrip('/') + '/'
+        base = urlparse(base_url or settings.PUBLIC_SNAPSHOT_BASE_URL)
+        if not base.netloc:
+            raise ValueError('Se necesita la URL base del sitio (PUBLIC_SNAPSHOT_BASE_URL o --base-url)')
+        self.factory = RequestFactory(HTTP_HOST=base.netloc)
+        self.secure = base.scheme == 'https'
+        self.full = full
+        self.dry_run = dry_run
+        self.page_size = api_settings.PAGE_SIZE
+
+    def build(self):
+        """Retorna (escritos, sin cambios, eliminados)"""
+        manifest = self.read_manifest()
+        plan = self.plan()
+
+        written = 0
+        for path, (digest, render) in plan.items():
+            unchanged = manifest.get(path) == digest and os.path.isfile(self.full_path(path))
+            if unchanged and not self.full:
+                continue
+            if not self.dry_run:
+                self.write(path, render())
+            logger.info(f"Snapshot regenerado: {path}")
+            written += 1
+
+        removed = [path for path in manifest if path not in plan]
+        if not self.dry_run:
+            for path in removed:
+                for name in [path] + [path + suffix for suffix in SUFFIXES.values()]:
+                    if os.path.isfile(self.full_path(name)):
+                        os.remove(self.full_path(name))
+            self.write_manifest({path: digest for path, (digest, _) in plan.items()})
+        return written, len(plan) - written, len(removed)
+
+    def plan(self):
+        """
+        Archivos a exportar con su huella y la función que los genera. Solo se
+        leen columnas pequeñas (id y fechas), nunca el layout.
+        """
+        list_view = PublicPublicationViewSet.as_view({'get': 'list'})
+        detail_view = PublicPublicationDetailView.as_view()
+        biography_list_view = PublicBiographyViewSet.as_view({'get': 'list'})
+        biography_detail_view = PublicBiographyViewSet.as_view({'get': 'retrieve'})
+
+        sections = {
+            pk: (slug, updated_at)
+            for pk, slug, updated_at in Section.objects.values_list('id', 'slug', 'updated_at')
+        }
+        publications = list(
+            Publication.objects.filter(status='published')
+            .order_by('-publish_date', '-id')
+            .values_list('id', 'section_id', 'updated_at')
+        )
+        # Cada publicación depende de su fila y de la de su sección
+        stamps = {pk: (updated_at, sections[section_id][1]) for pk, section_id, updated_at in publications}
+
+        # La portada depende de todas las publicaciones y del orden de las secciones
+        plan = {
+            'home.json': (
+                fingerprint(sorted(stamps.items())),
+                self.renderer(PublicHomeView.as_view(), reverse('public-home'))
+            ),
+            'sections.json': (
+                fingerprint(list(public_sections().values_list('id', 'updated_at', 'stats_updated_at'))),
+                self.renderer(PublicSectionListView.as_view(), reverse('public-section-list'))
+            ),
+        }
+        listings = {'all': [pk for pk, _, _ in publications]}
+        for section_id, (slug, _) in sections.items():
+            listings[f'section/{slug}'] = [pk for pk, sid, _ in publications if sid == section_id]
+
+        for key, ids in listings.items():
+            slug = key.split('/', 1)[1] if key.startswith('section/') else None
+            query = {'section_slug': slug} if slug else {}
+            for number, page in enumerate(paginate(ids, self.page_size), 1):
+                path = f'publications/{key}/{number}.json'
+                plan[path] = (
+                    fingerprint(len(ids), [(pk, stamps[pk]) for pk in page]),
+                    self.renderer(list_view, reverse('public-publication-list'),
+                                  {**query, 'page': number}, links=f'publications/{key}/')
+                )
+
+        for pk, stamp in stamps.items():
+            plan[f'publication/{pk}.json'] = (
+                fingerprint(stamp),
+                self.renderer(detail_view, reverse('public-publication-detail', args=[pk]), id=pk)
+            )
+
+        biographies = list(
+            Biography.objects.filter(is_active=True)
+            .order_by('order', 'name', 'id')
+            .values_list('id', 'updated_at')
+        )
+        for number, page in enumerate(paginate(biographies, self.page_size), 1):
+            plan[f'biographies/{number}.json'] = (
+                fingerprint(len(biographies), page),
+                self.renderer(biography_list_view, reverse('public-biography-list'),
+                              {'page': number}, links='biographies/')
+            )
+        for pk, updated_at in biographies:
+            plan[f'biography/{pk}.json'] = (
+                fingerprint(updated_at),
+                self.renderer(biography_detail_view, reverse('public-biography-detail', args=[pk]), pk=pk)
+            )
+        return plan
+
+    def renderer(self, view, path, query=None, links=None, **kwargs):
+        def render():
+            request = self.factory.get(path, query or {}, secure=self.secure)
+            response = view(request, **kwargs)
+            if response.status_code != 200:
+                raise ValueError(f"{path} respondió {response.status_code}")
+            # Las respuestas cacheadas ya vienen renderizadas (sin Accept-Encoding: JSON plano)
+            data = response.data if hasattr(response, 'data') else json.loads(response.content)
+            if links is not None:
+                # Los enlaces de paginación apuntan a los archivos estáticos
+                page = int((query or {}).get('page', 1))
+                data = {
+                    **data,
+                    'next': self.static_url + f'{links}{page + 1}.json' if data.get('next') else None,
+                    'previous': self.static_url + f'{links}{page - 1}.json' if data.get('previous') else None,
+                }
+            return JSONRenderer().render(data)
+        return render
+
+    def full_path(self, path):
+        return os.path.join(self.root, path)
+
+    def write(self, path, content):
+        """
+        Escribe el JSON y sus versiones precomprimidas (.gz, .br) para que el
+        servidor web las sirva directamente (gzip_static / brotli_static)
+        """
+        variants = compress_variants(content, best=True)
+        for encoding, suffix in SUFFIXES.items():
+            if encoding in variants:
+                self.write_file(path + suffix, variants[encoding])
+            elif os.path.isfile(self.full_path(path + suffix)):
+                os.remove(self.full_path(path + suffix))
+        self.write_file(path, content)
+
+    def write_file(self, path, content):
+        # Escritura atómica: el servidor web nunca sirve un archivo a medias
+        full_path = self.full_path(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        tmp_path = f'{full_path}.tmp'
+        with open(tmp_path, 'wb') as fp:
+            fp.write(content)
+        os.replace(tmp_path, full_path)
+
+    def read_manifest(self):
+        try:
+            with open(self.full_path(MANIFEST_NAME), encoding='utf-8') as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return {}
+
+    def write_manifest(self, manifest):
+        self.write_file(MANIFEST_NAME, json.dumps(manifest, sort_keys=True, indent=0).encode('utf-8'))
@@ -2,15 +2,51 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
-from .models import Section, Publication, Biography
-from .serializers import SectionSerializer, PublicationSerializer, BiographySerializer
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from .models import Section, Publication, Biography, MediaAsset
+from .serializers import SectionSerializer, PublicationSerializer, BiographySerializer, variant_urls
+from .pagination import KeysetPaginationMixin
 from rest_framework.views import APIView
 from django.conf import settings
 from .utils.image_handler import ImageHandler
+from .utils.image_jobs import submit_image_job, get_job
+from .utils.public_cache import bump_version_on_commit
+from .utils.ordering import apply_order, move_item
+from .utils.layout_patch import apply_layout_patch, layout_version, layout_etag, request_version
+from .utils.layout_schema import validate_layout, check_payload_size
+from .utils.importer import ContentImporter, UploadedImageSource, ImportValidationError
+from .utils.metrics import render_prometheus
 from django.utils.text import slugify
+from django.utils.crypto import constant_time_compare
+from django.http import HttpResponse
+from django.urls import reverse
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def use_async_processing(request):
+    """Procesar en segundo plano si está configurado o si la petición lo pide"""
+    return settings.IMAGE_PROCESSING_ASYNC or request.query_params.get('async') in ('1', 'true')
+
+
+def image_job_data(request, job):
+    """Respuesta de un trabajo de imagen: URL provisoria o final y su estado"""
+    data = {
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'url': request.build_absolute_uri(settings.MEDIA_URL + job['path']),
+        'variants': variant_urls(job['variants'], request),
+        'status_url': request.build_absolute_uri(
+            reverse('upload-image-status', args=[job['job_id']])
+        ),
+    }
+    if job.get('error'):
+        data['error'] = job['error']
+    return data
 
 
 class SectionViewSet(viewsets.ModelViewSet):
@@ -73,13 +109,27 @@ class SectionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['patch'])
     def reorder(self, request):
         try:
-            for item in request.data:
-                Section.objects.filter(id=item['id']).update(order=item['order'])
-            return Response({'status': 'ok'})
+            # Todo el orden en una transacción y un solo UPDATE (marca updated_at para el ETag)
+            updated = apply_order(Section, request.data, touch=True)
+            if updated:
+                # El orden de las secciones se ve en la portada pública
+                bump_version_on_commit('publications')
+            return Response({'status': 'ok', 'updated': updated})
+        except Exception as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['patch'])
+    def move(self, request):
+        try:
+            # Orden disperso: normalmente solo se reescribe la fila movida
+            updated = move_item(Section, request.data['id'], request.data.get('after'), touch=True)
+            if updated:
+                bump_version_on_commit('publications')
+            return Response({'status': 'ok', 'updated': updated})
         except Exception as e:
             return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-class PublicationViewSet(viewsets.ModelViewSet):
+class PublicationViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
    queryset = Publication.objects.all()
    serializer_class = PublicationSerializer
    parser_classes = (MultiPartParser, FormParser, JSONParser)
@@ -88,7 +138,8 @@ class PublicationViewSet(viewsets.ModelViewSet):
        serializer.save(created_by=self.request.user)
 
    def get_queryset(self):
-       queryset = Publication.objects.all()
+       # PublicationSerializer anida la sección: se trae en el mismo JOIN
+       queryset = Publication.objects.select_related('section')
        section = self.request.query_params.get('section', None)
        if section is not None:
            queryset = queryset.filter(section_id=section)
@@ -111,21 +162,32 @@ class PublicationViewSet(viewsets.ModelViewSet):
                }, status=400)
 
            try:
-               # Validar imagen
-               ImageHandler.validate_image(image_file)
-               
-               # Procesar imagen
                handler = ImageHandler(
                    image_file,
-                   directory=settings.UPLOAD_PATHS['editor_uploads']
+                   directory=settings.UPLOAD_PATHS['assets']
                )
-               relative_path = handler.process_image()
+
+               # Validar imagen (abre la imagen una sola vez, solo la cabecera)
+               handler.validate()
+
+               # Procesar en segundo plano: se responde con la URL provisoria
+               # (si la imagen ya estaba almacenada se responde directamente)
+               if use_async_processing(request) and not MediaAsset.find(image_file):
+                   job = submit_image_job(image_file, created_by_id=request.user.id)
+                   return Response({
+                       **image_job_data(request, job),
+                       'uploaded': 1
+                   }, status=202)
+               
+               # Guardar por contenido reutilizando la imagen ya abierta
+               asset = MediaAsset.store(image_file, handler=handler, created_by_id=request.user.id)
                
                # Construir URL completa con el dominio
-               image_url = request.build_absolute_uri(settings.MEDIA_URL + relative_path)
+               image_url = request.build_absolute_uri(settings.MEDIA_URL + asset.path)
                
                return Response({
                    'url': image_url,
+                   'variants': variant_urls(asset.variants, request),
                    'uploaded': 1
                })
                
@@ -147,6 +209,12 @@ class PublicationViewSet(viewsets.ModelViewSet):
    @action(detail=True, methods=['patch'])
    def update_layout(self, request, pk=None):
        publication = self.get_object()
+       try:
+           check_payload_size(request)
+       except ValueError as e:
+           return Response({
+               'error': str(e)
+           }, status=413)
        layout = request.data.get('layout')
        
        if not layout:
@@ -154,26 +222,77 @@ class PublicationViewSet(viewsets.ModelViewSet):
                'error': 'No se proporcionó el layout'
            }, status=400)
 
-       # Validar estructura del layout
+       # Validar estructura y límites del layout (el HTML queda saneado)
        try:
-           for row in layout:
-               if not isinstance(row.get('cells', []), list):
-                   raise ValueError('Cada fila debe tener una lista de celdas')
-               for cell in row['cells']:
-                   if 'type' not in cell or 'content' not in cell:
-                       raise ValueError('Cada celda debe tener tipo y contenido')
-                   if cell['type'] not in ['text', 'image', 'video']:
-                       raise ValueError('Tipo de celda no válido')
-       except (TypeError, ValueError) as e:
+           validate_layout(layout)
+       except ValueError as e:
            return Response({
                'error': str(e)
            }, status=400)
 
-       publication.layout = layout
-       publication.save()
+       # Si el cliente indica la versión editada, no se pisa un cambio más nuevo
+       version = request_version(request)
+       with transaction.atomic():
+           # Bloqueo de la fila, como en patch_layout: la verificación y el guardado no se intercalan
+           publication = Publication.objects.select_for_update().get(pk=publication.pk)
+           if version is not None and version != layout_version(publication):
+               return self.layout_conflict(publication)
+
+           publication.layout = layout
+           publication.save()
        
        serializer = self.get_serializer(publication)
-       return Response(serializer.data)
+       return Response(serializer.data, headers={'ETag': layout_etag(publication)})
+
+   @action(detail=True, methods=['patch'])
+   def patch_layout(self, request, pk=None):
+       """
+       Edición parcial del layout con JSON Patch: {"version": ..., "operations": [...]}
+       (la versión también puede ir en If-Match). Responde 409 si otra edición
+       guardó antes.
+       """
+       publication = self.get_object()
+       try:
+           check_payload_size(request)
+       except ValueError as e:
+           return Response({
+               'error': str(e)
+           }, status=413)
+       version = request_version(request)
+       if version is None:
+           return Response({
+               'error': 'Se requiere la versión del layout (If-Match o version)'
+           }, status=428)
+
+       with transaction.atomic():
+           # Bloqueo de la fila: dos ediciones simultáneas no pueden pasar ambas la verificación
+           publication = Publication.objects.select_for_update().get(pk=publication.pk)
+           if version != layout_version(publication):
+               return self.layout_conflict(publication)
+
+           try:
+               changes = apply_layout_patch(
+                   publication.layout, request.data.get('operations'), publication.layout_size
+               )
+           except ValueError as e:
+               return Response({
+                   'error': str(e)
+               }, status=400)
+
+           # update_fields: se omiten las columnas que no cambian (save agrega las del resumen);
+           # las tablas derivadas se actualizan solo con las filas que tocó el parche
+           publication.save(update_fields=['layout', 'updated_at'], layout_changes=changes)
+
+       return Response({
+           'version': layout_version(publication),
+           'row_count': publication.row_count
+       }, headers={'ETag': layout_etag(publication)})
+
+   def layout_conflict(self, publication):
+       return Response({
+           'error': 'El layout fue modificado por otra edición',
+           'version': layout_version(publication)
+       }, status=409)
 
 class BiographyViewSet(viewsets.ModelViewSet):
    queryset = Biography.objects.all()
@@ -188,9 +307,25 @@ class BiographyViewSet(viewsets.ModelViewSet):
 
    @action(detail=False, methods=['patch'])
    def reorder(self, request):
-       for item in request.data:
-           Biography.objects.filter(id=item['id']).update(order=item['order'])
-       return Response({'status': 'ok'})
+       try:
+           # Todo el orden en una transacción y un solo UPDATE (marca updated_at para el ETag)
+           updated = apply_order(Biography, request.data, touch=True)
+       except ValueError as e:
+           return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+       if updated:
+           bump_version_on_commit('biographies')
+       return Response({'status': 'ok', 'updated': updated})
+
+   @action(detail=False, methods=['patch'])
+   def move(self, request):
+       try:
+           # Orden disperso: normalmente solo se reescribe la fila movida
+           updated = move_item(Biography, request.data['id'], request.data.get('after'), touch=True)
+       except (KeyError, TypeError, ValueError) as e:
+           return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+       if updated:
+           bump_version_on_commit('biographies')
+       return Response({'status': 'ok', 'updated': updated})
 
 
 class ImageUploadView(APIView):
@@ -206,21 +341,29 @@ class ImageUploadView(APIView):
                 }, status=400)
 
             try:
-                # Validar imagen
-                ImageHandler.validate_image(image_file)
-                
-                # Procesar imagen
                 handler = ImageHandler(
                     image_file,
-                    directory=settings.UPLOAD_PATHS['temp_uploads']  # Usar el path desde settings
+                    directory=settings.UPLOAD_PATHS['assets']  # Usar el path desde settings
                 )
-                relative_path = handler.process_image()
+
+                # Validar imagen (abre la imagen una sola vez, solo la cabecera)
+                handler.validate()
+
+                # Procesar en segundo plano: se responde con la URL provisoria
+                # (si la imagen ya estaba almacenada se responde directamente)
+                if use_async_processing(request) and not MediaAsset.find(image_file):
+                    job = submit_image_job(image_file, created_by_id=request.user.id)
+                    return Response(image_job_data(request, job), status=202)
+                
+                # Guardar por contenido reutilizando la imagen ya abierta
+                asset = MediaAsset.store(image_file, handler=handler, created_by_id=request.user.id)
                 
                 # Construir URL completa con el dominio
-                image_url = request.build_absolute_uri(settings.MEDIA_URL + relative_path)
+                image_url = request.build_absolute_uri(settings.MEDIA_URL + asset.path)
                 
                 return Response({
-                    'url': image_url
+                    'url': image_url,
+                    'variants': variant_urls(asset.variants, request)
                 })
                 
             except ValueError as e:
@@ -234,4 +377,66 @@ class ImageUploadView(APIView):
             print(traceback.format_exc())
             return Response({
                 'error': 'Error procesando la imagen'
-            }, status=500)
\ No newline at end of file
+            }, status=500)
+
+
+class ContentImportView(APIView):
+    """
+    Importación masiva: `data` es un archivo NDJSON (secciones y publicaciones)
+    e `images` las imágenes que referencia por nombre de archivo.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = (MultiPartParser,)
+
+    def post(self, request):
+        data = request.FILES.get('data')
+        if not data:
+            return Response({
+                'error': 'No se proporcionó el archivo NDJSON'
+            }, status=400)
+
+        importer = ContentImporter(
+            UploadedImageSource(request.FILES.getlist('images')),
+            user=request.user,
+            base_url=request.build_absolute_uri('/'),
+        )
+        try:
+            result = importer.run(data)
+        except ImportValidationError as e:
+            return Response({'errors': e.errors}, status=400)
+        except Exception:
+            logger.exception('Error en la importación de contenido')
+            return Response({
+                'error': 'Error importando el contenido'
+            }, status=500)
+        return Response(result, status=201)
+
+
+class ImageJobStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_job(job_id)
+        if job is None:
+            return Response({
+                'error': 'Trabajo de imagen no encontrado'
+            }, status=404)
+        return Response(image_job_data(request, job))
+
+
+class MetricsView(APIView):
+    """
+    Métricas en formato Prometheus. Acceso para administradores o para el
+    recolector con la cabecera "Authorization: Token <METRICS_TOKEN>".
+    """
+
+    def get(self, request):
+        if not (request.user.is_staff or self.has_metrics_token(request)):
+            return Response({'detail': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    def has_metrics_token(self, request):
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        return bool(settings.METRICS_TOKEN) and scheme == 'Token' and constant_time_compare(
+            token.strip(), settings.METRICS_TOKEN
+        )
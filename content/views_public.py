@@ -1,48 +1,333 @@
 # content/views_public.py
 
+import re
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from .models import Publication, Biography
-from .serializers import PublicPublicationSerializer, PublicBiographySerializer
-from django.shortcuts import get_object_or_404
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.pagination import PageNumberPagination
+from .models import Section, Publication, PublicationTerm, Biography
+from .serializers import (
+    PublicPublicationSerializer, PublicPublicationListSerializer, PublicBiographySerializer,
+    PublicSectionSerializer
+)
+from .pagination import KeysetPaginationMixin
+from .utils.public_cache import cached_response, make_validators, queryset_validators
+from .utils.search import query_terms
+from rest_framework.generics import get_object_or_404
 
-class PublicPublicationViewSet(ReadOnlyModelViewSet):
+
+ROWS_RE = re.compile(r'^(\d+)-(\d*)$')
+
+
+def get_rows_range(request):
+    """
+    Rango de filas del layout pedido con ?rows=inicio-fin (fin excluido;
+    sin fin, hasta la última fila). None si se pide el layout completo.
+    """
+    value = request.query_params.get('rows')
+    if value is None:
+        return None
+    match = ROWS_RE.match(value)
+    if not match:
+        raise ParseError('Parámetro rows inválido: use inicio-fin, por ejemplo 0-20')
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else None
+    if end is not None and end < start:
+        raise ParseError('Parámetro rows inválido: el fin es menor que el inicio')
+    return start, end
+
+
+def detail_cache_parts(id, rows):
+    # Sin rango se mantiene la clave del detalle completo
+    return ['detail', id] if rows is None else ['detail', id, 'rows', *rows]
+
+
+def public_publications(section_slug=None):
+    queryset = Publication.objects.filter(
+        status='published'
+    ).select_related('section').order_by('-publish_date', '-id')
+    if section_slug:
+        queryset = queryset.filter(section__slug=section_slug)
+    return queryset
+
+
+def public_publication_queryset(rows=None):
+    queryset = Publication.objects.select_related('section')
+    if rows is not None:
+        # Las filas salen de PublicationRow: no se lee ni decodifica el layout completo
+        queryset = queryset.defer('layout')
+    return queryset
+
+
+def rows_bounds(publication, rows):
+    """(inicio, fin, total) del rango pedido, acotado a las filas existentes"""
+    total = publication.row_count
+    start, end = rows
+    end = total if end is None else min(end, total)
+    return min(start, end), end, total
+
+
+def publication_rows_data(request, publication, start, end, total):
+    serializer = PublicPublicationSerializer(
+        publication,
+        context={'request': request}
+    )
+
+    next_url = None
+    if end < total:
+        size = max(end - start, 1)
+        next_url = replace_query_param(request.build_absolute_uri(), 'rows', f'{end}-{end + size}')
+    return {
+        **serializer.data,
+        'rows': {'start': start, 'end': end, 'total': total, 'next': next_url},
+    }
+
+
+def get_public_publication_data(request, id, rows=None):
+    publication = get_object_or_404(
+        public_publication_queryset(rows),
+        id=id,
+        status='published'
+    )
+    if rows is None:
+        serializer = PublicPublicationSerializer(
+            publication,
+            context={'request': request}  # Añadimos el contexto
+        )
+        return serializer.data
+
+    start, end, total = rows_bounds(publication, rows)
+    publication.layout = list(
+        publication.layout_rows.filter(position__gte=start, position__lt=end).values_list('data', flat=True)
+    )
+    return publication_rows_data(request, publication, start, end, total)
+
+
+def public_biographies():
+    # Solo mostrar biografías activas al público
+    return Biography.objects.filter(is_active=True).order_by('order', 'name', 'id')
+
+
+def get_home_limit(request):
+    """Publicaciones por sección de la portada (?per_section=N)"""
+    value = request.query_params.get('per_section')
+    if value is None:
+        return settings.PUBLIC_HOME_PER_SECTION
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= settings.PUBLIC_HOME_MAX_PER_SECTION:
+        raise ParseError(
+            f'Parámetro per_section inválido: debe estar entre 1 y {settings.PUBLIC_HOME_MAX_PER_SECTION}'
+        )
+    return limit
+
+
+def home_querysets(per_section):
+    """
+    (destacadas, últimas por sección). Las últimas salen de una sola consulta
+    con ROW_NUMBER() OVER (PARTITION BY section_id ...) en lugar de una
+    consulta por sección.
+    """
+    summaries = Publication.objects.filter(status='published').select_related('section').defer('layout')
+    featured = summaries.filter(is_featured=True).order_by('-publish_date', '-id')[:settings.PUBLIC_HOME_FEATURED]
+    latest = summaries.filter(section__is_active=True).annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=F('section_id'),
+            order_by=[F('publish_date').desc(), F('id').desc()],
+        )
+    ).filter(position__lte=per_section).order_by('section__order', 'section_id', 'position')
+    return featured, latest
+
+
+def home_data(request, featured, latest):
+    """Respuesta de la portada a partir de las publicaciones ya leídas"""
+    context = {'request': request}
+    sections = {}
+    for publication in latest:
+        section = publication.section
+        if section.id not in sections:
+            sections[section.id] = {'id': section.id, 'title': section.title, 'slug': section.slug, 'publications': []}
+        sections[section.id]['publications'].append(publication)
+    return {
+        'featured': PublicPublicationListSerializer(featured, many=True, context=context).data,
+        'sections': [
+            {
+                **section,
+                'publications': PublicPublicationListSerializer(
+                    section['publications'], many=True, context=context
+                ).data,
+            }
+            for section in sections.values()
+        ],
+    }
+
+
+def home_validators(parts):
+    # Cualquier publicación publicada o su sección puede cambiar la portada
+    return queryset_validators(Publication.objects.filter(status='published'), parts, 'section__updated_at')
+
+
+def public_sections():
+    return Section.objects.filter(is_active=True).order_by('order', 'id')
+
+
+def get_public_publication_validators(id):
+    # Solo las fechas de la fila y de su sección: sin cargar el layout
+    stamps = Publication.objects.filter(
+        id=id,
+        status='published'
+    ).values_list('updated_at', 'section__updated_at').first()
+    if stamps is None:
+        return None, None
+    return make_validators(['detail', id], *stamps)
+
+
+def get_public_biography_validators(pk):
+    # Detalle: ETag y Last-Modified con la fecha de la fila (None si no es pública)
+    stamps = public_biographies().filter(pk=pk).values_list('updated_at').first()
+    if stamps is None:
+        return None, None
+    return make_validators(['detail', pk], *stamps)
+
+
+class PublicPublicationViewSet(KeysetPaginationMixin, ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
     serializer_class = PublicPublicationSerializer
-    
+    lookup_value_regex = r'\d+'
+    # Parámetros que forman parte de la clave de caché del listado
+    cache_query_params = ('section_slug', 'page', 'pagination', 'cursor', 'with_count')
+
     def get_queryset(self):
-        queryset = Publication.objects.filter(
-            status='published'
-        ).select_related('section').order_by('-publish_date')
-        
-        section_slug = self.request.query_params.get('section_slug', None)
-        if section_slug:
-            queryset = queryset.filter(section__slug=section_slug)
-        
+        queryset = public_publications(self.request.query_params.get('section_slug', None))
+
+        if self.action == 'list':
+            # El listado no necesita el layout: evitamos leerlo y serializarlo
+            queryset = queryset.defer('layout')
+
         return queryset
 
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return PublicPublicationListSerializer
+        return PublicPublicationSerializer
+
+    def list(self, request, *args, **kwargs):
+        params = [request.query_params.get(name, '') for name in self.cache_query_params]
+        return cached_response(
+            request, 'publications', ['list', 'summary', *params],
+            lambda: super(PublicPublicationViewSet, self).list(request, *args, **kwargs).data,
+            lambda: queryset_validators(
+                self.get_queryset(), ['list', 'summary', *params], 'section__updated_at'
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        id = kwargs[self.lookup_field]
+        rows = get_rows_range(request)
+        return cached_response(
+            request, 'publications', detail_cache_parts(id, rows),
+            lambda: get_public_publication_data(request, id, rows),
+            lambda: get_public_publication_validators(id)
+        )
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        # Los términos normalizados forman la clave: "Sección" y "seccion" comparten caché
+        terms = query_terms(request.query_params.get('q', ''))
+        if not terms:
+            return Response({'detail': 'Ingrese al menos un término de búsqueda'}, status=400)
+        section_slug = request.query_params.get('section_slug', '')
+        page = request.query_params.get('page', '')
+        return cached_response(
+            request, 'publications', ['search', ' '.join(terms), section_slug, page],
+            lambda: self.get_search_data(request, terms, section_slug)
+        )
+
+    def get_search_data(self, request, terms, section_slug):
+        paginator = PageNumberPagination()
+        ranked = paginator.paginate_queryset(
+            PublicationTerm.search(terms, section_slug), request, view=self
+        )
+        ids = [row['publication'] for row in ranked]
+        publications = Publication.objects.select_related('section').defer('layout').in_bulk(ids)
+        serializer = PublicPublicationListSerializer(
+            [publications[pk] for pk in ids if pk in publications],
+            many=True,
+            context={'request': request}
+        )
+        return paginator.get_paginated_response(serializer.data).data
+
 class PublicPublicationDetailView(APIView):
     permission_classes = [AllowAny]
-    
+
     def get(self, request, id):
-        publication = get_object_or_404(
-            Publication.objects.select_related('section'),
-            id=id,
-            status='published'
+        rows = get_rows_range(request)
+        return cached_response(
+            request, 'publications', detail_cache_parts(id, rows),
+            lambda: get_public_publication_data(request, id, rows),
+            lambda: get_public_publication_validators(id)
         )
-        serializer = PublicPublicationSerializer(
-            publication,
-            context={'request': request}  # Añadimos el contexto
+
+class PublicHomeView(APIView):
+    """Portada en una sola respuesta: destacadas y últimas publicaciones por sección activa"""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        per_section = get_home_limit(request)
+        parts = ['home', per_section]
+        return cached_response(
+            request, 'publications', parts,
+            lambda: home_data(request, *home_querysets(per_section)),
+            lambda: home_validators(parts)
+        )
+
+class PublicSectionListView(APIView):
+    """
+    Secciones activas en orden con su cantidad de publicaciones publicadas y
+    la fecha de la más reciente. Los contadores se leen de la propia fila
+    (Section.refresh_publication_stats), sin COUNT ... GROUP BY por petición.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return cached_response(
+            request, 'publications', ['sections'],
+            lambda: PublicSectionSerializer(public_sections(), many=True).data,
+            lambda: queryset_validators(public_sections(), ['sections'], 'stats_updated_at')
         )
-        return Response(serializer.data)
 
 # Nueva vista para biografías públicas
 class PublicBiographyViewSet(ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
     serializer_class = PublicBiographySerializer
-    
+    lookup_value_regex = r'\d+'
+    cache_query_params = ('page',)
+
     def get_queryset(self):
-        # Solo mostrar biografías activas al público
-        return Biography.objects.filter(is_active=True).order_by('order', 'name')
\ No newline at end of file
+        return public_biographies()
+
+    def list(self, request, *args, **kwargs):
+        params = [request.query_params.get(name, '') for name in self.cache_query_params]
+        return cached_response(
+            request, 'biographies', ['list', *params],
+            lambda: super(PublicBiographyViewSet, self).list(request, *args, **kwargs).data,
+            lambda: queryset_validators(self.get_queryset(), ['list', *params])
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        return cached_response(
+            request, 'biographies', ['detail', pk],
+            lambda: super(PublicBiographyViewSet, self).retrieve(request, *args, **kwargs).data,
+            lambda: get_public_biography_validators(pk)
+        )
@@ -0,0 +1,177 @@
+# content/views_public_async.py
+"""
+Versión asíncrona de las lecturas públicas (listado y detalle de
+publicaciones y biografías) para servir bajo ASGI (config/asgi.py).
+
+También la portada (home) y las secciones. Mientras una petición espera a la base de datos
+o a la caché el worker atiende otras, en vez de quedar un hilo bloqueado por conexión. DRF 3.14 no
+tiene vistas asíncronas: son vistas de Django que reutilizan los
+serializadores, la paginación y la caché de views_public y devuelven el
+mismo JSON (sin la API navegable). La búsqueda sigue siendo síncrona.
+"""
+from functools import wraps
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException, MethodNotAllowed, NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from .models import Publication
+from .pagination import AsyncPageNumberPagination, PublicationKeysetPagination
+from .serializers import (
+    PublicPublicationSerializer, PublicPublicationListSerializer, PublicBiographySerializer,
+    PublicSectionSerializer
+)
+from .utils.public_cache import acached_response, aqueryset_validators, make_validators
+from .views_public import (
+    PublicPublicationViewSet, PublicBiographyViewSet, detail_cache_parts, get_rows_range,
+    get_home_limit, home_data, home_querysets, public_biographies, public_sections, public_publications, public_publication_queryset,
+    publication_rows_data, rows_bounds
+)
+
+
+def error_response(exc):
+    # Mismo cuerpo que el manejador de excepciones de DRF
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    return HttpResponse(JSONRenderer().render(data), status=exc.status_code, content_type='application/json')
+
+
+def public_read(view):
+    """
+    Solo GET/HEAD. La vista recibe un Request de DRF (query_params,
+    contexto de los serializadores) y sus excepciones se responden como en DRF.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            if request.method not in ('GET', 'HEAD'):
+                raise MethodNotAllowed(request.method)
+            return await view(Request(request), *args, **kwargs)
+        except APIException as exc:
+            return error_response(exc)
+    return wrapper
+
+
+async def paginated_data(request, queryset, serializer_class, paginator):
+    page = await paginator.apaginate_queryset(queryset, request)
+    serializer = serializer_class(page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data).data
+
+
+async def aget_public_object(queryset, **filters):
+    try:
+        return await queryset.aget(**filters)
+    except queryset.model.DoesNotExist:
+        raise NotFound()
+
+
+@public_read
+async def publication_list(request):
+    params = [request.query_params.get(name, '') for name in PublicPublicationViewSet.cache_query_params]
+    parts = ['list', 'summary', *params]
+    queryset = public_publications(request.query_params.get('section_slug', None)).defer('layout')
+    if PublicationKeysetPagination.is_requested(request):
+        paginator = PublicationKeysetPagination()
+    else:
+        paginator = AsyncPageNumberPagination()
+    return await acached_response(
+        request, 'publications', parts,
+        lambda: paginated_data(request, queryset, PublicPublicationListSerializer, paginator),
+        lambda: aqueryset_validators(queryset, parts, 'section__updated_at')
+    )
+
+
+async def get_public_publication_data(request, id, rows=None):
+    publication = await aget_public_object(public_publication_queryset(rows), id=id, status='published')
+    if rows is None:
+        return PublicPublicationSerializer(publication, context={'request': request}).data
+
+    start, end, total = rows_bounds(publication, rows)
+    publication.layout = [
+        data async for data in
+        publication.layout_rows.filter(position__gte=start, position__lt=end).values_list('data', flat=True)
+    ]
+    return publication_rows_data(request, publication, start, end, total)
+
+
+async def get_public_publication_validators(id):
+    stamps = await Publication.objects.filter(
+        id=id,
+        status='published'
+    ).values_list('updated_at', 'section__updated_at').afirst()
+    if stamps is None:
+        return None, None
+    return make_validators(['detail', id], *stamps)
+
+
+@public_read
+async def publication_detail(request, id):
+    id = int(id)
+    rows = get_rows_range(request)
+    return await acached_response(
+        request, 'publications', detail_cache_parts(id, rows),
+        lambda: get_public_publication_data(request, id, rows),
+        lambda: get_public_publication_validators(id)
+    )
+
+
+async def get_home_data(request, per_section):
+    featured, latest = home_querysets(per_section)
+    featured = [publication async for publication in featured.aiterator()]
+    latest = [publication async for publication in latest.aiterator()]
+    return home_data(request, featured, latest)
+
+
+@public_read
+async def home(request):
+    per_section = get_home_limit(request)
+    parts = ['home', per_section]
+    return await acached_response(
+        request, 'publications', parts,
+        lambda: get_home_data(request, per_section),
+        lambda: aqueryset_validators(Publication.objects.filter(status='published'), parts, 'section__updated_at')
+    )
+
+
+async def get_sections_data():
+    sections = [section async for section in public_sections().aiterator()]
+    return PublicSectionSerializer(sections, many=True).data
+
+
+@public_read
+async def section_list(request):
+    return await acached_response(
+        request, 'publications', ['sections'],
+        get_sections_data,
+        lambda: aqueryset_validators(public_sections(), ['sections'], 'stats_updated_at')
+    )
+
+
+@public_read
+async def biography_list(request):
+    params = [request.query_params.get(name, '') for name in PublicBiographyViewSet.cache_query_params]
+    queryset = public_biographies()
+    return await acached_response(
+        request, 'biographies', ['list', *params],
+        lambda: paginated_data(request, queryset, PublicBiographySerializer, AsyncPageNumberPagination()),
+        lambda: aqueryset_validators(queryset, ['list', *params])
+    )
+
+
+async def get_public_biography_data(request, pk):
+    biography = await aget_public_object(public_biographies(), pk=pk)
+    return PublicBiographySerializer(biography, context={'request': request}).data
+
+
+async def get_public_biography_validators(pk):
+    stamps = await public_biographies().filter(pk=pk).values_list('updated_at').afirst()
+    if stamps is None:
+        return None, None
+    return make_validators(['detail', pk], *stamps)
+
+
+@public_read
+async def biography_detail(request, pk):
+    return await acached_response(
+        request, 'biographies', ['detail', pk],
+        lambda: get_public_biography_data(request, pk),
+        lambda: get_public_biography_validators(pk)
+    )